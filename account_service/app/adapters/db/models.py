@@ -11,3 +11,6 @@ class Account(Base):
     handle = Column(String, nullable=False)     # username o nombre de la cuenta
     token = Column(String, nullable=False)      # access token (por ahora texto plano)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Lo escribe la validación de cuentas del executor_service
+    health_status = Column(String, nullable=True)   # "active" | "invalid" | "error"
+    last_checked_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,11 +1,14 @@
 # en app/adapters/db/sqlalchemy_repository.py
 
+import json
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.domain.ports import AccountRepositoryPort
 from app.domain.models import Account
 from ...schemas import AccountCreate, AccountUpdate
 from .models import Account as SQLAccount
+from ...config import settings
 
 class SQLAlchemyAccountRepository(AccountRepositoryPort):
     """
@@ -41,6 +44,7 @@ class SQLAlchemyAccountRepository(AccountRepositoryPort):
         db_account = self.db.query(SQLAccount).filter(SQLAccount.id == account.id).first()
         if db_account:
             self.db.delete(db_account)
+            self._notify_account_changed(account.id)
             self.db.commit()
         return account
 
@@ -56,8 +60,24 @@ class SQLAlchemyAccountRepository(AccountRepositoryPort):
             db_account.handle = account_data.handle
         if account_data.token:
             db_account.token = account_data.token
+            # Token nuevo: la validación anterior ya no aplica
+            db_account.health_status = None
+            db_account.last_checked_at = None
+            self._notify_account_changed(account_id)
         
         self.db.commit()
         self.db.refresh(db_account)
         
-        return Account.model_validate(db_account)
\ No newline at end of file
+        return Account.model_validate(db_account)
+
+    def _notify_account_changed(self, account_id: int):
+        """
+        Avisa al executor_service (LISTEN/NOTIFY) de que el token de la cuenta
+        cambió, para que invalide su cliente de Reddit cacheado. PostgreSQL
+        solo entrega la notificación si la transacción hace commit.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            self.db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": settings.ACCOUNT_NOTIFY_CHANNEL, "payload": json.dumps({"account_id": account_id})},
+            )
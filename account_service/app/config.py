@@ -5,6 +5,9 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     JWT_ALGORITHM: str
 
+    # Canal de LISTEN/NOTIFY para que el executor_service descarte clientes cacheados
+    ACCOUNT_NOTIFY_CHANNEL: str = "account_updated"
+
     class Config:
         # Pydantic buscará automáticamente variables de entorno.
         # env_file es un respaldo útil para pruebas locales.
@@ -1,6 +1,7 @@
 # en app/domain/models.py
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
+from typing import Optional
 
 class Account(BaseModel):
     """
@@ -13,6 +14,8 @@ class Account(BaseModel):
     handle: str
     token: str
     created_at: datetime
+    health_status: Optional[str] = None
+    last_checked_at: Optional[datetime] = None
 
     # Configuración de Pydantic V2 para "traducir"
     # desde modelos SQLAlchemy (antiguo orm_mode)
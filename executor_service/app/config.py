@@ -1,4 +1,6 @@
 import os
+import json
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,3 +8,175 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecret")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
+# Sincronizar el esquema (ver `database.sync_schema`) al arrancar la API y el worker. Con
+# "false" se ejecuta aparte una sola vez por despliegue: `python -m app.database`.
+SCHEMA_SYNC_ON_STARTUP = os.getenv("SCHEMA_SYNC_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# --- Worker ---
+# Número de workers concurrentes por contenedor y si corren como hilos o procesos.
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "1"))
+WORKER_POOL_MODE = os.getenv("WORKER_POOL_MODE", "thread")  # "thread" | "process" | "async"
+WORKER_IDLE_SECONDS = float(os.getenv("WORKER_IDLE_SECONDS", "60"))
+# Tareas que un worker reclama de una vez, todas de la misma cuenta: se ejecutan seguidas
+# con el mismo cliente autenticado; 1 desactiva los lotes.
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "8"))
+# Tiempo máximo que las tareas de un lote pueden quedarse esperando turno: pasado este
+# tiempo (también si la tarea en curso tarda más) se devuelven a la cola para otros workers.
+WORKER_BATCH_MAX_SECONDS = float(os.getenv("WORKER_BATCH_MAX_SECONDS", "60"))
+
+# Modo "async": tareas simultáneas en el event loop (los plugins async comparten un
+# único hilo) y hilos para los plugins síncronos (WORKER_CONCURRENCY).
+ASYNC_MAX_TASKS = int(os.getenv("ASYNC_MAX_TASKS", "200"))
+
+# --- Plugins ---
+# Manifiesto {task_type: módulo} generado al construir la imagen
+# (python -m app.executor.plugin_registry build). Los plugins se importan al
+# usarse por primera vez; con PLUGIN_WARMUP se precargan en segundo plano.
+PLUGIN_MANIFEST_PATH = os.getenv(
+    "PLUGIN_MANIFEST_PATH", os.path.join(os.path.dirname(__file__), "executor", "plugins", "manifest.json")
+)
+PLUGIN_WARMUP = os.getenv("PLUGIN_WARMUP", "false").lower() in ("1", "true", "yes")
+
+# Puerto en el que el worker sirve /metrics (formato Prometheus); 0 lo desactiva.
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+# Directorio del modo multiproceso de prometheus_client: en modo "process" cada hijo escribe
+# ahí sus métricas y el padre las sirve sumadas en METRICS_PORT. Si no se indica se usa uno
+# temporal. prometheus_client lo lee al importarse, así que se fija aquí.
+if WORKER_POOL_MODE == "process" and WORKER_CONCURRENCY > 1:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "executor_metrics"))
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Conexiones del pool de SQLAlchemy: una por worker más margen para la API.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(WORKER_CONCURRENCY + 5)))
+
+# --- Jobs de ejecución (POST /executor/execute/{account_id}) ---
+TASK_SERVICE_URL = os.getenv("TASK_SERVICE_URL", "http://task_service:8000")
+# Cliente HTTP hacia task_service: conexiones keep-alive reutilizadas, timeouts de
+# conexión y lectura, y un máximo de reintentos por petición (solo errores transitorios).
+TASK_SERVICE_POOL_SIZE = int(os.getenv("TASK_SERVICE_POOL_SIZE", "10"))
+TASK_SERVICE_CONNECT_TIMEOUT = float(os.getenv("TASK_SERVICE_CONNECT_TIMEOUT", "3"))
+TASK_SERVICE_READ_TIMEOUT = float(os.getenv("TASK_SERVICE_READ_TIMEOUT", "15"))
+TASK_SERVICE_RETRIES = int(os.getenv("TASK_SERVICE_RETRIES", "2"))
+# Cada cuántas tareas se guarda el progreso del job y cada cuánto lo consulta el stream de eventos.
+JOB_PROGRESS_EVERY = int(os.getenv("JOB_PROGRESS_EVERY", "50"))
+JOB_EVENTS_POLL_SECONDS = float(os.getenv("JOB_EVENTS_POLL_SECONDS", "1"))
+# Sin cambios, el stream manda un comentario de keep-alive cada JOB_EVENTS_KEEPALIVE_SECONDS;
+# cada conexión dura como mucho JOB_EVENTS_MAX_SECONDS (EventSource se reconecta solo).
+JOB_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("JOB_EVENTS_KEEPALIVE_SECONDS", "15"))
+JOB_EVENTS_MAX_SECONDS = float(os.getenv("JOB_EVENTS_MAX_SECONDS", "3600"))
+# Un job 'queued' o 'running' sin progreso en este tiempo se da por perdido (la réplica que lo
+# ejecutaba se reinició o cayó) y pasa a 'failed'. Los jobs activos guardan progreso antes.
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "600"))
+
+# --- Logs de ejecución ---
+# Se encolan (cola acotada) y un hilo los escribe por lotes: cada LOG_FLUSH_SECONDS o al
+# juntar LOG_BATCH_SIZE. Con la cola llena se espera LOG_QUEUE_PUT_TIMEOUT y después se descarta.
+# En PostgreSQL los lotes se cargan con COPY (LOG_USE_COPY); si no, con un INSERT multi-fila.
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "500"))
+LOG_FLUSH_SECONDS = float(os.getenv("LOG_FLUSH_SECONDS", "1"))
+LOG_QUEUE_PUT_TIMEOUT = float(os.getenv("LOG_QUEUE_PUT_TIMEOUT", "1"))
+LOG_USE_COPY = os.getenv("LOG_USE_COPY", "true").lower() in ("1", "true", "yes")
+# Un lote que falla se reintenta LOG_WRITE_RETRIES veces (espera LOG_WRITE_RETRY_SECONDS,
+# duplicándose en cada intento) antes de descartarse.
+LOG_WRITE_RETRIES = int(os.getenv("LOG_WRITE_RETRIES", "3"))
+LOG_WRITE_RETRY_SECONDS = float(os.getenv("LOG_WRITE_RETRY_SECONDS", "0.5"))
+
+# --- Exportación de logs (GET /executor/logs/export) ---
+# Filas que se traen del cursor de servidor en cada vuelta y nivel de compresión gzip (1-9).
+LOG_EXPORT_YIELD_PER = int(os.getenv("LOG_EXPORT_YIELD_PER", "1000"))
+LOG_EXPORT_GZIP_LEVEL = int(os.getenv("LOG_EXPORT_GZIP_LEVEL", "6"))
+
+# --- Almacenamiento de logs por meses ---
+# En PostgreSQL `execution_logs` se particiona por mes; en SQLite se usa una tabla por mes.
+# Se crean LOG_PARTITIONS_AHEAD meses por adelantado y el mantenimiento corre cada
+# LOG_MAINTENANCE_SECONDS. Con LOG_RETENTION_MONTHS > 0 se borran los meses más antiguos
+# (se conservan al menos ese número de meses completos); 0 = conservar siempre.
+# Los agregados diarios (execution_log_daily) no se borran.
+LOG_PARTITIONS_AHEAD = int(os.getenv("LOG_PARTITIONS_AHEAD", "2"))
+LOG_RETENTION_MONTHS = int(os.getenv("LOG_RETENTION_MONTHS", "0"))
+LOG_MAINTENANCE_SECONDS = float(os.getenv("LOG_MAINTENANCE_SECONDS", "3600"))
+
+# Canal de LISTEN/NOTIFY por el que task_service avisa de tareas nuevas.
+TASK_NOTIFY_CHANNEL = os.getenv("TASK_NOTIFY_CHANNEL", "new_task")
+
+# --- Leases de tareas ---
+# Una tarea 'running' cuyo lease vence sin renovarse (worker caído) vuelve a 'pending'.
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "120"))
+TASK_HEARTBEAT_SECONDS = float(os.getenv("TASK_HEARTBEAT_SECONDS", "30"))
+TASK_REAPER_INTERVAL = float(os.getenv("TASK_REAPER_INTERVAL", "60"))
+# Tiempo máximo de ejecución de un plugin; se puede ajustar por tipo con JSON, p. ej. {"moderar": 1800}
+TASK_DEFAULT_TIMEOUT = float(os.getenv("TASK_DEFAULT_TIMEOUT", "900"))
+TASK_TIMEOUTS = json.loads(os.getenv("TASK_TIMEOUTS", "{}"))
+# Tras cancelar un plugin vencido, cuánto se espera a que su hilo se detenga antes de dar la
+# tarea por perdida (sin reintento: el hilo podría seguir actuando en Reddit).
+TASK_CANCEL_GRACE_SECONDS = float(os.getenv("TASK_CANCEL_GRACE_SECONDS", "60"))
+
+# --- Reintentos de tareas ---
+# Los errores transitorios se reintentan con backoff exponencial (con jitter) hasta
+# TASK_MAX_ATTEMPTS intentos; después la tarea pasa a 'dead'.
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "5"))
+TASK_RETRY_BASE_SECONDS = float(os.getenv("TASK_RETRY_BASE_SECONDS", "30"))
+TASK_RETRY_MAX_SECONDS = float(os.getenv("TASK_RETRY_MAX_SECONDS", "3600"))
+
+# --- Prioridades y reparto justo ---
+# Las tareas con prioridad >= TASK_URGENT_PRIORITY (p. ej. borrado_emergencia) pueden usar
+# WORKER_URGENT_SLOTS workers reservados, de modo que nunca esperan detrás de trabajo masivo.
+TASK_URGENT_PRIORITY = int(os.getenv("TASK_URGENT_PRIORITY", "100"))
+WORKER_URGENT_SLOTS = int(os.getenv("WORKER_URGENT_SLOTS", "1" if WORKER_CONCURRENCY >= 4 else "0"))
+# Peso de cada usuario en el reparto de la cola, en JSON: {"<user_id>": peso}. Por defecto 1.
+FAIR_SHARE_USER_WEIGHTS = {int(k): float(v) for k, v in json.loads(os.getenv("FAIR_SHARE_USER_WEIGHTS", "{}")).items()}
+# Candidatas que se intentan reclamar por consulta si otro worker se adelanta.
+FAIR_SHARE_CANDIDATES = int(os.getenv("FAIR_SHARE_CANDIDATES", "8"))
+
+# --- Tareas programadas ---
+# Cada proceso de workers arranca un planificador, pero en PostgreSQL solo dispara el que
+# tiene el advisory lock de líder; los demás quedan en espera por si el líder cae.
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+# Cada cuánto un planificador en espera intenta hacerse líder.
+SCHEDULER_LEADER_RETRY_SECONDS = float(os.getenv("SCHEDULER_LEADER_RETRY_SECONDS", "15"))
+# Cada cuánto se incorporan las programaciones nuevas o editadas si no llega aviso.
+SCHEDULER_REFRESH_SECONDS = float(os.getenv("SCHEDULER_REFRESH_SECONDS", "30"))
+# Canal por el que task_service avisa de programaciones creadas, editadas o borradas.
+SCHEDULE_NOTIFY_CHANNEL = os.getenv("SCHEDULE_NOTIFY_CHANNEL", "schedule_updated")
+
+# --- Clientes de Reddit ---
+REDDIT_CLIENT_CACHE_SIZE = int(os.getenv("REDDIT_CLIENT_CACHE_SIZE", "256"))
+REDDIT_CLIENT_CACHE_TTL = float(os.getenv("REDDIT_CLIENT_CACHE_TTL", "3600"))
+# Canal por el que account_service avisa de tokens actualizados o cuentas borradas.
+ACCOUNT_NOTIFY_CHANNEL = os.getenv("ACCOUNT_NOTIFY_CHANNEL", "account_updated")
+
+# --- Límites de la API de Reddit (token bucket compartido vía BD) ---
+# Peticiones por segundo y ráfaga máxima. Un ritmo de 0 desactiva ese límite.
+REDDIT_GLOBAL_RATE = float(os.getenv("REDDIT_GLOBAL_RATE", "1.5"))
+REDDIT_GLOBAL_BURST = float(os.getenv("REDDIT_GLOBAL_BURST", "10"))
+REDDIT_ACCOUNT_RATE = float(os.getenv("REDDIT_ACCOUNT_RATE", "1"))
+REDDIT_ACCOUNT_BURST = float(os.getenv("REDDIT_ACCOUNT_BURST", "5"))
+# Tokens que cada proceso reserva de una vez en la BD (1 = una escritura por petición).
+REDDIT_RATE_BATCH = int(os.getenv("REDDIT_RATE_BATCH", "5"))
+
+# --- Moderación incremental ---
+# Margen (segundos) por debajo de la marca de agua en el que aún se consultan los IDs
+# ya evaluados; los comentarios más antiguos se dan por revisados.
+MODERATION_WATERMARK_SLACK = float(os.getenv("MODERATION_WATERMARK_SLACK", "3600"))
+# Moderación continua: duración máxima de una tarea en modo "stream" y cada cuánto se guarda el checkpoint.
+MODERATION_STREAM_MAX_SECONDS = float(os.getenv("MODERATION_STREAM_MAX_SECONDS", "3600"))
+MODERATION_STREAM_CHECKPOINT_SECONDS = float(os.getenv("MODERATION_STREAM_CHECKPOINT_SECONDS", "30"))
+MODERATION_STREAM_BUFFER = int(os.getenv("MODERATION_STREAM_BUFFER", "100"))
+
+# --- Acciones masivas (borrados) ---
+BULK_ACTION_CONCURRENCY = int(os.getenv("BULK_ACTION_CONCURRENCY", "4"))
+BULK_ACTION_RETRIES = int(os.getenv("BULK_ACTION_RETRIES", "3"))
+BULK_ACTION_BACKOFF_SECONDS = float(os.getenv("BULK_ACTION_BACKOFF_SECONDS", "1"))
+
+# --- Borrado de emergencia ---
+# Hasta este tamaño de hilo se recorre el árbol; por encima se compara con el historial de la cuenta.
+EMERGENCY_DELETE_TREE_MAX_COMMENTS = int(os.getenv("EMERGENCY_DELETE_TREE_MAX_COMMENTS", "500"))
+# Máximo de expansiones de "MoreComments" al recorrer el árbol (cada tarea puede fijar "more_limit").
+EMERGENCY_DELETE_MORE_LIMIT = int(os.getenv("EMERGENCY_DELETE_MORE_LIMIT", "32"))
+
+# --- Validación de cuentas ---
+ACCOUNT_VALIDATION_CONCURRENCY = int(os.getenv("ACCOUNT_VALIDATION_CONCURRENCY", "16"))
+ACCOUNT_VALIDATION_TIMEOUT = float(os.getenv("ACCOUNT_VALIDATION_TIMEOUT", "10"))
+# Resultados que se acumulan antes de guardarlos en una actualización masiva
+ACCOUNT_VALIDATION_FLUSH_SIZE = int(os.getenv("ACCOUNT_VALIDATION_FLUSH_SIZE", "50"))
@@ -1,14 +1,87 @@
+import logging
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import create_engine
-from .config import DATABASE_URL
+from sqlalchemy import create_engine, inspect, text
+from .config import DATABASE_URL, DB_POOL_SIZE
 
 Base = declarative_base()
-engine = create_engine(DATABASE_URL)
+
+def _engine_options(url: str) -> dict:
+    """
+    Opciones del engine según el dialecto. SQLite (pruebas locales) necesita
+    compartir conexiones entre hilos; PostgreSQL usa un pool dimensionado
+    para los workers concurrentes.
+    """
+    if url and url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_POOL_SIZE, "pool_pre_ping": True}
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def dialect_insert(bind, table):
+    """
+    INSERT propio del dialecto de `bind` (sesión o conexión), que admite
+    `on_conflict_do_nothing` / `on_conflict_do_update` en PostgreSQL y SQLite.
+    """
+    from sqlalchemy.dialects import postgresql, sqlite
+    dialect = bind.get_bind().dialect if hasattr(bind, "get_bind") else bind.dialect
+    return (postgresql.insert if dialect.name == "postgresql" else sqlite.insert)(table)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+# Clave del advisory lock de PostgreSQL que serializa `sync_schema` entre procesos
+SCHEMA_LOCK_KEY = 0x73636865
+
+def sync_schema():
+    """
+    Crea las tablas que faltan y añade a las tablas existentes las columnas
+    e índices nuevos de los modelos. Los servicios comparten la BD y no hay
+    herramienta de migraciones, así que `create_all` por sí solo no vería
+    columnas añadidas a tablas que otro servicio ya creó (p. ej. `tasks`).
+    Las columnas nuevas deben ser anulables o tener `server_default`.
+
+    Todo ocurre en una transacción bajo un advisory lock: si la API y los
+    workers arrancan a la vez, el resto espera y después ya no encuentra
+    nada que hacer (el DDL de PostgreSQL es transaccional).
+    """
+    from . import models  # noqa: F401  (registra todas las tablas en Base.metadata)
+    from .executor import log_storage
+
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        # `execution_logs` está particionada por meses: se crea (o convierte) aparte
+        log_storage.prepare(conn)
+        Base.metadata.create_all(bind=conn)
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    ddl += f" DEFAULT {getattr(default, 'text', default)}"
+                logging.info(f"Esquema: añadiendo columna {table.name}.{column.name}")
+                conn.execute(text(ddl))
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    logging.info(f"Esquema: creando índice {index.name}")
+                    index.create(conn)
+
+if __name__ == "__main__":
+    # Paso de migración de un despliegue: python -m app.database
+    logging.basicConfig(level=logging.INFO)
+    # Ejecutado como script este módulo es `__main__`: los modelos se registran en `app.database`
+    from app import database
+    database.sync_schema()
@@ -0,0 +1,138 @@
+# en executor_service/app/executor/async_reddit.py
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncpraw
+from asyncprawcore import Requestor
+from ..config import REDDIT_CLIENT_CACHE_SIZE, REDDIT_CLIENT_CACHE_TTL
+from .errors import AuthenticationError, is_auth_error
+from .rate_limiter import TokenBucketLimiter, rate_limiter
+from .reddit_bot import REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT, CachedClient
+from . import task_context, metrics
+
+class AsyncRateLimitedRequestor(Requestor):
+    """
+    Equivalente de `RateLimitedRequestor` para asyncprawcore: cada petición
+    pasa por el rate limiter compartido sin bloquear el event loop.
+    """
+
+    def __init__(self, *args, account_id: Optional[int] = None, limiter: TokenBucketLimiter = rate_limiter, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.account_id = account_id
+        self.limiter = limiter
+
+    @asynccontextmanager
+    async def request(self, *args, **kwargs):
+        task_context.heartbeat()
+        await self.limiter.acquire_async(self.account_id)
+        metrics.count_api_call()
+        async with super().request(*args, **kwargs) as response:
+            yield response
+
+def _build_async_reddit(account_token: str, account_id: Optional[int] = None) -> asyncpraw.Reddit:
+    return asyncpraw.Reddit(
+        client_id=REDDIT_CLIENT_ID,
+        client_secret=REDDIT_CLIENT_SECRET,
+        refresh_token=account_token,
+        user_agent=REDDIT_USER_AGENT,
+        requestor_class=AsyncRateLimitedRequestor,
+        requestor_kwargs={"account_id": account_id},
+    )
+
+async def _connect(account, generation: int = 0) -> CachedClient:
+    reddit = _build_async_reddit(account.token, account.id)
+    try:
+        me = await reddit.user.me()
+        if not me:
+            raise AuthenticationError("Autenticación fallida. El refresh_token es inválido o ha sido revocado.")
+    except BaseException:
+        await reddit.close()
+        raise
+    logging.info(f"--- Autenticación exitosa como: {me.name} (cuenta {account.id}, async) ---")
+    return CachedClient(reddit, me.name, time.monotonic(), generation)
+
+class AsyncRedditClientCache:
+    """
+    Versión para asyncio de `RedditClientCache`. Sus clientes pertenecen al
+    event loop que los creó, así que hay una caché por loop (sin locks:
+    todo ocurre en el mismo hilo). Los clientes descartados se cierran
+    para liberar su sesión HTTP; los invalidados mientras estaban
+    prestados se cierran al devolverlos.
+    """
+
+    def __init__(self, max_size: int = REDDIT_CLIENT_CACHE_SIZE, ttl: float = REDDIT_CLIENT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._idle = OrderedDict()
+        self._size = 0
+        self._generations = {}
+
+    @staticmethod
+    def _key(account) -> tuple:
+        return account.id, hashlib.sha256(account.token.encode("utf-8")).hexdigest()
+
+    async def checkout(self, account) -> CachedClient:
+        clients = self._idle.get(self._key(account))
+        while clients:
+            client = clients.pop()
+            self._size -= 1
+            if time.monotonic() - client.created_at < self.ttl:
+                return client
+            await client.reddit.close()
+        return await _connect(account, self._generations.get(account.id, 0))
+
+    async def checkin(self, account, client: CachedClient):
+        if client.generation != self._generations.get(account.id, 0):
+            await client.reddit.close()
+            return
+        key = self._key(account)
+        self._idle.setdefault(key, []).append(client)
+        self._idle.move_to_end(key)
+        self._size += 1
+        while self._size > self.max_size:
+            oldest_key, clients = next(iter(self._idle.items()))
+            evicted = clients.pop(0)
+            self._size -= 1
+            if not clients:
+                del self._idle[oldest_key]
+            await evicted.reddit.close()
+
+    async def invalidate(self, account_id: int):
+        self._generations[account_id] = self._generations.get(account_id, 0) + 1
+        for key in [key for key in self._idle if key[0] == account_id]:
+            for client in self._idle.pop(key):
+                self._size -= 1
+                await client.reddit.close()
+
+    async def close(self):
+        for clients in self._idle.values():
+            for client in clients:
+                await client.reddit.close()
+        self._idle.clear()
+        self._size = 0
+
+@asynccontextmanager
+async def async_reddit_session(account, cache: Optional[AsyncRedditClientCache] = None):
+    """
+    Presta un cliente de asyncpraw autenticado durante el bloque. Sin
+    `cache` (p. ej. un plugin async ejecutado desde un worker de hilos, con
+    su propio loop) el cliente se crea para el bloque y se cierra al salir.
+    """
+    client = await cache.checkout(account) if cache else await _connect(account)
+    healthy = True
+    try:
+        yield client.reddit
+    except BaseException as e:
+        if is_auth_error(e):
+            healthy = False
+            if cache:
+                await cache.invalidate(account.id)
+        raise
+    finally:
+        if healthy and cache:
+            await cache.checkin(account, client)
+        else:
+            await client.reddit.close()
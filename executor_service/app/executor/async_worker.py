@@ -0,0 +1,157 @@
+# en executor_service/app/executor/async_worker.py
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..config import ASYNC_MAX_TASKS, WORKER_CONCURRENCY, TASK_HEARTBEAT_SECONDS
+from .kernel import Kernel
+from .plugin_interface import AsyncPluginInterface
+from .async_reddit import AsyncRedditClientCache
+from .task_context import TaskContext, TaskTimeout, LeaseLost
+from .worker import (
+    _worker_id, _execute_async_plugin, claim_pending_task, renew_lease, prepare_task,
+    complete_task, handle_task_error, process_claimed_task, idle_timeout, start_background,
+)
+
+async def run_async_with_lease(db: Session, task_id: int, worker_id: str, plugin, task_config, account,
+                               context: TaskContext, clients: AsyncRedditClientCache):
+    """
+    Equivalente async de `run_with_lease`: el plugin corre como tarea de
+    asyncio y se renueva el lease cada `TASK_HEARTBEAT_SECONDS`. Al vencer el
+    plazo, o si se pierde el lease, la tarea se cancela de verdad (la
+    `CancelledError` interrumpe la petición en curso).
+    """
+    plugin_db = SessionLocal()
+    job = asyncio.create_task(_execute_async_plugin(plugin_db, plugin, task_config, account, context, clients))
+    try:
+        while True:
+            remaining = context.deadline - time.monotonic()
+            done, _ = await asyncio.wait({job}, timeout=max(0, min(TASK_HEARTBEAT_SECONDS, remaining)))
+            if done:
+                return job.result()
+            if time.monotonic() >= context.deadline:
+                context.cancel("timeout")
+                raise TaskTimeout(f"La tarea {task_id} superó su tiempo máximo de ejecución.")
+            if not await asyncio.to_thread(renew_lease, db, task_id, worker_id):
+                context.cancel("lease perdido")
+                raise LeaseLost(f"El lease de la tarea {task_id} ya no pertenece a {worker_id}.")
+    finally:
+        if not job.done():
+            job.cancel()
+            await asyncio.wait({job})
+        plugin_db.close()
+
+class AsyncEngine:
+    """
+    Worker en modo "async": un único event loop reclama y ejecuta hasta
+    `ASYNC_MAX_TASKS` tareas a la vez. Los plugins async (asyncpraw)
+    comparten el loop y sus esperas de red se solapan; los síncronos pasan
+    por un pool de `WORKER_CONCURRENCY` hilos, como en el modo "thread".
+    El acceso a la BD (reclamo, lease, resultado) es síncrono y va en
+    `asyncio.to_thread` para no bloquear el loop.
+    """
+
+    def __init__(self, kernel: Kernel, max_tasks: int = ASYNC_MAX_TASKS, sync_threads: int = WORKER_CONCURRENCY):
+        self.kernel = kernel
+        self.max_tasks = max(1, max_tasks)
+        self.sync_threads = max(1, sync_threads)
+        self.clients = AsyncRedditClientCache()
+        self.worker_id = f"{_worker_id()}:async"
+
+    async def run(self, notifier, stop_event: threading.Event):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_tasks)
+        sync_slots = asyncio.Semaphore(self.sync_threads)
+        sync_pool = ThreadPoolExecutor(self.sync_threads, thread_name_prefix="sync-plugin")
+        running = set()
+        logging.info(f"Motor async: hasta {self.max_tasks} tareas simultáneas, {self.sync_threads} hilo(s) para plugins síncronos.")
+
+        try:
+            while not stop_event.is_set():
+                await slots.acquire()
+                generation = notifier.generation
+                db = SessionLocal()
+                try:
+                    task = await asyncio.to_thread(claim_pending_task, db, self.worker_id)
+                except Exception:
+                    logging.error("ERROR al reclamar una tarea", exc_info=True)
+                    task = None
+                    await asyncio.sleep(1)
+                if task is None:
+                    db.close()
+                    slots.release()
+                    timeout = await asyncio.to_thread(idle_timeout)
+                    await asyncio.to_thread(notifier.wait, generation, timeout)
+                    continue
+
+                job = asyncio.create_task(self._process(loop, db, task, sync_pool, sync_slots))
+                running.add(job)
+                job.add_done_callback(running.discard)
+                job.add_done_callback(lambda _: slots.release())
+        finally:
+            if running:
+                await asyncio.wait(running)
+            sync_pool.shutdown(wait=False)
+            await self.clients.close()
+
+    async def _process(self, loop, db: Session, task, sync_pool, sync_slots: asyncio.Semaphore):
+        try:
+            plugin = self.kernel.get_plugin(task.type)
+            if isinstance(plugin, AsyncPluginInterface):
+                await self._process_async(db, task)
+            else:
+                await self._wait_for_slot(sync_slots, db, task.id)
+                try:
+                    await loop.run_in_executor(sync_pool, process_claimed_task, self.kernel, db, task, self.worker_id)
+                finally:
+                    sync_slots.release()
+        except Exception as e:
+            await asyncio.to_thread(handle_task_error, db, task, self.worker_id, e)
+        finally:
+            await asyncio.to_thread(db.close)
+
+    async def _process_async(self, db: Session, task):
+        task_id = task.id
+        account = None
+        try:
+            plugin, account, task_config, context = await asyncio.to_thread(prepare_task, self.kernel, db, task)
+            result = await run_async_with_lease(db, task_id, self.worker_id, plugin, task_config, account, context, self.clients)
+            await asyncio.to_thread(complete_task, db, task_id, self.worker_id, plugin, result, account)
+        except Exception as e:
+            await asyncio.to_thread(handle_task_error, db, task, self.worker_id, e, account)
+
+    async def _wait_for_slot(self, sync_slots: asyncio.Semaphore, db: Session, task_id: int):
+        """Espera un hilo libre para un plugin síncrono, sin dejar que venza el lease de la tarea."""
+        while True:
+            try:
+                await asyncio.wait_for(sync_slots.acquire(), timeout=TASK_HEARTBEAT_SECONDS)
+                return
+            except asyncio.TimeoutError:
+                if not await asyncio.to_thread(renew_lease, db, task_id, self.worker_id):
+                    raise LeaseLost(f"El lease de la tarea {task_id} ya no pertenece a {self.worker_id}.")
+
+def run_async_engine(kernel: Kernel):
+    stop_event = threading.Event()
+
+    async def main():
+        engine = AsyncEngine(kernel)
+        loop = asyncio.get_running_loop()
+        # Los avisos de account_service llegan en el hilo del listener: se pasan al loop
+        notifier = start_background(
+            stop_event,
+            on_account_changed=lambda account_id: asyncio.run_coroutine_threadsafe(
+                engine.clients.invalidate(account_id), loop
+            ),
+        )
+        try:
+            await engine.run(notifier, stop_event)
+        finally:
+            notifier.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        stop_event.set()
@@ -0,0 +1,38 @@
+# en executor_service/app/executor/bloom.py
+import math
+import hashlib
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre cadenas: pertenencia aproximada en memoria
+    compacta. `in` nunca da falsos negativos; los positivos pueden ser
+    falsos con probabilidad ~`error_rate`, por lo que deben confirmarse
+    contra la fuente exacta (la BD).
+    """
+
+    def __init__(self, capacity: int = 10000, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def saturated(self) -> bool:
+        """True cuando supera su capacidad y la tasa de falsos positivos empieza a crecer."""
+        return self.count > self.capacity
@@ -0,0 +1,107 @@
+# en executor_service/app/executor/bulk_actions.py
+import queue
+import random
+import logging
+import threading
+from typing import Iterable
+from .errors import is_transient_error, retry_after_seconds
+from .reddit_bot import reddit_session
+from . import task_context, metrics
+from .task_context import TaskCancelled
+from ..config import BULK_ACTION_CONCURRENCY, BULK_ACTION_RETRIES, BULK_ACTION_BACKOFF_SECONDS
+
+def _delete(reddit, comment_id: str):
+    reddit.comment(id=comment_id).delete()
+
+def _remove(reddit, comment_id: str):
+    reddit.comment(id=comment_id).mod.remove()
+
+ACTIONS = {
+    "delete": _delete,   # borrar un comentario propio
+    "remove": _remove,   # retirar un comentario como moderador
+}
+
+def run_bulk_action(account, comment_ids: Iterable[str], action: str = "delete",
+                    concurrency: int = BULK_ACTION_CONCURRENCY,
+                    max_retries: int = BULK_ACTION_RETRIES) -> dict:
+    """
+    Aplica `action` a muchos comentarios de forma concurrente.
+
+    Cada hilo toma su propio cliente de la caché (PRAW no es seguro entre
+    hilos) y todas las peticiones pasan por el rate limiter de la cuenta,
+    así que la concurrencia nunca excede el presupuesto de Reddit: solo
+    solapa las latencias de red. Los errores transitorios (429, 5xx, red)
+    se reintentan con backoff exponencial con jitter.
+
+    Devuelve un resumen apto para guardar en el log de ejecución:
+    {"action", "total", "succeeded", "failed", "outcomes": {id: "ok" | "error: ..."}}
+    """
+    operation = ACTIONS[action]
+    comment_ids = list(dict.fromkeys(comment_ids))
+    outcomes = {}
+    if not comment_ids:
+        return {"action": action, "total": 0, "succeeded": 0, "failed": 0, "outcomes": outcomes}
+    pending = queue.Queue()
+    for comment_id in comment_ids:
+        pending.put(comment_id)
+    lock = threading.Lock()
+    # Los hilos auxiliares heredan la tarea en curso, y con ella su cancelación
+    context = task_context.current()
+
+    def worker():
+        try:
+            with task_context.bind(context), reddit_session(account) as reddit:
+                while True:
+                    try:
+                        comment_id = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    outcome = _run_with_retries(operation, reddit, comment_id, max_retries)
+                    with lock:
+                        outcomes[comment_id] = outcome
+        except Exception as e:
+            logging.error(f"Hilo de la acción masiva '{action}' abortado: {e}")
+
+    threads = [
+        threading.Thread(target=worker, name=f"bulk-{action}-{i}", daemon=True)
+        for i in range(max(1, min(concurrency, len(comment_ids))))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Si un hilo no pudo ni autenticarse, sus comentarios quedan sin procesar
+    for comment_id in comment_ids:
+        outcomes.setdefault(comment_id, "error: no procesado")
+
+    succeeded = sum(1 for outcome in outcomes.values() if outcome == "ok")
+    metrics.count_actions(action, succeeded)
+    summary = {
+        "action": action,
+        "total": len(comment_ids),
+        "succeeded": succeeded,
+        "failed": len(comment_ids) - succeeded,
+        "outcomes": outcomes,
+    }
+    logging.info(f"Acción masiva '{action}': {succeeded}/{len(comment_ids)} comentarios procesados con éxito.")
+    return summary
+
+def _run_with_retries(operation, reddit, comment_id: str, max_retries: int) -> str:
+    attempt = 0
+    while True:
+        try:
+            operation(reddit, comment_id)
+            return "ok"
+        except TaskCancelled:
+            raise
+        except Exception as e:
+            if attempt >= max_retries or not is_transient_error(e):
+                logging.error(f"Error definitivo sobre el comentario {comment_id}: {e}")
+                return f"error: {e}"
+            delay = retry_after_seconds(e) or BULK_ACTION_BACKOFF_SECONDS * (2 ** attempt)
+            delay *= random.uniform(1, 1.5)
+            logging.warning(f"Error transitorio sobre {comment_id} ({e}). Reintento en {delay:.1f}s...")
+            # La espera se corta si la tarea se cancela (timeout o lease perdido)
+            task_context.sleep(delay)
+            attempt += 1
@@ -0,0 +1,73 @@
+# en executor_service/app/executor/cron.py
+from datetime import datetime, timedelta, timezone
+
+# (mínimo, máximo) de cada campo: minuto, hora, día del mes, mes, día de la semana
+_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+def _parse_field(expr: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in expr.split(","):
+        body, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError(f"Paso inválido en '{part}'.")
+        if body == "*":
+            start, end = low, high
+        elif "-" in body:
+            start, end = (int(x) for x in body.split("-", 1))
+        else:
+            start = int(body)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"Valor fuera de rango en '{part}' ({low}-{high}).")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+class CronExpression:
+    """
+    Expresión cron de 5 campos ("minuto hora día mes día_semana"), en UTC.
+    Admite `*`, listas, rangos y pasos (`*/15`, `1-5`, `0,30`). Como en
+    cron, si se restringen a la vez el día del mes y el de la semana, basta
+    con que coincida uno de los dos.
+    """
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"La expresión cron '{expression}' debe tener 5 campos.")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(part, low, high) for part, (low, high) in zip(parts, _FIELDS)
+        )
+        # 0 y 7 son domingo
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """Primer instante estrictamente posterior a `after` que cumple la expresión."""
+        if after.tzinfo is None:
+            after = after.replace(tzinfo=timezone.utc)
+        moment = after.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        # Se avanza campo a campo (mes, día, hora, minuto) en lugar de minuto a minuto
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(year=moment.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"La expresión cron '{self.expression}' nunca se cumple.")
@@ -0,0 +1,63 @@
+# en executor_service/app/executor/errors.py
+from typing import Optional
+from prawcore.exceptions import (
+    OAuthException, InvalidToken, RequestException, ResponseException, ServerError, TooManyRequests,
+)
+from asyncprawcore import exceptions as async_exceptions
+from .task_context import TaskAbandoned, TaskTimeout
+
+class AuthenticationError(Exception):
+    """El refresh_token de la cuenta es inválido o ha sido revocado."""
+
+# Cada excepción de prawcore tiene su gemela en asyncprawcore (plugins async)
+_AUTH_ERRORS = (AuthenticationError, OAuthException, InvalidToken,
+                async_exceptions.OAuthException, async_exceptions.InvalidToken)
+_TRANSIENT_ERRORS = (ServerError, TooManyRequests, RequestException, TaskTimeout,
+                     async_exceptions.ServerError, async_exceptions.TooManyRequests,
+                     async_exceptions.RequestException)
+_RESPONSE_ERRORS = (ResponseException, async_exceptions.ResponseException)
+
+def _status(response) -> int:
+    # requests expone `status_code`; aiohttp (asyncprawcore), `status`
+    return getattr(response, "status_code", None) or response.status
+
+def is_auth_error(exc: BaseException) -> bool:
+    """
+    Indica si el error se debe a credenciales inválidas, es decir, si el
+    cliente de Reddit asociado ya no sirve y debe descartarse.
+    """
+    if isinstance(exc, _AUTH_ERRORS):
+        return True
+    if isinstance(exc, _RESPONSE_ERRORS):
+        return _status(exc.response) == 401
+    return False
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    Indica si vale la pena reintentar: límites de ritmo (429), errores 5xx
+    de Reddit y fallos de red o timeouts (incluido el de la propia tarea).
+    Todo lo demás (configuración inválida, permisos, credenciales) es
+    permanente: reintentarlo daría el mismo resultado. Un plugin que no se
+    detuvo al cancelarlo tampoco se reintenta: otro worker lo duplicaría.
+    """
+    if isinstance(exc, TaskAbandoned):
+        return False
+    if isinstance(exc, _TRANSIENT_ERRORS):
+        return True
+    if isinstance(exc, _RESPONSE_ERRORS):
+        status = _status(exc.response)
+        return status == 429 or status >= 500
+    return isinstance(exc, (TimeoutError, ConnectionError))
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Segundos que Reddit pide esperar (cabecera Retry-After), si los indicó.
+    Vale para prawcore y asyncprawcore: ambos guardan la respuesta en
+    `response` y sus cabeceras no distinguen mayúsculas.
+    """
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
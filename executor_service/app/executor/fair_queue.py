@@ -0,0 +1,164 @@
+# en executor_service/app/executor/fair_queue.py
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session, aliased
+from .. import models
+from ..database import dialect_insert
+from ..config import FAIR_SHARE_USER_WEIGHTS, FAIR_SHARE_CANDIDATES
+
+def _system_time(db: Session) -> float:
+    value = db.execute(
+        select(models.FairShareClock.virtual_time).where(
+            models.FairShareClock.scope == "system", models.FairShareClock.owner_id == 0,
+        )
+    ).scalar()
+    return value or 0.0
+
+def candidate_tasks(db: Session, min_priority: Optional[int] = None,
+                    limit: int = FAIR_SHARE_CANDIDATES) -> List[int]:
+    """
+    IDs de las próximas tareas a reclamar, en orden.
+
+    Primero manda la prioridad (carriles estrictos: una tarea urgente nunca
+    espera detrás de trabajo masivo). Dentro de una misma prioridad se
+    reparte con start-time fair queuing: gana el usuario con menor tiempo
+    virtual y, dentro de él, la cuenta con menor tiempo virtual. Cada cuenta
+    solo aporta su primera tarea, así que 10.000 tareas de un usuario
+    cuentan como una candidata más.
+
+    La primera tarea de cada cuenta se busca con una subconsulta correlada
+    sobre el índice parcial `ix_tasks_pending_account_head`: el coste crece
+    con el número de cuentas, no con el de tareas pendientes.
+    """
+    conditions = [
+        models.Task.account_id == models.Account.id,
+        models.Task.status == "pending",
+        or_(models.Task.run_at.is_(None), models.Task.run_at <= datetime.now(timezone.utc)),
+    ]
+    if min_priority is not None:
+        conditions.append(models.Task.priority >= min_priority)
+    head_id = (
+        select(models.Task.id)
+        .where(*conditions)
+        .order_by(models.Task.priority.desc(), models.Task.id)
+        .limit(1)
+        .correlate(models.Account)
+        .scalar_subquery()
+    )
+    heads = select(
+        models.Account.id.label("account_id"), models.Account.user_id, head_id.label("task_id"),
+    ).subquery()
+    head = aliased(models.Task)
+    user_clock = aliased(models.FairShareClock)
+    account_clock = aliased(models.FairShareClock)
+    # Quien no tiene reloj (o lo tiene atrasado) entra con el tiempo del sistema: no acumula crédito
+    system_time = _system_time(db)
+    query = (
+        select(heads.c.task_id)
+        .select_from(heads)
+        .join(head, head.id == heads.c.task_id)
+        .outerjoin(user_clock, and_(user_clock.scope == "user", user_clock.owner_id == heads.c.user_id))
+        .outerjoin(account_clock, and_(account_clock.scope == "account", account_clock.owner_id == heads.c.account_id))
+        .order_by(
+            head.priority.desc(),
+            func.coalesce(user_clock.virtual_time, system_time),
+            func.coalesce(account_clock.virtual_time, system_time),
+            head.id,
+        )
+        .limit(limit)
+    )
+    return list(db.execute(query).scalars())
+
+def _advance_clock(db: Session, scope: str, owner_id: int, system_time: float, cost: float) -> float:
+    """
+    Cobra `cost` al reloj indicado (creándolo con el tiempo del sistema si
+    no existe) en una sola sentencia y devuelve su marca de inicio. La fila
+    queda bloqueada hasta el final de la transacción.
+    """
+    clock = models.FairShareClock.__table__
+    start = case((clock.c.virtual_time > system_time, clock.c.virtual_time), else_=system_time)
+    statement = (
+        dialect_insert(db, clock)
+        .values(scope=scope, owner_id=owner_id, virtual_time=system_time + cost)
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[clock.c.scope, clock.c.owner_id],
+        set_={"virtual_time": start + cost},
+    ).returning(clock.c.virtual_time)
+    return db.execute(statement).scalar() - cost
+
+def charge(db: Session, account_ids: Sequence[int]):
+    """
+    Registra las tareas servidas en un reclamo (una por elemento de
+    `account_ids`, la primera es la cabeza del lote) en los relojes de sus
+    cuentas y usuarios, dentro de la transacción del reclamo. Un usuario
+    con peso 2 avanza la mitad de rápido, así que recibe el doble de turnos.
+
+    Los cobros se agrupan y los relojes se bloquean siempre en el mismo
+    orden (usuarios, cuentas, y el del sistema el último), así que dos
+    reclamos concurrentes no pueden esperarse en ciclo. El reloj del
+    sistema se toca una vez por reclamo y solo si avanza: pasa a ser la
+    marca de inicio del usuario de la cabeza, así que quien vuelve tras
+    estar inactivo no trae crédito acumulado.
+    """
+    if not account_ids:
+        return
+    system_time = _system_time(db)
+    owners = dict(db.execute(
+        select(models.Account.id, models.Account.user_id).where(models.Account.id.in_(set(account_ids)))
+    ).all())
+    user_costs = defaultdict(float)
+    account_costs = defaultdict(float)
+    for account_id in account_ids:
+        account_costs[account_id] += 1.0
+        user_id = owners.get(account_id)
+        if user_id is not None:
+            user_costs[user_id] += 1.0 / FAIR_SHARE_USER_WEIGHTS.get(user_id, 1.0)
+
+    starts = {
+        user_id: _advance_clock(db, "user", user_id, system_time, user_costs[user_id])
+        for user_id in sorted(user_costs)
+    }
+    for account_id in sorted(account_costs):
+        _advance_clock(db, "account", account_id, system_time, account_costs[account_id])
+
+    start = starts.get(owners.get(account_ids[0]), system_time)
+    if start > system_time:
+        _advance_system(db, start)
+
+def _advance_system(db: Session, start: float):
+    """Adelanta el reloj del sistema hasta `start` (nunca lo atrasa)."""
+    clock = models.FairShareClock
+    advanced = db.execute(
+        update(clock)
+        .where(clock.scope == "system", clock.owner_id == 0, clock.virtual_time < start)
+        .values(virtual_time=start)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not advanced:
+        db.execute(
+            dialect_insert(db, clock).values(scope="system", owner_id=0, virtual_time=start).on_conflict_do_nothing()
+        )
+
+def batch_candidates(db: Session, account_id: int, priority: int, limit: int) -> List[int]:
+    """
+    IDs con los que completar un lote tras reclamar una tarea de
+    `account_id`: las siguientes tareas de esa misma cuenta en su carril de
+    prioridad (o superior). Las de otras cuentas esperan a su turno en el
+    reparto, así que un lote no salta por delante de otros usuarios.
+    """
+    if limit <= 0:
+        return []
+    return list(db.execute(
+        select(models.Task.id)
+        .where(
+            models.Task.account_id == account_id,
+            models.Task.status == "pending",
+            or_(models.Task.run_at.is_(None), models.Task.run_at <= datetime.now(timezone.utc)),
+            models.Task.priority >= priority,
+        )
+        .order_by(models.Task.priority.desc(), models.Task.id)
+        .limit(limit)
+    ).scalars())
@@ -0,0 +1,171 @@
+# en executor_service/app/executor/jobs.py
+import json
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from ..database import SessionLocal
+from .. import models
+from ..config import (
+    JOB_PROGRESS_EVERY, JOB_EVENTS_POLL_SECONDS, JOB_EVENTS_KEEPALIVE_SECONDS, JOB_EVENTS_MAX_SECONDS,
+    JOB_STALE_SECONDS,
+)
+from . import task_client
+from .log_writer import get_log_writer
+
+FINISHED = ("completed", "failed")
+# Un job activo guarda progreso al menos con esta frecuencia, para no parecer abandonado
+_HEARTBEAT_SECONDS = JOB_STALE_SECONDS / 4
+
+def create_job(db: Session, user_id: int, account_id: int) -> models.ExecutionJob:
+    job = models.ExecutionJob(id=uuid.uuid4().hex, user_id=user_id, account_id=account_id, status="queued")
+    db.add(job)
+    db.commit()
+    return job
+
+def expire_stale_jobs(db: Session, job_id: str = None) -> int:
+    """
+    Marca como 'failed' los jobs 'queued' o 'running' que llevan más de
+    `JOB_STALE_SECONDS` sin progreso: corren en la propia API (BackgroundTasks),
+    así que si su réplica cae nadie los termina. Se llama al leer un job
+    (`job_id`) y al arrancar la API (todos).
+    """
+    now = datetime.now(timezone.utc)
+    query = update(models.ExecutionJob).where(
+        models.ExecutionJob.status.in_(("queued", "running")),
+        func.coalesce(models.ExecutionJob.updated_at, models.ExecutionJob.created_at)
+        < now - timedelta(seconds=JOB_STALE_SECONDS),
+    )
+    if job_id is not None:
+        query = query.where(models.ExecutionJob.id == job_id)
+    expired = db.execute(
+        query.values(
+            status="failed", error="El job dejó de avanzar: la réplica que lo ejecutaba se detuvo.", finished_at=now,
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if expired:
+        logging.warning(f"{expired} job(s) sin progreso marcados como fallidos.")
+    return expired
+
+def get_job(db: Session, job_id: str, user_id: int):
+    """El job, solo si pertenece al usuario."""
+    expire_stale_jobs(db, job_id)
+    job = db.get(models.ExecutionJob, job_id)
+    if job is None or job.user_id != user_id:
+        return None
+    return job
+
+def fetch_account_tasks(token: str, account_id: int) -> list:
+    """Trae de task_service solo las tareas de la cuenta, y solo los campos que usa el job."""
+    return task_client.get_tasks(token, account_id=account_id, fields=["id", "type", "config_json"])
+
+def run_job(job_id: str, token: str):
+    """
+    Ejecuta un job en segundo plano (tras responder a la petición). El token
+    del usuario solo vive en memoria mientras dura el job: hace falta para
+    pedir las tareas a task_service en su nombre.
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(models.ExecutionJob, job_id)
+        job.status = "running"
+        db.commit()
+        try:
+            tasks = fetch_account_tasks(token, job.account_id)
+        except Exception as e:
+            raise RuntimeError(f"No se pudo obtener tareas: {e}") from e
+        job.total = len(tasks)
+        db.commit()
+        last_saved = time.monotonic()
+        log_writer = get_log_writer()
+        dropped = log_writer.dropped
+
+        for t in tasks:
+            task_type = t.get("type") or t.get("task_type") or "unknown"
+            cfg = t.get("config_json", {})
+
+            # Simulación de ejecución:
+            result_detail = {"action": task_type, "config": cfg}
+
+            # Guardar log (se escribe por lotes en segundo plano)
+            log_writer.write(
+                user_id=job.user_id,
+                account_id=job.account_id,
+                task_id=t.get("id"),
+                task_type=task_type,
+                status="success",
+                detail=result_detail,
+            )
+            job.processed += 1
+            if job.processed % JOB_PROGRESS_EVERY == 0 or time.monotonic() - last_saved >= _HEARTBEAT_SECONDS:
+                db.commit()
+                last_saved = time.monotonic()
+
+        # El job no se da por terminado hasta que sus logs están escritos
+        if not log_writer.flush(since=dropped):
+            raise RuntimeError("No se pudieron guardar todos los logs del job.")
+        job.status = "completed"
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        logging.info(f"Job {job_id}: {job.processed} tarea(s) ejecutadas para la cuenta {job.account_id}.")
+    except Exception as e:
+        logging.error(f"ERROR en el job {job_id}", exc_info=True)
+        db.rollback()
+        db.query(models.ExecutionJob).filter(models.ExecutionJob.id == job_id).update(
+            {"status": "failed", "error": str(e)[:1000], "finished_at": datetime.now(timezone.utc)},
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def job_snapshot(job: models.ExecutionJob) -> dict:
+    return {
+        "id": job.id,
+        "account_id": job.account_id,
+        "status": job.status,
+        "total": job.total,
+        "processed": job.processed,
+        "error": job.error,
+    }
+
+def _load_snapshot(job_id: str):
+    db = SessionLocal()
+    try:
+        expire_stale_jobs(db, job_id)
+        job = db.get(models.ExecutionJob, job_id)
+        return job_snapshot(job) if job else None
+    finally:
+        db.close()
+
+async def job_events(job_id: str):
+    """
+    Stream de eventos (Server-Sent Events) de un job: un evento `progress`
+    cada vez que cambia y uno final `completed` o `failed`. Se lee de la BD,
+    así que funciona aunque el job corra en otra réplica del servicio.
+    La conexión se cierra tras `JOB_EVENTS_MAX_SECONDS`; un job abandonado
+    termina en `failed` (ver `expire_stale_jobs`).
+    """
+    last = None
+    last_sent = opened_at = time.monotonic()
+    while time.monotonic() - opened_at < JOB_EVENTS_MAX_SECONDS:
+        snapshot = await run_in_threadpool(_load_snapshot, job_id)
+        if snapshot is None:
+            return
+        if snapshot != last:
+            event = snapshot["status"] if snapshot["status"] in FINISHED else "progress"
+            yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+            last = snapshot
+            last_sent = time.monotonic()
+            if event != "progress":
+                return
+        elif time.monotonic() - last_sent >= JOB_EVENTS_KEEPALIVE_SECONDS:
+            # Comentario de keep-alive para que los proxies no corten la conexión
+            yield ": ping\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
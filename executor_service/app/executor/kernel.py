@@ -1,39 +1,65 @@
 # en executor_service/app/executor/kernel.py
-import os
+import inspect
+import logging
 import importlib
+import threading
+from ..config import PLUGIN_WARMUP
 from .plugin_interface import PluginInterface
+from .plugin_registry import load_registry
 
 class Kernel:
-    def __init__(self):
+    def __init__(self, warmup: bool = PLUGIN_WARMUP):
+        # task_type -> {"module", "class"}; los plugins se importan al usarse
+        self.registry = load_registry()
         self.plugins = {}
-        self._load_plugins()
+        self._lock = threading.Lock()
+        logging.info(f"Plugins registrados: {', '.join(sorted(self.registry)) or 'ninguno'}")
+        if warmup:
+            self.warmup()
 
-    def _load_plugins(self):
+    def _load_plugin(self, task_type: str):
         """
-        Escanea el directorio de plugins, los importa y los registra.
+        Importa e instancia el plugin de un tipo de tarea. Solo se importa su
+        módulo, así que las dependencias pesadas de los demás plugins no
+        entran en el proceso.
         """
-        plugin_dir = os.path.join(os.path.dirname(__file__), "plugins")
-        print(f"Cargando plugins desde: {plugin_dir}")
-
-        for filename in os.listdir(plugin_dir):
-            if filename.endswith("_plugin.py"):
-                module_name = f"app.executor.plugins.{filename[:-3]}"
-                try:
-                    module = importlib.import_module(module_name)
-                    for item_name in dir(module):
-                        item = getattr(module, item_name)
-                        if isinstance(item, type) and issubclass(item, PluginInterface) and item is not PluginInterface:
-                            plugin_instance = item()
-                            self.plugins[plugin_instance.task_type] = plugin_instance
-                            print(f"-> Plugin '{plugin_instance.task_type}' cargado exitosamente.")
-                except Exception as e:
-                    print(f"ERROR al cargar el plugin {module_name}: {e}")
+        entry = self.registry[task_type]
+        module = importlib.import_module(entry["module"])
+        item = getattr(module, entry["class"])
+        if not (isinstance(item, type) and issubclass(item, PluginInterface)) or inspect.isabstract(item):
+            raise TypeError(f"{entry['module']}.{entry['class']} no es un plugin válido.")
+        plugin_instance = item()
+        logging.info(f"-> Plugin '{task_type}' cargado exitosamente.")
+        return plugin_instance
 
     def get_plugin(self, task_type: str):
         """
-        Devuelve el plugin registrado para un tipo de tarea.
+        Devuelve el plugin registrado para un tipo de tarea, importándolo la
+        primera vez que se pide.
         """
         plugin = self.plugins.get(task_type)
-        if not plugin:
+        if plugin:
+            return plugin
+        if task_type not in self.registry:
             raise NotImplementedError(f"No hay un plugin que maneje el tipo de tarea '{task_type}'.")
-        return plugin
\ No newline at end of file
+        with self._lock:
+            plugin = self.plugins.get(task_type)
+            if not plugin:
+                try:
+                    plugin = self._load_plugin(task_type)
+                except Exception as e:
+                    logging.error(f"ERROR al cargar el plugin {self.registry[task_type]['module']}: {e}")
+                    raise NotImplementedError(f"No se pudo cargar el plugin del tipo de tarea '{task_type}': {e}") from e
+                self.plugins[task_type] = plugin
+        return plugin
+
+    def warmup(self):
+        """Precarga todos los plugins en un hilo aparte, sin retrasar el arranque del worker."""
+        def load_all():
+            for task_type in sorted(self.registry):
+                try:
+                    self.get_plugin(task_type)
+                except NotImplementedError:
+                    pass
+
+        threading.Thread(target=load_all, name="plugin-warmup", daemon=True).start()
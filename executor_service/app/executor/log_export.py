@@ -0,0 +1,64 @@
+# en executor_service/app/executor/log_export.py
+import io
+import csv
+import json
+import zlib
+import logging
+from typing import Iterator
+from ..database import SessionLocal
+from ..config import LOG_EXPORT_YIELD_PER, LOG_EXPORT_GZIP_LEVEL
+
+COLUMNS = ("id", "user_id", "account_id", "task_id", "task_type", "status", "created_at", "detail")
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+def _ndjson_lines(rows) -> str:
+    return "".join(json.dumps(dict(row._mapping), default=_json_default, ensure_ascii=False) + "\n" for row in rows)
+
+def _csv_lines(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(COLUMNS)
+    for row in rows:
+        values = dict(row._mapping)
+        values["created_at"] = values["created_at"].isoformat() if values["created_at"] else None
+        values["detail"] = json.dumps(values["detail"], ensure_ascii=False) if values["detail"] is not None else None
+        writer.writerow([values[column] for column in COLUMNS])
+    return buffer.getvalue()
+
+def export_chunks(query, fmt: str) -> Iterator[bytes]:
+    """
+    Trozos gzip de la exportación de `query` (un SELECT de `filtered_logs`).
+    Las filas se leen con un cursor de servidor de LOG_EXPORT_YIELD_PER en
+    LOG_EXPORT_YIELD_PER y cada tanda se codifica, se comprime y se suelta:
+    la memoria no depende del tamaño del historial.
+
+    Abre su propia sesión: el generador sigue vivo después de que la
+    petición haya cerrado la suya.
+    """
+    columns = [query.selected_columns[column] for column in COLUMNS]
+    query = query.with_only_columns(*columns).execution_options(yield_per=LOG_EXPORT_YIELD_PER)
+    # wbits=31: cabecera y CRC de gzip (un .gz normal, no deflate en crudo)
+    compressor = zlib.compressobj(LOG_EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+    db = SessionLocal()
+    try:
+        result = db.execute(query)
+        first = True
+        for rows in result.partitions():
+            text = _ndjson_lines(rows) if fmt == "ndjson" else _csv_lines(rows, header=first)
+            first = False
+            chunk = compressor.compress(text.encode("utf-8"))
+            if chunk:
+                yield chunk
+        if first and fmt == "csv":
+            # Sin filas: el CSV lleva al menos la cabecera
+            yield compressor.compress(_csv_lines((), header=True).encode("utf-8"))
+        yield compressor.flush()
+    except Exception:
+        # Las cabeceras ya se enviaron: solo queda cortar el stream (el gzip queda incompleto)
+        logging.error("ERROR durante la exportación de logs", exc_info=True)
+        raise
+    finally:
+        db.close()
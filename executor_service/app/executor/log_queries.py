@@ -0,0 +1,80 @@
+# en executor_service/app/executor/log_queries.py
+import json
+import base64
+import binascii
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+from .. import models
+from . import log_storage
+
+class InvalidCursor(ValueError):
+    """El cursor de paginación no es válido (manipulado o de otra versión)."""
+
+def encode_cursor(log) -> str:
+    """Cursor opaco con la posición (created_at, id) del último log de la página."""
+    raw = json.dumps({"t": log.created_at.isoformat(), "i": log.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), int(data["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Cursor inválido") from e
+
+def filtered_logs(db: Session, user_id: int, account_id: Optional[int] = None, status: Optional[List[str]] = None,
+                  task_type: Optional[str] = None, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None):
+    """
+    SELECT de los logs del usuario con los filtros indicados, del más nuevo
+    al más antiguo. `since` es inclusivo y `until` exclusivo; acotan también
+    los meses que se leen (ver `log_storage`).
+    """
+    logs = log_storage.log_source(db.connection(), since, until)
+    query = select(logs).where(logs.c.user_id == user_id)
+    if account_id is not None:
+        query = query.where(logs.c.account_id == account_id)
+    if status:
+        query = query.where(logs.c.status.in_(status))
+    if task_type:
+        query = query.where(logs.c.task_type == task_type)
+    if since is not None:
+        query = query.where(logs.c.created_at >= since)
+    if until is not None:
+        query = query.where(logs.c.created_at < until)
+    return query.order_by(logs.c.created_at.desc(), logs.c.id.desc())
+
+def logs_page(db: Session, query, limit: int, cursor: Optional[str] = None):
+    """
+    Una página de `query` con paginación por clave (keyset): en lugar de
+    OFFSET se continúa tras el (created_at, id) del cursor, así que el coste
+    de cada página no depende de cuántas haya antes. Devuelve (logs,
+    siguiente_cursor); el cursor es None en la última página.
+    """
+    if cursor:
+        created_at, log_id = decode_cursor(cursor)
+        columns = query.selected_columns
+        query = query.where(tuple_(columns.created_at, columns.id) < tuple_(created_at, log_id))
+    logs = db.execute(query.limit(limit + 1)).all()
+    if len(logs) > limit:
+        return logs[:limit], encode_cursor(logs[limit - 1])
+    return logs, None
+
+def daily_stats(db: Session, user_id: int, account_id: Optional[int] = None, task_type: Optional[str] = None,
+                since: Optional[date] = None, until: Optional[date] = None):
+    """Agregados diarios del usuario entre `since` y `until` (ambos inclusive), por día ascendente."""
+    rollup = models.ExecutionLogDaily
+    query = select(rollup).where(rollup.user_id == user_id)
+    if account_id is not None:
+        query = query.where(rollup.account_id == account_id)
+    if task_type:
+        query = query.where(rollup.task_type == task_type)
+    if since is not None:
+        query = query.where(rollup.day >= since)
+    if until is not None:
+        query = query.where(rollup.day <= until)
+    query = query.order_by(rollup.day, rollup.account_id, rollup.task_type, rollup.status)
+    return db.execute(query).scalars().all()
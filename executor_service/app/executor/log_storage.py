@@ -0,0 +1,375 @@
+# en executor_service/app/executor/log_storage.py
+"""
+Almacenamiento de `execution_logs` por meses (UTC de `created_at`).
+
+- PostgreSQL: tabla particionada por rango con una partición por mes
+  (`execution_logs_AAAAMM`) y una partición DEFAULT de respaldo. Se inserta
+  y se consulta la tabla padre; el planificador descarta las particiones
+  fuera del rango pedido.
+- SQLite (pruebas locales): no hay particiones, así que cada mes es una
+  tabla aparte con el mismo esquema. Las escrituras se reparten por mes y
+  las lecturas hacen UNION ALL solo de los meses del rango. Los id son
+  únicos dentro de cada mes. `execution_logs` solo define el esquema.
+
+La retención borra meses enteros (DROP TABLE) en lugar de DELETE fila a
+fila. Los agregados diarios (`execution_log_daily`) se actualizan en la
+misma transacción que cada lote de logs.
+"""
+
+import re
+import sys
+import logging
+import threading
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import Date, MetaData, Table, cast, delete, func, insert, inspect, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from ..database import engine
+from .. import models
+from ..config import LOG_PARTITIONS_AHEAD, LOG_RETENTION_MONTHS, LOG_MAINTENANCE_SECONDS
+
+PARENT = models.ExecutionLog.__table__
+ROLLUP = models.ExecutionLogDaily.__table__
+DEFAULT_PARTITION = f"{PARENT.name}_default"
+ROLLUP_KEYS = ("user_id", "day", "account_id", "task_type", "status")
+
+_PERIOD_RE = re.compile(rf"^{PARENT.name}_(\d{{4}})(\d{{2}})$")
+# Evita que varios procesos conviertan o mantengan las particiones a la vez
+_PG_LOCK_KEY = 0x6C6F6773
+
+# Definición en PostgreSQL: la clave primaria debe incluir la columna de partición
+_PG_PARENT_DDL = f"""
+CREATE TABLE {PARENT.name} (
+    id SERIAL NOT NULL,
+    user_id INTEGER NOT NULL,
+    account_id INTEGER NOT NULL,
+    task_id INTEGER,
+    task_type VARCHAR NOT NULL,
+    status VARCHAR NOT NULL,
+    detail JSON,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at)
+"""
+
+# --- Meses ---
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devuelve las fechas sin zona: se guardan en UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def month_start(value: datetime) -> datetime:
+    value = _as_utc(value)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+def add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + start.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+def period_name(start: datetime) -> str:
+    return f"{PARENT.name}_{start:%Y%m}"
+
+def _months(first: datetime, last: datetime) -> List[datetime]:
+    """Los meses desde el de `first` hasta el de `last`, ambos incluidos."""
+    months, current, last = [], month_start(first), month_start(last)
+    while current <= last:
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+def _list_periods(conn) -> Dict[datetime, str]:
+    """Meses que ya tienen partición (PostgreSQL) o tabla (SQLite)."""
+    if _is_postgres(conn):
+        names = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            f"WHERE i.inhparent = '{PARENT.name}'::regclass"
+        )).scalars()
+    else:
+        names = inspect(conn).get_table_names()
+    periods = {}
+    for name in names:
+        match = _PERIOD_RE.match(name)
+        if match:
+            periods[datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)] = name
+    return periods
+
+# --- SQLite: una tabla por mes ---
+
+_period_metadata = MetaData()
+_period_lock = threading.Lock()
+
+def _period_table(start: datetime) -> Table:
+    name = period_name(start)
+    with _period_lock:
+        table = _period_metadata.tables.get(name)
+        if table is None:
+            table = PARENT.to_metadata(_period_metadata, name=name)
+            # Los nombres de índice son globales en la BD: cada mes lleva los suyos
+            for index in table.indexes:
+                index.name = index.name.replace(PARENT.name, name, 1)
+    return table
+
+def _create_period(conn, start: datetime):
+    if _is_postgres(conn):
+        _pg_create_period(conn, start)
+    else:
+        _period_table(start).create(conn, checkfirst=True)
+
+def _pg_create_period(conn, start: datetime):
+    """
+    Crea la partición del mes. Si la DEFAULT ya tiene filas de ese mes
+    (p. ej. logs con la hora desajustada, o escritos mientras el
+    mantenimiento no corría), PostgreSQL no deja crearla con PARTITION OF:
+    se crea como tabla suelta, se mueven allí las filas y se adjunta.
+    La DEFAULT queda bloqueada mientras tanto para que no entren filas
+    nuevas del mes entre medias.
+    """
+    name = period_name(start)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+    month = {"start": start, "end": add_months(start, 1)}
+    conn.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE"))
+    stray = conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+    ), month).scalar()
+    if not stray:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT.name} {bounds}"))
+        return
+    logging.info(f"Logs: moviendo a {name} las filas del mes que había en {DEFAULT_PARTITION}")
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT.name} INCLUDING ALL)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end "
+        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+    ), month)
+    conn.execute(text(f"ALTER TABLE {PARENT.name} ATTACH PARTITION {name} {bounds}"))
+
+# --- Esquema ---
+
+def _pg_convert_legacy(conn):
+    """
+    Convierte una `execution_logs` sin particionar (anterior a este módulo)
+    en la tabla particionada, copiando sus filas y conservando los id.
+    Devuelve la fecha del log más antiguo (None si no había logs).
+    """
+    legacy = f"{PARENT.name}_legacy"
+    logging.info(f"Esquema: particionando {PARENT.name} por meses")
+    conn.execute(text(f"ALTER TABLE {PARENT.name} RENAME TO {legacy}"))
+    # Los índices y la PK conservan su nombre al renombrar la tabla: se liberan para la nueva
+    inspector = inspect(conn)
+    for index in inspector.get_indexes(legacy):
+        conn.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+    pk_name = inspector.get_pk_constraint(legacy).get("name")
+    if pk_name:
+        conn.execute(text(f'ALTER TABLE {legacy} DROP CONSTRAINT "{pk_name}"'))
+
+    conn.execute(text(_PG_PARENT_DDL))
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT.name} DEFAULT"))
+    first, last = conn.execute(text(f"SELECT min(created_at), max(created_at) FROM {legacy}")).one()
+    if first is not None:
+        for start in _months(first, last):
+            _create_period(conn, start)
+
+    columns = [column.name for column in PARENT.columns]
+    values = ["COALESCE(created_at, now())" if name == "created_at" else name for name in columns]
+    conn.execute(text(
+        f"INSERT INTO {PARENT.name} ({', '.join(columns)}) SELECT {', '.join(values)} FROM {legacy}"
+    ))
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{PARENT.name}', 'id'), "
+        f"(SELECT COALESCE(max(id), 0) + 1 FROM {PARENT.name}), false)"
+    ))
+    conn.execute(text(f"DROP TABLE {legacy}"))
+    return first
+
+def _sqlite_move_legacy(conn):
+    """
+    Reparte en las tablas mensuales las filas que queden en `execution_logs`.
+    Devuelve la fecha de la más antigua (None si no había ninguna).
+    """
+    first, last = conn.execute(select(func.min(PARENT.c.created_at), func.max(PARENT.c.created_at))).one()
+    if first is None:
+        return None
+    logging.info(f"Esquema: moviendo los logs de {PARENT.name} a tablas mensuales")
+    columns = [column.name for column in PARENT.columns]
+    for start in _months(first, last):
+        table = _period_table(start)
+        table.create(conn, checkfirst=True)
+        conn.execute(insert(table).from_select(columns, select(PARENT).where(
+            PARENT.c.created_at >= start, PARENT.c.created_at < add_months(start, 1)
+        )))
+    conn.execute(delete(PARENT).where(PARENT.c.created_at.is_not(None)))
+    return first
+
+def prepare(conn):
+    """
+    Prepara el almacenamiento de logs; lo llama `sync_schema` antes de
+    `create_all`. Crea (o convierte) la tabla particionada en PostgreSQL,
+    reparte los logs antiguos por meses en SQLite y crea los meses próximos.
+    Si la tabla de agregados no existía, la crea y la rellena con los logs
+    existentes.
+    """
+    rollups_exist = inspect(conn).has_table(ROLLUP.name)
+    moved = None
+    if _is_postgres(conn):
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+        relkind = conn.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT.name}
+        ).scalar()
+        if relkind is None:
+            conn.execute(text(_PG_PARENT_DDL))
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT.name} DEFAULT"))
+        elif relkind != "p":
+            moved = _pg_convert_legacy(conn)
+    else:
+        PARENT.create(conn, checkfirst=True)
+        moved = _sqlite_move_legacy(conn)
+    ensure_periods(conn)
+
+    if not rollups_exist:
+        ROLLUP.create(conn)
+        rebuild_rollups(conn)
+    elif moved is not None:
+        # Los logs movidos no pasaron por el log writer: se recalculan sus días
+        rebuild_rollups(conn, _as_utc(moved).date())
+
+def ensure_periods(conn, now: Optional[datetime] = None):
+    """Crea la partición (o tabla) del mes en curso y de los LOG_PARTITIONS_AHEAD siguientes."""
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = _list_periods(conn)
+    for months in range(max(0, LOG_PARTITIONS_AHEAD) + 1):
+        start = add_months(current, months)
+        if start not in existing:
+            logging.info(f"Logs: creando {period_name(start)}")
+            _create_period(conn, start)
+
+def drop_expired(conn, retention_months: int = LOG_RETENTION_MONTHS, now: Optional[datetime] = None) -> List[str]:
+    """
+    Borra los meses anteriores a los `retention_months` últimos completos
+    (0 = no borrar nada). Devuelve las tablas borradas.
+    """
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -retention_months)
+    dropped = []
+    for start, name in sorted(_list_periods(conn).items()):
+        if add_months(start, 1) <= cutoff:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    if _is_postgres(conn):
+        # La partición DEFAULT solo recoge filas fuera de los meses creados: se poda fila a fila
+        conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff"), {"cutoff": cutoff})
+    if dropped:
+        logging.info(f"Logs: retención de {retention_months} mes(es), borrados {', '.join(dropped)}")
+    return dropped
+
+def maintain(now: Optional[datetime] = None):
+    with engine.begin() as conn:
+        if _is_postgres(conn):
+            # Si otro proceso ya lo está haciendo, este turno se salta
+            if not conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY}).scalar():
+                return
+        ensure_periods(conn, now)
+        drop_expired(conn, now=now)
+
+def run_maintenance(stop_event: threading.Event):
+    """Crea los meses próximos y aplica la retención cada LOG_MAINTENANCE_SECONDS (hilo de los workers)."""
+    while True:
+        try:
+            maintain()
+        except Exception:
+            logging.error("ERROR en el mantenimiento de las particiones de logs", exc_info=True)
+        if stop_event.wait(LOG_MAINTENANCE_SECONDS):
+            return
+
+# --- Escritura ---
+
+def insert_logs(conn, records: List[dict]):
+    """INSERT multi-fila de un lote de logs (con `created_at` ya fijado)."""
+    if _is_postgres(conn):
+        conn.execute(insert(PARENT), records)
+        return
+    by_month = {}
+    for record in records:
+        by_month.setdefault(month_start(record["created_at"]), []).append(record)
+    for start, rows in by_month.items():
+        table = _period_table(start)
+        table.create(conn, checkfirst=True)
+        conn.execute(insert(table), rows)
+
+def add_to_rollups(conn, records: Iterable[dict]):
+    """Suma un lote de logs a los agregados diarios (upsert de una fila por clave)."""
+    counts = Counter(
+        (r["user_id"], _as_utc(r["created_at"]).date(), r["account_id"], r["task_type"], r["status"])
+        for r in records
+    )
+    if not counts:
+        return
+    dialect_insert = postgresql.insert if _is_postgres(conn) else sqlite.insert
+    stmt = dialect_insert(ROLLUP)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEYS), set_={"count": ROLLUP.c.count + stmt.excluded["count"]}
+    )
+    conn.execute(stmt, [dict(zip(ROLLUP_KEYS, key), count=count) for key, count in counts.items()])
+
+# --- Lectura ---
+
+def log_source(bind, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Tabla (o subconsulta) de la que leer los logs entre `since` y `until`.
+    En PostgreSQL es la tabla padre; en SQLite el UNION ALL de las tablas
+    de los meses de ese rango.
+    """
+    if _is_postgres(bind):
+        return PARENT
+    first = month_start(since) if since is not None else None
+    tables = [
+        _period_table(start)
+        for start in sorted(_list_periods(bind))
+        if (first is None or start >= first) and (until is None or start < _as_utc(until))
+    ]
+    if not tables:
+        return PARENT
+    if len(tables) == 1:
+        return tables[0]
+    return union_all(*(select(table) for table in tables)).subquery(PARENT.name)
+
+def _day(column, bind):
+    if _is_postgres(bind):
+        return cast(func.timezone("UTC", column), Date)
+    return func.date(column)
+
+def rebuild_rollups(conn, since: Optional[date] = None):
+    """
+    Recalcula los agregados diarios desde el día `since` con los logs que
+    haya. Por defecto desde el día del log más antiguo: los agregados de los
+    días que la retención ya borró se conservan.
+    """
+    if since is None:
+        first = conn.execute(select(func.min(log_source(conn).c.created_at))).scalar()
+        if first is None:
+            return
+        since = _as_utc(first).date()
+    start = datetime(since.year, since.month, since.day, tzinfo=timezone.utc)
+    source = log_source(conn, since=start)
+    day = _day(source.c.created_at, conn)
+    query = (
+        select(source.c.user_id, day, source.c.account_id, source.c.task_type, source.c.status, func.count())
+        .where(source.c.created_at >= start)
+        .group_by(source.c.user_id, day, source.c.account_id, source.c.task_type, source.c.status)
+    )
+    conn.execute(delete(ROLLUP).where(ROLLUP.c.day >= since))
+    conn.execute(insert(ROLLUP).from_select(list(ROLLUP_KEYS) + ["count"], query))
+
+if __name__ == "__main__":
+    # python -m app.executor.log_storage maintain | rebuild-rollups [AAAA-MM-DD]
+    command = sys.argv[1] if len(sys.argv) > 1 else "maintain"
+    if command == "maintain":
+        maintain()
+    elif command == "rebuild-rollups":
+        with engine.begin() as connection:
+            rebuild_rollups(connection, date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None)
+    else:
+        sys.exit(f"Comando desconocido: {command}")
@@ -0,0 +1,190 @@
+# en executor_service/app/executor/log_writer.py
+import io
+import os
+import csv
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from ..database import engine
+from ..config import (
+    LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_SECONDS, LOG_QUEUE_PUT_TIMEOUT, LOG_USE_COPY,
+    LOG_WRITE_RETRIES, LOG_WRITE_RETRY_SECONDS,
+)
+from .metrics import LOGS_DROPPED, LOGS_WRITTEN
+from . import log_storage
+
+COLUMNS = ("user_id", "account_id", "task_id", "task_type", "status", "detail", "created_at")
+
+class ExecutionLogWriter:
+    """
+    Escritor de `ExecutionLog` por lotes. `write` solo encola el registro
+    (no toca la BD); un hilo de fondo los agrupa y los escribe cada
+    `flush_seconds` o al juntar `batch_size`, con una sola sentencia por
+    lote (más el upsert de los agregados diarios). Un lote que falla se
+    reintenta con backoff antes de descartarse. La cola es acotada: si la
+    BD no da abasto, `write` espera un momento y después descarta el log
+    antes que frenar la ejecución.
+
+    Cada log descartado suma en `dropped`; `flush(since=...)` lo usa para
+    avisar de que algo no llegó a la BD.
+    """
+
+    def __init__(self, batch_size: int = LOG_BATCH_SIZE, flush_seconds: float = LOG_FLUSH_SECONDS,
+                 max_queue: int = LOG_QUEUE_SIZE, use_copy: bool = LOG_USE_COPY):
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.use_copy = use_copy
+        self._queue = queue.Queue(max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        # Logs descartados desde que se creó el escritor (cola llena o lote fallido)
+        self.dropped = 0
+
+    def _ensure_started(self):
+        # El hilo se crea al primer uso: en modo "process" cada hijo tiene el suyo
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def write(self, user_id: int, account_id: int, task_id: Optional[int], task_type: str, status: str,
+              detail: Optional[Dict[str, Any]] = None):
+        self._ensure_started()
+        if detail is not None:
+            # Se serializa ya: un valor no serializable no puede tumbar el lote entero
+            detail = json.loads(json.dumps(detail, default=str))
+        record = {
+            "user_id": user_id,
+            "account_id": account_id,
+            "task_id": task_id,
+            "task_type": task_type,
+            "status": status,
+            "detail": detail,
+            # La hora del suceso, no la de la escritura del lote
+            "created_at": datetime.now(timezone.utc),
+        }
+        try:
+            self._queue.put(record, timeout=LOG_QUEUE_PUT_TIMEOUT)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            LOGS_DROPPED.labels(reason="queue_full").inc()
+            logging.warning(f"Cola de logs llena: se descarta el log de la tarea {task_id}.")
+
+    def flush(self, timeout: Optional[float] = None, since: Optional[int] = None) -> bool:
+        """
+        Espera a que se escriba todo lo encolado hasta ahora (p. ej. antes de
+        dar un job por terminado). Devuelve False si no terminó a tiempo o,
+        con `since` (un valor anterior de `dropped`), si desde entonces se
+        descartó algún log. El contador es del proceso, así que una pérdida
+        de otra ejecución concurrente también cuenta: mejor un falso fallo
+        que un job completado sin sus logs.
+        """
+        if self._thread is not None:
+            done = threading.Event()
+            try:
+                self._queue.put(done, timeout=timeout)
+            except queue.Full:
+                return False
+            if not done.wait(timeout):
+                return False
+        return since is None or self.dropped == since
+
+    def _run(self):
+        while True:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                if isinstance(item, threading.Event):
+                    # Un flush() pendiente: se escribe ya lo acumulado
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write_batch(self, batch) -> bool:
+        for attempt in range(LOG_WRITE_RETRIES + 1):
+            try:
+                if self.use_copy and engine.dialect.name == "postgresql":
+                    self._copy(batch)
+                else:
+                    self._insert(batch)
+                LOGS_WRITTEN.inc(len(batch))
+                return True
+            except Exception:
+                if attempt < LOG_WRITE_RETRIES:
+                    delay = LOG_WRITE_RETRY_SECONDS * 2 ** attempt
+                    logging.warning(
+                        f"ERROR al escribir un lote de {len(batch)} log(s) de ejecución. Reintento en {delay:.1f}s",
+                        exc_info=True,
+                    )
+                    time.sleep(delay)
+        with self._lock:
+            self.dropped += len(batch)
+        LOGS_DROPPED.labels(reason="write_error").inc(len(batch))
+        logging.error(f"Se descarta un lote de {len(batch)} log(s) de ejecución tras {LOG_WRITE_RETRIES + 1} intentos.")
+        return False
+
+    def _insert(self, batch):
+        """INSERT multi-fila (executemany con `insertmanyvalues` de SQLAlchemy)."""
+        with engine.begin() as conn:
+            log_storage.insert_logs(conn, batch)
+            log_storage.add_to_rollups(conn, batch)
+
+    def _copy(self, batch):
+        """COPY ... FROM STDIN en formato CSV: la vía más rápida de cargar filas en PostgreSQL."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in batch:
+            row = dict(record, detail=json.dumps(record["detail"]) if record["detail"] is not None else None)
+            row["created_at"] = row["created_at"].isoformat()
+            # Los None se escriben como campo vacío sin comillas, que COPY interpreta como NULL
+            writer.writerow([row[column] for column in COLUMNS])
+        buffer.seek(0)
+        # La tabla padre reparte las filas en las particiones; los agregados van en la misma transacción
+        with engine.begin() as conn:
+            with conn.connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {log_storage.PARENT.name} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+            log_storage.add_to_rollups(conn, batch)
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+def get_log_writer() -> ExecutionLogWriter:
+    """
+    Escritor del proceso actual. Se crea al primer uso y de nuevo tras un
+    fork (modo "process"): la cola y los locks heredados del padre no
+    sirven en el hijo.
+    """
+    global _writer, _writer_pid
+    pid = os.getpid()
+    if _writer is None or _writer_pid != pid:
+        with _writer_lock:
+            if _writer is None or _writer_pid != pid:
+                _writer = ExecutionLogWriter()
+                _writer_pid = pid
+                # Al salir se intenta escribir lo que quede en la cola
+                atexit.register(_writer.flush, 5)
+    return _writer
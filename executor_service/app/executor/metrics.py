@@ -0,0 +1,176 @@
+# en executor_service/app/executor/metrics.py
+import os
+import time
+import logging
+from contextlib import contextmanager
+# `config` fija PROMETHEUS_MULTIPROC_DIR en modo "process": tiene que ir antes de prometheus_client
+from ..config import PROMETHEUS_MULTIPROC_DIR
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client import multiprocess
+from . import task_context
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Duraciones de plugins: desde una publicación (segundos) hasta una moderación continua (horas)
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+# Latencias de la cola: el reclamo tarda milisegundos, la espera puede ser larga
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+def _queue_depth():
+    """Tareas pendientes y en curso por tipo, contadas en la BD al exportar."""
+    from sqlalchemy import func, select
+    from ..database import SessionLocal
+    from .. import models
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(models.Task.status, models.Task.type, func.count())
+            .where(models.Task.status.in_(("pending", "running")))
+            .group_by(models.Task.status, models.Task.type)
+        ).all()
+    except Exception:
+        logging.error("ERROR al calcular la profundidad de la cola para las métricas", exc_info=True)
+        rows = []
+    finally:
+        db.close()
+    return rows
+
+class _QueueDepthCollector:
+    """
+    Profundidad de la cola, calculada en la BD en cada scrape. No pasa por
+    los ficheros del modo multiproceso: la cuenta es la misma en todos los
+    procesos.
+    """
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            "executor_queue_depth", "Tareas por estado (pending | running) y tipo.", labels=("status", "task_type"),
+        )
+        for status, task_type, count in _queue_depth():
+            family.add_metric((status, task_type), count)
+        yield family
+
+PLUGIN_EXECUTION_SECONDS = Histogram(
+    "executor_plugin_execution_seconds", "Duración de plugin.execute por tipo de tarea.",
+    ("task_type", "outcome"), buckets=DURATION_BUCKETS,
+)
+REDDIT_API_CALLS = Counter(
+    "executor_reddit_api_calls_total", "Peticiones HTTP a la API de Reddit por tipo de tarea.", ("task_type",),
+)
+ITEMS_SCANNED = Counter(
+    "executor_plugin_items_scanned_total", "Elementos (comentarios, cuentas...) revisados por los plugins.",
+    ("task_type",),
+)
+ACTIONS_TAKEN = Counter(
+    "executor_plugin_actions_total", "Acciones realizadas en Reddit por los plugins.", ("task_type", "action"),
+)
+TASKS_FINISHED = Counter(
+    "executor_tasks_total", "Intentos de tareas terminados por tipo y estado resultante.", ("task_type", "status"),
+)
+CLAIM_SECONDS = Histogram(
+    "executor_task_claim_seconds", "Duración de claim_pending_task (result: claimed | empty).",
+    ("result",), buckets=LATENCY_BUCKETS,
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "executor_task_queue_wait_seconds", "Espera de una tarea desde que le tocaba ejecutarse hasta que se reclamó.",
+    ("task_type",), buckets=LATENCY_BUCKETS,
+)
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "executor_rate_limit_wait_seconds", "Espera por un token del rate limiter de Reddit (scope: global | account).",
+    ("scope",), buckets=LATENCY_BUCKETS,
+)
+LOGS_WRITTEN = Counter(
+    "executor_execution_logs_written_total", "Logs de ejecución escritos en la BD por el escritor por lotes.",
+)
+LOGS_DROPPED = Counter(
+    "executor_execution_logs_dropped_total", "Logs de ejecución descartados (cola llena o error al escribir).",
+    ("reason",),
+)
+def _current_task_type() -> str:
+    context = task_context.current()
+    return context.task_type if context is not None else "none"
+
+def count_api_call():
+    """Lo llaman los requestors en cada petición a Reddit."""
+    REDDIT_API_CALLS.labels(task_type=_current_task_type()).inc()
+
+def count_scanned(amount: int = 1):
+    """Para los plugins: elementos revisados en la tarea en curso."""
+    if amount:
+        ITEMS_SCANNED.labels(task_type=_current_task_type()).inc(amount)
+
+def count_actions(action: str, amount: int = 1):
+    """Para los plugins: acciones (borrar, responder, publicar...) hechas en la tarea en curso."""
+    if amount:
+        ACTIONS_TAKEN.labels(task_type=_current_task_type(), action=action).inc(amount)
+
+@contextmanager
+def time_plugin(task_type: str):
+    """Mide la duración de plugin.execute; la etiqueta `outcome` distingue éxito y error."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        PLUGIN_EXECUTION_SECONDS.labels(task_type=task_type, outcome=outcome).observe(time.perf_counter() - start)
+
+def reset_multiprocess_dir():
+    """
+    Borra del directorio de métricas multiproceso los ficheros de otros
+    PIDs. Lo llama el proceso padre antes de lanzar a los hijos: los de
+    una ejecución anterior se sumarían a los nuevos.
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return
+    own_suffix = f"_{os.getpid()}.db"
+    for name in os.listdir(PROMETHEUS_MULTIPROC_DIR):
+        if name.endswith(".db") and not name.endswith(own_suffix):
+            os.remove(os.path.join(PROMETHEUS_MULTIPROC_DIR, name))
+
+def process_exited(pid: int):
+    """Retira las series de un proceso hijo que terminó (modo multiproceso)."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+_registry = None
+
+def _exposition_registry():
+    """
+    Registro que se exporta. En modo multiproceso cada hijo escribe sus
+    métricas en PROMETHEUS_MULTIPROC_DIR y `MultiProcessCollector` las suma
+    al exportar, así que un único /metrics cubre todos los procesos.
+    """
+    global _registry
+    if _registry is None:
+        if PROMETHEUS_MULTIPROC_DIR:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        registry.register(_QueueDepthCollector())
+        _registry = registry
+    return _registry
+
+def render() -> bytes:
+    return generate_latest(_exposition_registry())
+
+def start_metrics_server(port: int):
+    """Sirve `/metrics` en un hilo aparte (0 lo desactiva)."""
+    if not port:
+        return None
+    try:
+        server, _ = start_http_server(port, registry=_exposition_registry())
+    except OSError as e:
+        logging.error(f"No se pudo abrir el puerto de métricas {port}: {e}")
+        return None
+    logging.info(f"Métricas disponibles en http://0.0.0.0:{port}/metrics")
+    return server
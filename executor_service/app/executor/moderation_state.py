@@ -0,0 +1,96 @@
+# en executor_service/app/executor/moderation_state.py
+from sqlalchemy import case, delete, func
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import dialect_insert
+from ..config import MODERATION_WATERMARK_SLACK
+
+class ModerationProgress:
+    """
+    Progreso persistido de la moderación de un post con un conjunto de
+    filtros (identificado por `rules_hash`): una marca de agua de
+    `created_utc` y los IDs ya evaluados cerca de ella.
+
+    En una nueva ejecución solo se evalúan los comentarios que no están en
+    el conjunto y no son anteriores a `marca de agua - slack`. El margen
+    cubre comentarios que llegan tarde (relojes, árboles truncados) y
+    mantiene acotado el conjunto que se carga en memoria.
+    """
+
+    def __init__(self, db: Session, submission_id: str, rules_hash: str,
+                 slack: float = MODERATION_WATERMARK_SLACK):
+        self.db = db
+        self.submission_id = submission_id
+        self.rules_hash = rules_hash
+        self.slack = slack
+
+        watermark = db.get(models.ModerationWatermark, (submission_id, rules_hash))
+        self.high_water_utc = watermark.high_water_utc if watermark else 0.0
+        self.cutoff = self.high_water_utc - slack if watermark else float("-inf")
+
+        rows = db.query(models.ModerationSeenComment.comment_id, models.ModerationSeenComment.created_utc).filter(
+            models.ModerationSeenComment.submission_id == submission_id,
+            models.ModerationSeenComment.rules_hash == rules_hash,
+            models.ModerationSeenComment.created_utc >= self.cutoff,
+        )
+        # comment_id -> created_utc
+        self.seen = dict(rows.all())
+        self._pending = {}
+
+    def is_new(self, comment) -> bool:
+        """True si el comentario aún no ha sido evaluado con estos filtros."""
+        return comment.created_utc >= self.cutoff and comment.id not in self.seen
+
+    def mark(self, comment):
+        """Registra el comentario como evaluado (se persiste en `save`)."""
+        self.seen[comment.id] = comment.created_utc
+        self._pending[comment.id] = comment.created_utc
+
+    def save(self):
+        """
+        Persiste los IDs nuevos, avanza la marca de agua y poda (en la BD y en
+        memoria) lo que quedó por debajo del margen. Se puede llamar varias
+        veces, p. ej. como checkpoint periódico de una moderación continua.
+        """
+        if not self._pending:
+            return
+        # Otra ejecución del mismo post (modo stream, una programación, otro worker) puede haberlos guardado ya
+        self.db.execute(
+            dialect_insert(self.db, models.ModerationSeenComment).on_conflict_do_nothing(),
+            [
+                {
+                    "submission_id": self.submission_id,
+                    "rules_hash": self.rules_hash,
+                    "comment_id": comment_id,
+                    "created_utc": created_utc,
+                }
+                for comment_id, created_utc in self._pending.items()
+            ],
+        )
+
+        high_water_utc = max(self.high_water_utc, max(self._pending.values()))
+        # La marca de agua solo avanza, aunque otra ejecución la haya movido entretanto
+        watermarks = models.ModerationWatermark.__table__
+        stmt = dialect_insert(self.db, watermarks).values(
+            submission_id=self.submission_id, rules_hash=self.rules_hash, high_water_utc=high_water_utc,
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=["submission_id", "rules_hash"],
+            set_={"high_water_utc": case(
+                (watermarks.c.high_water_utc < stmt.excluded.high_water_utc, stmt.excluded.high_water_utc),
+                else_=watermarks.c.high_water_utc,
+            ), "updated_at": func.now()},
+        ))
+
+        self.db.execute(
+            delete(models.ModerationSeenComment).where(
+                models.ModerationSeenComment.submission_id == self.submission_id,
+                models.ModerationSeenComment.rules_hash == self.rules_hash,
+                models.ModerationSeenComment.created_utc < high_water_utc - self.slack,
+            )
+        )
+        self.db.commit()
+        self.high_water_utc = high_water_utc
+        self.cutoff = high_water_utc - self.slack
+        self.seen = {cid: created for cid, created in self.seen.items() if created >= self.cutoff}
+        self._pending = {}
@@ -0,0 +1,123 @@
+# en executor_service/app/executor/notifier.py
+import json
+import logging
+import select
+import threading
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..config import TASK_NOTIFY_CHANNEL
+
+class TaskNotifier:
+    """
+    Despierta a los workers de un proceso cuando llega trabajo nuevo.
+
+    En PostgreSQL un hilo dedicado hace `LISTEN` sobre el canal que dispara
+    task_service al insertar tareas. En otros motores (SQLite) no hay
+    notificaciones y los workers caen al sondeo periódico con el timeout de
+    `wait`.
+
+    Para no perder avisos, el worker toma `generation` ANTES de buscar tareas
+    y se lo pasa a `wait`: si entretanto llegó una notificación, `wait`
+    retorna de inmediato.
+
+    El mismo hilo puede atender otros canales registrados con `subscribe`.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._handlers = {TASK_NOTIFY_CHANNEL: lambda payload: self.notify()}
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def generation(self) -> int:
+        with self._condition:
+            return self._generation
+
+    def notify(self):
+        """Despierta a todos los workers que estén esperando."""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def wait(self, since: int, timeout: float) -> bool:
+        """
+        Espera una notificación posterior a `since` o hasta `timeout` segundos.
+        Devuelve True si hubo notificación.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._generation != since, timeout)
+
+    def subscribe(self, channel: str, handler):
+        """Registra `handler(payload)` para un canal adicional. Llamar antes de `start`."""
+        self._handlers[channel] = handler
+
+    def start(self):
+        if self.engine.dialect.name != "postgresql":
+            logging.info("LISTEN/NOTIFY no disponible para este motor. Se usará sondeo periódico.")
+            return
+        self._thread = threading.Thread(target=self._listen_loop, name="task-notifier", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _listen_loop(self):
+        backoff = 1
+        while not self._stop.is_set():
+            connection = None
+            try:
+                # Conexión dedicada fuera del pool: queda ocupada escuchando.
+                connection = self.engine.raw_connection()
+                connection.detach()
+                dbapi_connection = connection.dbapi_connection
+                dbapi_connection.autocommit = True
+                cursor = dbapi_connection.cursor()
+                for channel in self._handlers:
+                    cursor.execute(f'LISTEN "{channel}"')
+                logging.info(f"Escuchando notificaciones en {', '.join(self._handlers)}")
+                backoff = 1
+                # Lo que se insertó mientras no escuchábamos se recoge en la siguiente búsqueda.
+                self.notify()
+
+                while not self._stop.is_set():
+                    if select.select([dbapi_connection], [], [], 5) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    notifies = list(dbapi_connection.notifies)
+                    dbapi_connection.notifies.clear()
+                    for notification in notifies:
+                        self._dispatch(notification.channel, notification.payload)
+            except Exception as e:
+                logging.warning(f"Listener de notificaciones caído ({e}). Reintentando en {backoff}s...")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def _dispatch(self, channel: str, payload: str):
+        handler = self._handlers.get(channel)
+        if handler is None:
+            return
+        try:
+            handler(payload)
+        except Exception:
+            logging.error(f"ERROR al procesar la notificación del canal '{channel}'", exc_info=True)
+
+def notify_new_task(db: Session, task_id: int):
+    """
+    Publica el aviso de tarea nueva dentro de la transacción actual.
+    PostgreSQL lo entrega al hacer commit; en otros motores no hace nada.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": TASK_NOTIFY_CHANNEL, "payload": json.dumps({"task_id": task_id})},
+        )
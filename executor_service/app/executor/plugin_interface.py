@@ -1,5 +1,6 @@
 # en executor_service/app/executor/plugin_interface.py
 from abc import ABC, abstractmethod
+from ..config import TASK_DEFAULT_TIMEOUT, TASK_TIMEOUTS
 
 class PluginInterface(ABC):
     """
@@ -10,10 +11,44 @@ class PluginInterface(ABC):
     # El nombre de la tarea que este plugin puede manejar
     task_type = "nombre_de_tarea_a_manejar"
 
+    # Tiempo máximo de ejecución (segundos); None usa TASK_DEFAULT_TIMEOUT.
+    # TASK_TIMEOUTS permite sobrescribirlo por tipo sin tocar el código.
+    timeout_seconds = None
+
+    def get_timeout(self, task_config) -> float:
+        """
+        Plazo tras el cual el worker cancela la tarea. Los plugins cuya
+        duración depende de la configuración (p. ej. una moderación continua)
+        pueden sobrescribirlo.
+        """
+        if self.task_type in TASK_TIMEOUTS:
+            return float(TASK_TIMEOUTS[self.task_type])
+        return float(self.timeout_seconds or TASK_DEFAULT_TIMEOUT)
+
     @abstractmethod
     def execute(self, db_session, reddit_instance, task_config, account):
         """
         El método principal que el kernel llamará.
         Contiene toda la lógica del plugin.
+
+        Puede devolver un dict con el resumen de lo realizado (p. ej. el
+        resultado por comentario de un borrado masivo) para el log de ejecución.
+        """
+        pass
+
+class AsyncPluginInterface(PluginInterface):
+    """
+    Contrato para plugins asíncronos (asyncio). `reddit_instance` es un
+    cliente de asyncpraw, de modo que el worker en modo "async" puede
+    intercalar cientos de tareas limitadas por red en un único event loop.
+    Los plugins síncronos siguen funcionando en cualquier modo: el worker
+    los ejecuta en un pool de hilos.
+    """
+
+    @abstractmethod
+    async def execute(self, db_session, reddit_instance, task_config, account):
+        """
+        Versión asíncrona de `PluginInterface.execute`. La sesión de BD es
+        síncrona: las consultas largas deberían ir en `asyncio.to_thread`.
         """
-        pass
\ No newline at end of file
+        pass
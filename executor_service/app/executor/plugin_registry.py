@@ -0,0 +1,113 @@
+# en executor_service/app/executor/plugin_registry.py
+import os
+import ast
+import sys
+import json
+import logging
+from importlib.metadata import entry_points
+from ..config import PLUGIN_MANIFEST_PATH
+
+PLUGIN_DIR = os.path.join(os.path.dirname(__file__), "plugins")
+PLUGIN_PACKAGE = "app.executor.plugins"
+# Grupo de entry points por el que paquetes externos pueden registrar plugins ("tipo = modulo:Clase")
+ENTRY_POINT_GROUP = "redbot.plugins"
+
+_PLUGIN_BASES = {"PluginInterface", "AsyncPluginInterface"}
+
+def _base_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return getattr(node, "id", "")
+
+def _scan_file(path: str, module: str) -> dict:
+    """Lee `task_type` de las clases de plugin de un archivo sin importarlo."""
+    with open(path, encoding="utf-8") as source:
+        tree = ast.parse(source.read(), filename=path)
+    found = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef) or not any(_base_name(b) in _PLUGIN_BASES for b in node.bases):
+            continue
+        for statement in node.body:
+            if (
+                isinstance(statement, ast.Assign)
+                and any(getattr(target, "id", None) == "task_type" for target in statement.targets)
+                and isinstance(statement.value, ast.Constant)
+            ):
+                found[statement.value.value] = {"module": module, "class": node.name}
+    return found
+
+def scan_plugins(plugin_dir: str = PLUGIN_DIR, package: str = PLUGIN_PACKAGE) -> dict:
+    """
+    Construye el registro {task_type: {"module", "class"}} analizando el
+    código de `*_plugin.py` con `ast`: no se importa ni instancia nada.
+    """
+    registry = {}
+    for filename in sorted(os.listdir(plugin_dir)):
+        if not filename.endswith("_plugin.py"):
+            continue
+        path = os.path.join(plugin_dir, filename)
+        try:
+            entries = _scan_file(path, f"{package}.{filename[:-3]}")
+        except SyntaxError as e:
+            logging.error(f"ERROR al analizar el plugin {filename}: {e}")
+            continue
+        for task_type, entry in entries.items():
+            if task_type in registry:
+                logging.warning(f"Tipo de tarea '{task_type}' duplicado en {filename}; se mantiene {registry[task_type]['module']}.")
+                continue
+            registry[task_type] = entry
+    return registry
+
+def _entry_point_plugins() -> dict:
+    registry = {}
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        module, _, class_name = entry_point.value.partition(":")
+        registry[entry_point.name] = {"module": module, "class": class_name}
+    return registry
+
+def _manifest_is_fresh(path: str, plugin_dir: str) -> bool:
+    """El manifiesto sirve si es posterior a todos los archivos de plugins."""
+    built_at = os.path.getmtime(path)
+    return all(
+        os.path.getmtime(os.path.join(plugin_dir, filename)) <= built_at
+        for filename in os.listdir(plugin_dir)
+        if filename.endswith("_plugin.py")
+    )
+
+def load_registry(path: str = PLUGIN_MANIFEST_PATH, plugin_dir: str = PLUGIN_DIR) -> dict:
+    """
+    Registro de plugins disponible. Se usa el manifiesto generado al
+    construir la imagen; si no existe o está desactualizado (p. ej. en
+    desarrollo), se analiza el código al vuelo. Los entry points se suman
+    siempre, sin pisar a los plugins propios.
+    """
+    registry = None
+    if os.path.exists(path):
+        try:
+            if _manifest_is_fresh(path, plugin_dir):
+                with open(path, encoding="utf-8") as manifest:
+                    registry = json.load(manifest)["plugins"]
+            else:
+                logging.info("Manifiesto de plugins desactualizado. Se analiza el directorio de plugins.")
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"No se pudo leer el manifiesto de plugins ({e}). Se analiza el directorio de plugins.")
+    if registry is None:
+        registry = scan_plugins(plugin_dir)
+    for task_type, entry in _entry_point_plugins().items():
+        registry.setdefault(task_type, entry)
+    return registry
+
+def build_manifest(path: str = PLUGIN_MANIFEST_PATH, plugin_dir: str = PLUGIN_DIR) -> dict:
+    """Genera el manifiesto (se ejecuta al construir la imagen de Docker)."""
+    registry = scan_plugins(plugin_dir)
+    with open(path, "w", encoding="utf-8") as manifest:
+        json.dump({"plugins": registry}, manifest, indent=2, sort_keys=True)
+    return registry
+
+if __name__ == "__main__":
+    # python -m app.executor.plugin_registry build
+    if sys.argv[1:] != ["build"]:
+        sys.exit("Uso: python -m app.executor.plugin_registry build")
+    logging.basicConfig(level=logging.INFO)
+    plugins = build_manifest()
+    logging.info(f"Manifiesto de plugins generado en {PLUGIN_MANIFEST_PATH}: {', '.join(sorted(plugins))}")
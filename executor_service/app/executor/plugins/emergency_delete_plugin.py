@@ -1,7 +1,26 @@
 # en executor_service/app/executor/plugins/emergency_delete_plugin.py
+import time
+from praw.models import MoreComments
 from ..plugin_interface import PluginInterface
+from ..bulk_actions import run_bulk_action
+from .. import metrics
+from ...config import EMERGENCY_DELETE_TREE_MAX_COMMENTS, EMERGENCY_DELETE_MORE_LIMIT
+
+# Reddit no devuelve más de 1000 elementos en un listado ni más de 100 por página.
+LISTING_MAX_ITEMS = 1000
+LISTING_PAGE_SIZE = 100
 
 class EmergencyDeletePlugin(PluginInterface):
+    """
+    Borra todos los comentarios de la cuenta en un post.
+
+    Hay dos estrategias para encontrarlos:
+    - "tree": recorrer el árbol de comentarios del post (barato en hilos pequeños).
+    - "history": paginar el historial de la cuenta (`comments.new()`) filtrando
+      por `link_id` y parando al llegar a comentarios anteriores al post.
+    Con "auto" (por defecto) se elige según el tamaño del hilo frente al
+    volumen de comentarios reciente de la cuenta.
+    """
     task_type = "borrado_emergencia"
 
     def execute(self, db_session, reddit_instance, task_config, account):
@@ -10,17 +29,92 @@ class EmergencyDeletePlugin(PluginInterface):
         if not post_url:
             raise ValueError("Se necesita 'post_url' en la configuración JSON.")
 
-        bot_username = reddit_instance.user.me().name
+        me = reddit_instance.user.me()
+        bot_username = me.name
         print(f"Buscando comentarios de '{bot_username}' en el post: {post_url}")
 
         submission = reddit_instance.submission(url=post_url)
-        submission.comments.replace_more(limit=0)
+        strategy = task_config.get("strategy", "auto")
+        more_limit = int(task_config.get("more_limit", EMERGENCY_DELETE_MORE_LIMIT))
+        first_page = []
+        if strategy == "auto" and submission.num_comments <= EMERGENCY_DELETE_TREE_MAX_COMMENTS:
+            # Hilo pequeño: el árbol sale barato y no hace falta mirar el historial
+            strategy = "tree"
+        if strategy in ("auto", "history"):
+            first_page = list(me.comments.new(limit=LISTING_PAGE_SIZE))
+        if strategy == "auto":
+            strategy = self._choose_strategy(submission, first_page)
+        print(f"Estrategia de búsqueda: '{strategy}' (el hilo tiene {submission.num_comments} comentarios)")
+
+        if strategy == "history":
+            own_comments, complete = self._find_in_history(me, submission, first_page)
+            if not complete:
+                # El listado de Reddit se corta en 1000 elementos: completamos con el árbol
+                print("El historial no alcanza la fecha del post. Se revisa también el árbol de comentarios.")
+                own_comments += self._find_in_tree(submission, bot_username, more_limit)
+        else:
+            own_comments = self._find_in_tree(submission, bot_username, more_limit)
+
+        # Los borrados van en paralelo, con reintentos y dentro del presupuesto de la cuenta
+        summary = run_bulk_action(account, own_comments, "delete")
+        summary["strategy"] = strategy
+        print(f"--- Borrado de Emergencia Finalizado: {summary['succeeded']} comentarios eliminados. ---")
+        return summary
+
+    def _choose_strategy(self, submission, first_page) -> str:
+        """
+        Compara las páginas que costaría cada estrategia: el árbol crece con
+        `num_comments`; el historial, con los comentarios que la cuenta ha
+        escrito desde que se publicó el post (estimado con la primera página).
+        Solo se llama con hilos de más de EMERGENCY_DELETE_TREE_MAX_COMMENTS
+        comentarios: con menos se usa el árbol sin pedir el historial.
+        """
+        if len(first_page) < LISTING_PAGE_SIZE or first_page[-1].created_utc < submission.created_utc:
+            return "history"  # una sola página cubre todo el periodo
 
-        count = 0
-        for comment in submission.comments.list():
+        page_span = max(first_page[0].created_utc - first_page[-1].created_utc, 1.0)
+        history_pages = min(
+            (time.time() - submission.created_utc) / page_span,
+            LISTING_MAX_ITEMS / LISTING_PAGE_SIZE,
+        )
+        tree_pages = submission.num_comments / LISTING_PAGE_SIZE
+        return "history" if history_pages <= tree_pages else "tree"
+
+    def _find_in_history(self, me, submission, first_page):
+        """
+        Devuelve (ids, completo). `completo` es False si el listado se agotó
+        sin llegar a comentarios anteriores al post.
+        """
+        found = []
+        seen = 0
+        params = {"after": first_page[-1].fullname} if len(first_page) == LISTING_PAGE_SIZE else None
+        pages = [first_page]
+        if params:
+            pages.append(me.comments.new(limit=None, params=params))
+
+        for page in pages:
+            for comment in page:
+                seen += 1
+                metrics.count_scanned()
+                if comment.created_utc < submission.created_utc:
+                    return found, True
+                if comment.link_id == submission.fullname:
+                    print(f"Eliminando comentario: '{comment.body[:30]}...'")
+                    found.append(comment.id)
+            if page is first_page and not params:
+                return found, True
+        return found, seen < LISTING_MAX_ITEMS
+
+    def _find_in_tree(self, submission, bot_username, more_limit: int = EMERGENCY_DELETE_MORE_LIMIT):
+        comments = submission.comments.list()
+        # Solo se expanden los "MoreComments" si el árbol los tiene (los hilos pequeños llegan completos)
+        if any(isinstance(comment, MoreComments) for comment in comments):
+            submission.comments.replace_more(limit=more_limit)
+            comments = submission.comments.list()
+        found = []
+        metrics.count_scanned(len(comments))
+        for comment in comments:
             if comment.author and comment.author.name == bot_username:
                 print(f"Eliminando comentario: '{comment.body[:30]}...'")
-                comment.delete()
-                count += 1
-
-        print(f"--- Borrado de Emergencia Finalizado: {count} comentarios eliminados. ---")
\ No newline at end of file
+                found.append(comment.id)
+        return found
@@ -1,95 +1,200 @@
 # en executor_service/app/executor/plugins/moderar_plugin.py
 
 from ..plugin_interface import PluginInterface
+from ..rule_engine import RuleEngine, rules_hash
+from ..moderation_state import ModerationProgress
+from ..bulk_actions import run_bulk_action
+from .. import task_context, metrics
+from ...config import (
+    MODERATION_STREAM_MAX_SECONDS, MODERATION_STREAM_CHECKPOINT_SECONDS, MODERATION_STREAM_BUFFER,
+)
 import logging
-import re
-
-# --- (Las funciones de ayuda check_caps_percent, check_spam_patterns, etc. van aquí) ---
-def check_caps_percent(text: str, percent_limit: int) -> bool:
-    if not text: return False
-    uppercase_chars = sum(1 for c in text if c.isupper())
-    total_chars = sum(1 for c in text if c.isalpha())
-    if total_chars == 0: return False
-    percent = (uppercase_chars / total_chars) * 100
-    return percent > percent_limit
-
-def check_spam_patterns(text: str, patterns: list) -> bool:
-    for pattern in patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            return True
-    return False
-
-def check_forbidden_words(text: str, words: list) -> bool:
-    text_lower = text.lower()
-    return any(word.lower() in text_lower for word in words)
-# --- (Fin de las funciones de ayuda) ---
+import time
 
 
 class ModerarPlugin(PluginInterface):
+    """
+    Modera comentarios con los filtros de la tarea.
+
+    - mode "once" (por defecto): una pasada sobre los comentarios de `post_url`.
+    - mode "stream": consume los comentarios nuevos de `subreddit` (o solo
+      los de `post_url`) a medida que llegan, durante `duration_seconds`.
+    """
     task_type = "moderar"
 
+    def get_timeout(self, task_config) -> float:
+        timeout = super().get_timeout(task_config)
+        if task_config.get("mode", "once") == "stream":
+            # La duración pedida más el margen normal para el último lote y el checkpoint
+            timeout += float(task_config.get("duration_seconds", MODERATION_STREAM_MAX_SECONDS))
+        return timeout
+
     def execute(self, db_session, reddit_instance, task_config, account):
+        if task_config.get("mode", "once") == "stream":
+            return self._execute_stream(db_session, reddit_instance, task_config, account)
+
         logging.info("--- Iniciando plugin de moderación ---")
 
         authenticated_user = reddit_instance.user.me()
         post_url = task_config.get("post_url")
         action = task_config.get("action", "remove")
         filters = task_config.get("filters", {})
-        
-        forbidden_words = filters.get("forbidden_words", [])
-        spam_patterns = filters.get("spam_patterns", [])
-        max_caps_percent = filters.get("max_caps_percent", 100)
+
+        # Los filtros se compilan una sola vez (y se reutilizan entre tareas con la misma configuración)
+        rules = RuleEngine.from_filters(filters)
 
         if not post_url:
             raise ValueError("Configuración inválida: falta 'post_url'.")
 
         submission = reddit_instance.submission(url=post_url)
-        subreddit = submission.subreddit
-        
-        logging.info(f"Verificando permisos de moderador en 'r/{subreddit.display_name}'...")
-        moderators = [str(mod) for mod in subreddit.moderator()]
-        
-        if authenticated_user.name not in moderators:
-            logging.warning(f"El usuario NO es moderador. Abortando tarea.")
-            raise Exception(f"El usuario {authenticated_user.name} no es moderador.")
+        self._ensure_moderator(submission.subreddit, authenticated_user.name)
 
         logging.info(f"✅ Permisos confirmados. Aplicando filtros...")
+        # Los comentarios más nuevos primero: son los que una ejecución repetida necesita ver.
+        submission.comment_sort = "new"
         submission.comments.replace_more(limit=0)
-        
-        # ▼▼▼ LÓGICA CORREGIDA ▼▼▼
-        
-        comments_to_delete = [] # 1. Crear una lista vacía
-        
-        # 2. PRIMER BUCLE: Encontrar todos los comentarios infractores
+
+        # Solo se evalúan comentarios que no se revisaron antes con estos mismos filtros
+        progress = None
+        if task_config.get("incremental", True):
+            progress = ModerationProgress(db_session, submission.id, rules_hash(filters))
+
+        comments_to_delete = []
+
+        # 1. PRIMER BUCLE: Encontrar todos los comentarios infractores
         logging.info("Buscando todos los comentarios que violan las reglas...")
+        skipped = evaluated = 0
         for comment in submission.comments.list():
             if comment.author and comment.author.name == authenticated_user.name:
-                continue 
-
-            reason = None
-            
-            if forbidden_words and check_forbidden_words(comment.body, forbidden_words):
-                reason = "Palabra prohibida detectada"
-            elif spam_patterns and check_spam_patterns(comment.body, spam_patterns):
-                reason = "Patrón de spam detectado"
-            elif max_caps_percent < 100 and check_caps_percent(comment.body, max_caps_percent):
-                reason = f"Exceso de mayúsculas (>{max_caps_percent}%)"
-
-            if reason:
-                logging.info(f"Comentario de '{comment.author}' activó un filtro: {reason}")
+                continue
+            if progress and not progress.is_new(comment):
+                skipped += 1
+                continue
+
+            evaluated += 1
+            if self._violates(rules, comment):
                 comments_to_delete.append(comment) # Añadir a la lista de borrado
+            elif progress:
+                progress.mark(comment)
+
+        metrics.count_scanned(evaluated)
+        if skipped:
+            logging.info(f"{skipped} comentarios ya revisados en ejecuciones anteriores se omitieron.")
 
-        # 3. SEGUNDO BUCLE: Borrar todos los comentarios de la lista
+        # 2. Borrar todos los comentarios de la lista (en paralelo, dentro del presupuesto de la cuenta)
+        summary = None
         if not comments_to_delete:
             logging.info("No se encontraron comentarios que violen las reglas.")
         else:
             logging.info(f"Se encontraron {len(comments_to_delete)} comentarios para eliminar. Procediendo...")
-            for comment in comments_to_delete:
-                if action == "remove":
-                    try:
-                        comment.delete()
-                        logging.info(f"-> Acción: Comentario de '{comment.author}' eliminado.")
-                    except Exception as e:
-                        logging.error(f"Error al eliminar el comentario {comment.id}: {e}")
-        
-        logging.info("--- Tarea de moderación finalizada ---")
\ No newline at end of file
+            summary = self._apply_action(comments_to_delete, action, progress, account)
+
+        if progress:
+            progress.save()
+
+        logging.info("--- Tarea de moderación finalizada ---")
+        return {"skipped": skipped, "flagged": len(comments_to_delete), "actions": summary}
+
+    def _execute_stream(self, db_session, reddit_instance, task_config, account):
+        """
+        Moderación continua sobre el stream de comentarios del subreddit.
+        Las infracciones se acumulan en un buffer acotado y se procesan por
+        lotes; el progreso se guarda periódicamente, de modo que al reanudar
+        (p. ej. tras un reinicio) no se reevalúa lo ya revisado.
+        """
+        authenticated_user = reddit_instance.user.me()
+        action = task_config.get("action", "remove")
+        filters = task_config.get("filters", {})
+        rules = RuleEngine.from_filters(filters)
+        duration = float(task_config.get("duration_seconds", MODERATION_STREAM_MAX_SECONDS))
+
+        post_url = task_config.get("post_url")
+        if post_url:
+            submission = reddit_instance.submission(url=post_url)
+            subreddit = submission.subreddit
+            link_id = submission.fullname
+            checkpoint_key = submission.id
+        elif task_config.get("subreddit"):
+            subreddit = reddit_instance.subreddit(task_config["subreddit"])
+            link_id = None
+            checkpoint_key = f"stream:r/{subreddit.display_name.lower()}"
+        else:
+            raise ValueError("Configuración inválida: el modo 'stream' necesita 'subreddit' o 'post_url'.")
+
+        self._ensure_moderator(subreddit, authenticated_user.name)
+        progress = ModerationProgress(db_session, checkpoint_key, rules_hash(filters))
+
+        logging.info(f"--- Moderación continua en 'r/{subreddit.display_name}' durante {duration:.0f}s ---")
+        deadline = time.monotonic() + duration
+        next_checkpoint = time.monotonic() + MODERATION_STREAM_CHECKPOINT_SECONDS
+        buffer = []
+        evaluated = removed = 0
+        failures = {}
+
+        # pause_after=0: el stream devuelve None cuando no hay comentarios nuevos,
+        # lo que permite vaciar el buffer y comprobar el tiempo sin bloquearse.
+        for comment in subreddit.stream.comments(pause_after=0):
+            task_context.heartbeat()
+            if comment is not None:
+                is_own = comment.author and comment.author.name == authenticated_user.name
+                if (link_id is None or comment.link_id == link_id) and not is_own and progress.is_new(comment):
+                    evaluated += 1
+                    metrics.count_scanned()
+                    if self._violates(rules, comment):
+                        buffer.append(comment)
+                    else:
+                        progress.mark(comment)
+
+            now = time.monotonic()
+            if buffer and (comment is None or len(buffer) >= MODERATION_STREAM_BUFFER or now >= deadline):
+                summary = self._apply_action(buffer, action, progress, account)
+                if summary:
+                    removed += summary["succeeded"]
+                    failures.update({cid: out for cid, out in summary["outcomes"].items() if out != "ok"})
+                buffer = []
+            if now >= next_checkpoint or now >= deadline:
+                progress.save()
+                next_checkpoint = now + MODERATION_STREAM_CHECKPOINT_SECONDS
+            if now >= deadline:
+                break
+
+        progress.save()
+        logging.info(f"--- Moderación continua finalizada: {evaluated} evaluados, {removed} eliminados ---")
+        return {"evaluated": evaluated, "removed": removed, "failed": failures}
+
+    def _ensure_moderator(self, subreddit, username):
+        logging.info(f"Verificando permisos de moderador en 'r/{subreddit.display_name}'...")
+        moderators = [str(mod) for mod in subreddit.moderator()]
+
+        if username not in moderators:
+            logging.warning(f"El usuario NO es moderador. Abortando tarea.")
+            raise Exception(f"El usuario {username} no es moderador.")
+
+    def _violates(self, rules, comment) -> bool:
+        match = rules.evaluate(comment.body)
+        if match:
+            logging.info(f"Comentario de '{comment.author}' activó un filtro: {match.reason} ({match.value!r})")
+        return bool(match)
+
+    def _apply_action(self, comments, action, progress, account):
+        """
+        Aplica la acción a los comentarios infractores y devuelve el resumen
+        por comentario. Los que fallan no se marcan como revisados, así que
+        se reintentan en la próxima ejecución.
+        """
+        if action != "remove":
+            if progress:
+                for comment in comments:
+                    progress.mark(comment)
+            return None
+
+        # Retirar como moderador: `delete` solo sirve para comentarios propios
+        summary = run_bulk_action(account, [comment.id for comment in comments], "remove")
+        for comment in comments:
+            if summary["outcomes"].get(comment.id) == "ok":
+                logging.info(f"-> Acción: Comentario de '{comment.author}' retirado.")
+                if progress:
+                    progress.mark(comment)
+            else:
+                logging.error(f"Error al retirar el comentario {comment.id}: {summary['outcomes'].get(comment.id)}")
+        return summary
@@ -1,16 +1,18 @@
 # en executor_service/app/executor/plugins/publicar_plugin.py
 
-from ..plugin_interface import PluginInterface
+from ..plugin_interface import AsyncPluginInterface
+from .. import metrics
 import logging
 
-class PublicarPlugin(PluginInterface):
+class PublicarPlugin(AsyncPluginInterface):
     """
     Este plugin maneja la lógica para crear una nueva publicación en Reddit.
     Si no se provee un subreddit, publicará en el perfil del usuario.
+    Es asíncrono (asyncpraw): casi todo su tiempo es espera de red.
     """
     task_type = "publicar"
 
-    def execute(self, db_session, reddit_instance, task_config, account):
+    async def execute(self, db_session, reddit_instance, task_config, account):
         logging.info(f"Ejecutando plugin de 'publicar' para la cuenta {account.handle}")
 
         # 1. Obtener la configuración de la tarea
@@ -29,11 +31,12 @@ class PublicarPlugin(PluginInterface):
 
         try:
             # 4. Obtener el objeto subreddit desde PRAW
-            subreddit = reddit_instance.subreddit(subreddit_name)
+            subreddit = await reddit_instance.subreddit(subreddit_name)
 
             # 5. Realizar la publicación
             logging.info(f"Publicando en '{subreddit_name}' con el título '{title}'...")
-            submission = subreddit.submit(title, selftext=text)
+            submission = await subreddit.submit(title, selftext=text)
+            metrics.count_actions("submit")
             
             logging.info(f"¡Publicación exitosa! URL: {submission.url}")
 
@@ -1,4 +1,7 @@
 from ..plugin_interface import PluginInterface
+from ..responder_state import ReplyLedger, rules_key
+from ..rule_engine import KeywordMatcher
+from .. import metrics
 import logging
 
 class ResponderPlugin(PluginInterface):
@@ -13,15 +16,45 @@ class ResponderPlugin(PluginInterface):
         if not all([post_url, keywords, reply_text]):
             raise ValueError("Configuración inválida para la tarea de respuesta.")
 
+        # El usuario se resuelve una sola vez por ejecución
+        bot_username = reddit_instance.user.me().name
+        matcher = KeywordMatcher(keywords)
+
         submission = reddit_instance.submission(url=post_url)
         submission.comments.replace_more(limit=0)
+        comments = submission.comments.list()
+
+        # Los comentarios ya revisados con estas palabras clave en ejecuciones anteriores se descartan sin tocar la red
+        ledger = ReplyLedger(db_session, account.id, submission.id, rules_key(matcher.words))
+        unseen = ledger.unseen(comment.id for comment in comments)
+        logging.info(f"{len(comments) - len(unseen)} comentarios ya revisados se omiten; {len(unseen)} nuevos.")
+        metrics.count_scanned(len(unseen))
 
-        for comment in submission.comments.list():
-            if comment.author and comment.author.name == reddit_instance.user.me().name:
+        replied = 0
+        for comment in comments:
+            if comment.id not in unseen:
+                continue
+            if comment.author and comment.author.name == bot_username:
+                ledger.record(comment.id)
                 continue # No responder a nosotros mismos
-            if any(keyword.lower() in comment.body.lower() for keyword in keywords):
+            if matcher.find(comment.body) is not None:
+                # Se reclama antes de responder: si otro worker ya lo tiene, no se responde dos veces
+                if not ledger.claim(comment.id):
+                    logging.info(f"El comentario {comment.id} ya lo atendió otra ejecución. Se omite.")
+                    continue
                 logging.info(f"Palabra clave encontrada en el comentario de '{comment.author}'. Respondiendo...")
-                comment.reply(reply_text)
+                try:
+                    comment.reply(reply_text)
+                except Exception:
+                    ledger.release(comment.id)
+                    raise
+                ledger.mark_replied(comment.id)
+                replied += 1
+                metrics.count_actions("reply")
                 logging.info("Respuesta enviada.")
+            else:
+                ledger.record(comment.id)
 
-        logging.info("--- Tarea de respuesta finalizada ---")
\ No newline at end of file
+        ledger.save()
+        logging.info("--- Tarea de respuesta finalizada ---")
+        return {"scanned": len(unseen), "skipped": len(comments) - len(unseen), "replied": replied}
@@ -1,35 +1,112 @@
 # en executor_service/app/executor/plugins/validate_accounts_plugin.py
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_, update
 from ..plugin_interface import PluginInterface
+from ..errors import is_auth_error
+from ..reddit_bot import get_reddit_instance, client_cache
+from ..rate_limiter import wait_deadline
+from .. import task_context, metrics
+from ..task_context import TaskCancelled
 from ... import models # Importa los modelos desde 'app'
+from ...config import ACCOUNT_VALIDATION_CONCURRENCY, ACCOUNT_VALIDATION_TIMEOUT, ACCOUNT_VALIDATION_FLUSH_SIZE
+
+# Estados que se guardan en accounts.health_status
+ACTIVE = "active"
+INVALID = "invalid"   # credenciales rechazadas: los demás plugins la saltan
+ERROR = "error"       # no se pudo comprobar (red, 5xx, timeout): se reintentará
+
+def check_account(account_id: int, token: str, timeout: float) -> tuple:
+    """
+    Autentica una cuenta desde cero. Devuelve (estado, detalle). `timeout`
+    acota cada petición HTTP y también la espera total en el rate limiter.
+    """
+    try:
+        with wait_deadline(timeout):
+            get_reddit_instance(token, account_id, timeout=timeout)
+        return ACTIVE, None
+    except TaskCancelled:
+        raise
+    except Exception as e:
+        return (INVALID if is_auth_error(e) else ERROR), str(e)
 
 class ValidateAccountsPlugin(PluginInterface):
+    """
+    Valida las credenciales de las cuentas con concurrencia acotada y guarda
+    el resultado (`health_status`, `last_checked_at`) en la propia cuenta,
+    en actualizaciones masivas a medida que terminan las comprobaciones: si
+    la tarea se cancela a medias, lo ya comprobado queda guardado.
+
+    Config opcional:
+    - "stale_minutes": solo revalida cuentas no comprobadas en ese tiempo.
+    - "concurrency" y "timeout_seconds": sustituyen a los valores por defecto.
+    """
     task_type = "validar_cuentas"
 
     def execute(self, db_session, reddit_instance, task_config, account):
-        print("--- Ejecutando Plugin de Validación de Cuentas ---")
+        logging.info("--- Ejecutando Plugin de Validación de Cuentas ---")
+        concurrency = int(task_config.get("concurrency", ACCOUNT_VALIDATION_CONCURRENCY))
+        timeout = float(task_config.get("timeout_seconds", ACCOUNT_VALIDATION_TIMEOUT))
+
+        query = db_session.query(models.Account.id, models.Account.handle, models.Account.token)
+        stale_minutes = task_config.get("stale_minutes")
+        if stale_minutes is not None:
+            threshold = datetime.now(timezone.utc) - timedelta(minutes=float(stale_minutes))
+            query = query.filter(or_(
+                models.Account.last_checked_at.is_(None),
+                models.Account.last_checked_at < threshold,
+            ))
+        cuentas_a_validar = query.all()
+        # Liberamos la transacción: la validación puede tardar y no necesita la conexión
+        db_session.commit()
 
-        # Para esta tarea, la instancia de reddit_instance no se usa,
-        # ya que necesitamos crear una nueva por cada cuenta a validar.
+        # Los hilos del pool heredan la tarea en curso, y con ella su cancelación
+        context = task_context.current()
 
-        cuentas_a_validar = db_session.query(models.Account).all()
-        for cuenta in cuentas_a_validar:
-            print(f"Validando cuenta ID={cuenta.id}, Handle='{cuenta.handle}'...")
+        def validar(cuenta):
+            with task_context.bind(context):
+                return check_account(cuenta.id, cuenta.token, timeout)
+
+        results = []
+        checked = 0
+        summary = {ACTIVE: 0, INVALID: 0, ERROR: 0}
+
+        def guardar():
+            # Una sola actualización masiva por clave primaria
+            if results:
+                db_session.execute(update(models.Account), results)
+                db_session.commit()
+                results.clear()
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="validate") as pool:
+            futures = {pool.submit(validar, cuenta): cuenta for cuenta in cuentas_a_validar}
             try:
-                # Creamos una instancia de PRAW específica para esta cuenta
-                # Esta lógica debe estar en un lugar accesible, como un archivo 'utils'
-                # Por ahora, la replicamos aquí para el ejemplo.
-                from ..reddit_bot import get_reddit_instance
-                reddit = get_reddit_instance(cuenta.token)
-
-                # La prueba definitiva: ¿podemos obtener el usuario?
-                if reddit.user.me():
-                    print(f"-> Cuenta '{cuenta.handle}' está ACTIVA.")
-                else:
-                    # En un caso real, aquí podrías actualizar el estado de la cuenta en la BD
-                    print(f"-> Cuenta '{cuenta.handle}' podría estar INACTIVA (autenticación silenciosa fallida).")
-
-            except Exception as e:
-                # Si get_reddit_instance falla, el token es inválido
-                print(f"-> Cuenta '{cuenta.handle}' está INACTIVA (Error: {e}).")
-
-        print("--- Validación de Cuentas Finalizada ---")
\ No newline at end of file
+                for future in as_completed(futures):
+                    cuenta = futures[future]
+                    try:
+                        status, detail = future.result()
+                    except TaskCancelled:
+                        raise
+                    except Exception as e:
+                        status, detail = ERROR, str(e)
+                    summary[status] += 1
+                    checked += 1
+                    results.append({"id": cuenta.id, "health_status": status, "last_checked_at": datetime.now(timezone.utc)})
+                    if status == ACTIVE:
+                        logging.info(f"-> Cuenta '{cuenta.handle}' está ACTIVA.")
+                    else:
+                        logging.info(f"-> Cuenta '{cuenta.handle}' está {status.upper()} (Error: {detail}).")
+                    if status == INVALID:
+                        client_cache.invalidate(cuenta.id)
+                    if len(results) >= ACCOUNT_VALIDATION_FLUSH_SIZE:
+                        guardar()
+            finally:
+                # Si la tarea se cancela, las pendientes no llegan a empezar y lo ya comprobado se guarda
+                for future in futures:
+                    future.cancel()
+                guardar()
+
+        metrics.count_scanned(checked)
+        logging.info(f"--- Validación de Cuentas Finalizada: {summary} ---")
+        return {"checked": checked, **summary}
@@ -0,0 +1,199 @@
+# en executor_service/app/executor/rate_limiter.py
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from prawcore import Requestor
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from ..database import SessionLocal
+from ..models import RateLimitBucket
+from . import task_context, metrics
+from ..config import (
+    REDDIT_GLOBAL_RATE, REDDIT_GLOBAL_BURST,
+    REDDIT_ACCOUNT_RATE, REDDIT_ACCOUNT_BURST, REDDIT_RATE_BATCH,
+)
+
+class RateLimitTimeout(TimeoutError):
+    """El siguiente token llegaría después del plazo fijado con `wait_deadline`."""
+
+# Instante (time.monotonic) límite para las esperas del hilo o tarea de asyncio actual
+_wait_deadline = ContextVar("rate_limit_wait_deadline", default=None)
+
+@contextmanager
+def wait_deadline(seconds: float):
+    """
+    Acota a `seconds` (desde ahora) el tiempo total que `acquire` puede
+    esperar por tokens dentro del bloque: si un token llegaría más tarde,
+    lanza `RateLimitTimeout` sin esperar.
+    """
+    token = _wait_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _wait_deadline.reset(token)
+
+def _check_deadline(key: str, wait: float):
+    deadline = _wait_deadline.get()
+    if deadline is not None and wait > 0 and time.monotonic() + wait > deadline:
+        raise RateLimitTimeout(f"Rate limit '{key}': el token llegaría en {wait:.2f}s, fuera de plazo.")
+
+class TokenBucketLimiter:
+    """
+    Token bucket con presupuesto global y por cuenta, compartido entre
+    procesos y réplicas a través de la tabla `rate_limit_buckets`.
+
+    Cada `acquire` reserva un token con una única actualización condicional
+    (compare-and-swap sobre `version`): si el bucket está vacío, el saldo
+    queda en negativo y la llamada duerme lo necesario para pagar su turno.
+    Así no hay sondeo contra la BD mientras se espera y los llamadores se
+    atienden por orden de llegada.
+
+    Para no pagar una escritura en la BD por petición, cada proceso reserva
+    los tokens de `batch` en `batch` y los reparte en memoria, cada uno en
+    el instante en que el bucket lo habría dado (el ritmo global se
+    mantiene). Los tokens reservados que un proceso no llega a usar a
+    tiempo se pierden, y entonces sus lotes se reducen.
+    """
+
+    MAX_CAS_RETRIES = 10
+
+    def __init__(self, session_factory=SessionLocal,
+                 global_rate: float = REDDIT_GLOBAL_RATE, global_burst: float = REDDIT_GLOBAL_BURST,
+                 account_rate: float = REDDIT_ACCOUNT_RATE, account_burst: float = REDDIT_ACCOUNT_BURST,
+                 batch: int = REDDIT_RATE_BATCH):
+        self.session_factory = session_factory
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self.batch = max(1, batch)
+        # clave del bucket -> instantes (time.time()) de los tokens ya reservados en este proceso
+        self._reserved = {}
+        # clave del bucket -> tamaño del próximo lote (crece si se gasta entero, mengua si se desperdicia)
+        self._batch_sizes = {}
+        self._reserve_lock = threading.Lock()
+
+    def acquire(self, account_id: Optional[int] = None) -> float:
+        """
+        Bloquea hasta disponer de un token de la cuenta y uno global.
+        Devuelve los segundos esperados.
+        """
+        waited = 0.0
+        for key, rate, burst, scope in self._buckets(account_id):
+            wait = self._try_reserve(key, rate, burst)
+            _check_deadline(key, wait)
+            if wait > 0:
+                time.sleep(wait)
+            metrics.RATE_LIMIT_WAIT_SECONDS.labels(scope=scope).observe(wait)
+            waited += wait
+        return waited
+
+    async def acquire_async(self, account_id: Optional[int] = None) -> float:
+        """Como `acquire`, pero la espera no bloquea el event loop."""
+        waited = 0.0
+        for key, rate, burst, scope in self._buckets(account_id):
+            wait = await asyncio.to_thread(self._try_reserve, key, rate, burst)
+            _check_deadline(key, wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            metrics.RATE_LIMIT_WAIT_SECONDS.labels(scope=scope).observe(wait)
+            waited += wait
+        return waited
+
+    def _buckets(self, account_id: Optional[int]):
+        if account_id is not None and self.account_rate > 0:
+            yield f"account:{account_id}", self.account_rate, self.account_burst, "account"
+        if self.global_rate > 0:
+            yield "global", self.global_rate, self.global_burst, "global"
+
+    def _try_reserve(self, key: str, rate: float, burst: float) -> float:
+        try:
+            wait = self._take(key, rate, burst)
+        except Exception as e:
+            # Si la BD falla no paramos la tarea: PRAW sigue respetando los límites de Reddit.
+            logging.warning(f"No se pudo consultar el rate limiter '{key}' ({e}). Se continúa sin esperar.")
+            return 0.0
+        if wait >= 1:
+            logging.info(f"Rate limit '{key}': esperando {wait:.2f}s por un token.")
+        return wait
+
+    def _take(self, key: str, rate: float, burst: float) -> float:
+        """Toma el siguiente token reservado en memoria (reservando otro lote si no quedan)."""
+        with self._reserve_lock:
+            now = time.time()
+            slots = self._reserved.setdefault(key, deque())
+            size = self._batch_sizes.get(key, 1)
+            # Un turno pasado hace más de un token ya no vale: se acumularía ráfaga
+            wasted = 0
+            while slots and slots[0] < now - 1 / rate:
+                slots.popleft()
+                wasted += 1
+            if wasted:
+                # Este proceso no gasta lo que reserva: lotes más pequeños
+                self._batch_sizes[key] = size = max(1, size // 2)
+            if not slots:
+                count = max(1, min(size, self.batch, int(burst)))
+                wait = self._reserve(key, rate, burst, count)
+                start = time.time() + wait
+                slots.extend(start + i / rate for i in range(count))
+                if not wasted:
+                    self._batch_sizes[key] = min(self.batch, size * 2)
+            return max(0.0, slots.popleft() - time.time())
+
+    def _reserve(self, key: str, rate: float, burst: float, count: int = 1) -> float:
+        """
+        Descuenta `count` tokens del bucket y devuelve cuánto hay que esperar
+        para usar el primero (los demás llegan a razón de `rate` por segundo).
+        """
+        with self.session_factory() as db:
+            for _ in range(self.MAX_CAS_RETRIES):
+                now = time.time()
+                bucket = db.get(RateLimitBucket, key, populate_existing=True)
+                if bucket is None:
+                    db.add(RateLimitBucket(key=key, tokens=burst - count, updated_at=now, version=0))
+                    try:
+                        db.commit()
+                        return 0.0
+                    except IntegrityError:
+                        db.rollback()
+                        continue
+
+                available = min(burst, bucket.tokens + max(0.0, now - bucket.updated_at) * rate)
+                tokens = available - count
+                result = db.execute(
+                    update(RateLimitBucket)
+                    .where(RateLimitBucket.key == key, RateLimitBucket.version == bucket.version)
+                    .values(tokens=tokens, updated_at=now, version=bucket.version + 1)
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+                if result.rowcount == 1:
+                    # El primer token del lote está disponible cuando el saldo previo llega a 1
+                    return max(0.0, 1 - available) / rate
+            raise RuntimeError("demasiada contención en el bucket")
+
+rate_limiter = TokenBucketLimiter()
+
+class RateLimitedRequestor(Requestor):
+    """
+    Requestor de prawcore que pasa cada petición HTTP (incluida la renovación
+    del token OAuth) por el rate limiter antes de enviarla, y que corta con
+    `TaskCancelled` si la tarea en curso fue cancelada.
+    """
+
+    def __init__(self, *args, account_id: Optional[int] = None, limiter: TokenBucketLimiter = rate_limiter, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.account_id = account_id
+        self.limiter = limiter
+
+    def request(self, *args, **kwargs):
+        # Punto de cancelación: una tarea vencida no sigue llamando a la API
+        task_context.heartbeat()
+        self.limiter.acquire(self.account_id)
+        metrics.count_api_call()
+        return super().request(*args, **kwargs)
@@ -1,24 +1,154 @@
 import praw
 import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from typing import Optional
+from ..config import REDDIT_CLIENT_CACHE_SIZE, REDDIT_CLIENT_CACHE_TTL
+from .errors import AuthenticationError, is_auth_error
+from .rate_limiter import RateLimitedRequestor
 
 REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
 REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
 REDDIT_USER_AGENT = "RedBot by MyUser (v1.0)"
 
-def get_reddit_instance(account_token: str):
-    """
-    Crea una instancia de PRAW y verifica que la autenticación sea exitosa.
-    """
-    reddit = praw.Reddit(
+def _build_reddit(account_token: str, account_id: Optional[int] = None,
+                  timeout: Optional[float] = None) -> praw.Reddit:
+    # Todas las peticiones pasan por el rate limiter (presupuesto global y de la cuenta).
+    requestor_kwargs = {"account_id": account_id}
+    if timeout is not None:
+        requestor_kwargs["timeout"] = timeout
+    return praw.Reddit(
         client_id=REDDIT_CLIENT_ID,
         client_secret=REDDIT_CLIENT_SECRET,
         refresh_token=account_token,
         user_agent=REDDIT_USER_AGENT,
+        requestor_class=RateLimitedRequestor,
+        requestor_kwargs=requestor_kwargs,
     )
 
-    # Verifica la autenticación
-    if not reddit.user.me():
-        raise Exception("Autenticación fallida. El refresh_token es inválido o ha sido revocado.")
+def _authenticate(reddit: praw.Reddit) -> str:
+    """
+    Verifica la autenticación y devuelve el nombre del usuario. PRAW guarda
+    el resultado de `user.me()` en la instancia, así que las llamadas
+    posteriores de los plugins no vuelven a la red.
+    """
+    me = reddit.user.me()
+    if not me:
+        raise AuthenticationError("Autenticación fallida. El refresh_token es inválido o ha sido revocado.")
+    return me.name
+
+def get_reddit_instance(account_token: str, account_id: Optional[int] = None,
+                        timeout: Optional[float] = None):
+    """
+    Crea una instancia de PRAW y verifica que la autenticación sea exitosa.
+    No usa la caché: sirve para comprobar un token desde cero. `timeout`
+    limita cada petición HTTP (segundos).
+    """
+    reddit = _build_reddit(account_token, account_id, timeout)
+    username = _authenticate(reddit)
+    print(f"--- Autenticación exitosa como: {username} ---")
+    return reddit
+
+# `generation`: la de la cuenta al crearlo; si la cuenta se invalida mientras está prestado, no vuelve a la caché
+CachedClient = namedtuple("CachedClient", ["reddit", "username", "created_at", "generation"], defaults=(0,))
+
+class RedditClientCache:
+    """
+    Caché LRU/TTL de clientes de PRAW ya autenticados, por proceso.
 
-    print(f"--- Autenticación exitosa como: {reddit.user.me().name} ---")
-    return reddit
\ No newline at end of file
+    La clave es (id de cuenta, hash del token): si account_service cambia el
+    token, la clave nueva no coincide y se autentica de nuevo. Las instancias
+    de PRAW no son seguras entre hilos, así que cada cliente se presta en
+    exclusiva (`checkout`) y vuelve a la caché al terminar (`checkin`); dos
+    tareas simultáneas de la misma cuenta usan clientes distintos. Un
+    cliente prestado cuando se invalida su cuenta se descarta al devolverlo.
+    """
+
+    def __init__(self, max_size: int = REDDIT_CLIENT_CACHE_SIZE, ttl: float = REDDIT_CLIENT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # clave -> lista de CachedClient inactivos
+        self._idle = OrderedDict()
+        self._size = 0
+        # id de cuenta -> número de invalidaciones
+        self._generations = {}
+
+    @staticmethod
+    def _key(account) -> tuple:
+        token_hash = hashlib.sha256(account.token.encode("utf-8")).hexdigest()
+        return account.id, token_hash
+
+    def checkout(self, account) -> CachedClient:
+        """Presta un cliente autenticado para la cuenta, reutilizando uno inactivo si lo hay."""
+        key = self._key(account)
+        now = time.monotonic()
+        with self._lock:
+            clients = self._idle.get(key)
+            while clients:
+                client = clients.pop()
+                self._size -= 1
+                if now - client.created_at < self.ttl:
+                    if not clients:
+                        del self._idle[key]
+                    return client
+            self._idle.pop(key, None)
+            generation = self._generations.get(account.id, 0)
+
+        reddit = _build_reddit(account.token, account.id)
+        username = _authenticate(reddit)
+        logging.info(f"--- Autenticación exitosa como: {username} (cuenta {account.id}) ---")
+        return CachedClient(reddit, username, now, generation)
+
+    def checkin(self, account, client: CachedClient):
+        """Devuelve un cliente a la caché como el más recientemente usado (salvo que se haya invalidado)."""
+        key = self._key(account)
+        with self._lock:
+            if client.generation != self._generations.get(account.id, 0):
+                return
+            self._idle.setdefault(key, []).append(client)
+            self._idle.move_to_end(key)
+            self._size += 1
+            while self._size > self.max_size:
+                _, clients = next(iter(self._idle.items()))
+                clients.pop(0)
+                self._size -= 1
+                if not clients:
+                    self._idle.popitem(last=False)
+
+    def invalidate(self, account_id: int):
+        """
+        Descarta todos los clientes de una cuenta (token cambiado o revocado),
+        también los que están prestados: no volverán a la caché.
+        """
+        with self._lock:
+            self._generations[account_id] = self._generations.get(account_id, 0) + 1
+            for key in [key for key in self._idle if key[0] == account_id]:
+                self._size -= len(self._idle.pop(key))
+        logging.info(f"Clientes de Reddit de la cuenta {account_id} invalidados.")
+
+client_cache = RedditClientCache()
+
+@contextmanager
+def reddit_session(account):
+    """
+    Presta un cliente autenticado para la cuenta durante el bloque `with`.
+    Si el bloque falla por un error de autenticación, el cliente se descarta
+    junto con el resto de clientes cacheados de la cuenta.
+    """
+    client = client_cache.checkout(account)
+    healthy = True
+    try:
+        yield client.reddit
+    except Exception as e:
+        if is_auth_error(e):
+            healthy = False
+            client_cache.invalidate(account.id)
+        raise
+    finally:
+        if healthy:
+            client_cache.checkin(account, client)
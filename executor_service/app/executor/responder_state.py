@@ -0,0 +1,204 @@
+# en executor_service/app/executor/responder_state.py
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Iterable, Set
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import dialect_insert
+from .bloom import BloomFilter
+
+# `rules_key` de los comentarios reclamados o respondidos: valen para cualquier juego de palabras clave
+_CLAIMED = "*"
+# Filtros de Bloom por (cuenta, post, palabras clave), compartidos entre ejecuciones del mismo proceso
+_BLOOM_CACHE_SIZE = 256
+_blooms = OrderedDict()
+_blooms_lock = threading.Lock()
+# Margen al refrescar un filtro: `created_at` es la hora de inicio de la transacción que
+# escribió la fila, así que una fila puede hacerse visible después de otras más nuevas
+_REFRESH_SLACK = timedelta(minutes=5)
+
+class _CachedBloom:
+    def __init__(self, bloom: BloomFilter, loaded_until):
+        self.bloom = bloom
+        # Mayor `created_at` leído de la BD: en la siguiente ejecución solo se leen las filas posteriores
+        self.loaded_until = loaded_until
+
+def rules_key(words: Iterable[str]) -> str:
+    """Huella de un juego de palabras clave (sin importar orden ni repeticiones)."""
+    return hashlib.sha1("\n".join(sorted(set(words))).encode()).hexdigest()[:16]
+
+class ReplyLedger:
+    """
+    Registro persistido de los comentarios que una cuenta ya revisó (y
+    respondió) en un post, para no responder dos veces ni reevaluarlos.
+
+    Un comentario descartado solo se da por visto con las mismas palabras
+    clave (`rules_key`): otra tarea sobre el mismo post con palabras
+    distintas lo vuelve a evaluar. Los reclamados y respondidos se dan por
+    vistos siempre, para no responder dos veces desde la misma cuenta.
+
+    La fuente exacta es la tabla `responder_seen_comments`; delante hay un
+    filtro de Bloom en memoria. Un comentario que el filtro no conoce es
+    nuevo seguro; solo los "quizá vistos" se confirman contra la BD, en una
+    única consulta `IN` por ejecución.
+
+    El filtro se cachea por proceso y, al empezar cada ejecución, se
+    completa con las filas que otros procesos o réplicas escribieron desde
+    la última lectura. Aun así la respuesta nunca se decide solo con el
+    filtro: antes de responder, el comentario se reclama en la BD (`claim`)
+    y solo quien lo inserta responde.
+    """
+
+    def __init__(self, db: Session, account_id: int, submission_id: str, rules_key: str):
+        self.db = db
+        self.account_id = account_id
+        self.submission_id = submission_id
+        self.rules_key = rules_key
+        self.bloom = self._load_bloom()
+        self._pending = set()
+
+    def _seen(self):
+        """Filas que cuentan como vistas para este juego de palabras clave."""
+        seen = models.ResponderSeenComment
+        return and_(
+            seen.account_id == self.account_id,
+            seen.submission_id == self.submission_id,
+            or_(seen.replied.is_(True), seen.rules_key.in_((_CLAIMED, self.rules_key))),
+        )
+
+    def _query(self):
+        return self.db.query(models.ResponderSeenComment.comment_id).filter(self._seen())
+
+    def _fetch(self, since=None):
+        """IDs escritos desde `since` (todos si es None) y el mayor `created_at` leído."""
+        seen = models.ResponderSeenComment
+        query = select(seen.comment_id, seen.created_at).where(self._seen())
+        if since is not None:
+            query = query.where(seen.created_at >= since - _REFRESH_SLACK)
+        rows = self.db.execute(query).all()
+        loaded_until = max((created_at for _, created_at in rows if created_at is not None), default=since)
+        return [comment_id for comment_id, _ in rows], loaded_until
+
+    def _load_bloom(self) -> BloomFilter:
+        key = (self.account_id, self.submission_id, self.rules_key)
+        with _blooms_lock:
+            cached = _blooms.get(key)
+            if cached is not None and not cached.bloom.saturated:
+                _blooms.move_to_end(key)
+            else:
+                cached = None
+
+        if cached is not None:
+            known, loaded_until = self._fetch(cached.loaded_until)
+            with _blooms_lock:
+                for comment_id in known:
+                    cached.bloom.add(comment_id)
+                if loaded_until is not None:
+                    cached.loaded_until = max(cached.loaded_until or loaded_until, loaded_until)
+            if not cached.bloom.saturated:
+                return cached.bloom
+
+        known, loaded_until = self._fetch()
+        bloom = BloomFilter(capacity=max(1000, len(known) * 2))
+        for comment_id in known:
+            bloom.add(comment_id)
+        with _blooms_lock:
+            _blooms[key] = _CachedBloom(bloom, loaded_until)
+            _blooms.move_to_end(key)
+            while len(_blooms) > _BLOOM_CACHE_SIZE:
+                _blooms.popitem(last=False)
+        return bloom
+
+    def unseen(self, comment_ids: Iterable[str]) -> Set[str]:
+        """Devuelve los IDs que esta cuenta todavía no revisó en el post con estas palabras clave."""
+        comment_ids = set(comment_ids)
+        maybe_seen = [comment_id for comment_id in comment_ids if comment_id in self.bloom]
+        confirmed = set()
+        for start in range(0, len(maybe_seen), 500):
+            chunk = maybe_seen[start:start + 500]
+            confirmed.update(
+                comment_id for (comment_id,) in
+                self._query().filter(models.ResponderSeenComment.comment_id.in_(chunk))
+            )
+        return comment_ids - confirmed
+
+    def claim(self, comment_id: str) -> bool:
+        """
+        Reclama el comentario antes de responderlo: lo inserta (sin marcar
+        como respondido) o toma la fila que dejó otra tarea que lo descartó, y
+        confirma. Devuelve False si otra ejecución ya lo tenía reclamado o
+        respondido, y entonces no hay que responder.
+        """
+        seen = models.ResponderSeenComment
+        stmt = dialect_insert(self.db, seen).values(
+            account_id=self.account_id, submission_id=self.submission_id, comment_id=comment_id,
+            replied=False, rules_key=_CLAIMED,
+        )
+        claimed = self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[seen.account_id, seen.submission_id, seen.comment_id],
+                set_={"rules_key": _CLAIMED, "created_at": func.now()},
+                where=and_(seen.replied.is_(False), seen.rules_key.is_distinct_from(_CLAIMED)),
+            ).returning(seen.comment_id)
+        ).first()
+        self.db.commit()
+        with _blooms_lock:
+            self.bloom.add(comment_id)
+        return claimed is not None
+
+    def mark_replied(self, comment_id: str):
+        """Marca como respondido un comentario ya reclamado."""
+        seen = models.ResponderSeenComment
+        self.db.execute(
+            update(seen)
+            .where(seen.account_id == self.account_id, seen.submission_id == self.submission_id,
+                   seen.comment_id == comment_id)
+            .values(replied=True)
+        )
+        self.db.commit()
+
+    def release(self, comment_id: str):
+        """Suelta un comentario reclamado cuya respuesta falló, para reintentarlo en otra ejecución."""
+        seen = models.ResponderSeenComment
+        self.db.execute(
+            delete(seen).where(
+                seen.account_id == self.account_id, seen.submission_id == self.submission_id,
+                seen.comment_id == comment_id, seen.replied.is_(False), seen.rules_key == _CLAIMED,
+            )
+        )
+        self.db.commit()
+
+    def record(self, comment_id: str):
+        """Marca el comentario como descartado con estas palabras clave (se persiste en `save`)."""
+        self._pending.add(comment_id)
+
+    def save(self):
+        if not self._pending:
+            return
+        seen = models.ResponderSeenComment
+        # Una fila descartada con otras palabras clave pasa a estas; una reclamada o respondida no se toca
+        self.db.execute(
+            dialect_insert(self.db, seen).on_conflict_do_update(
+                index_elements=[seen.account_id, seen.submission_id, seen.comment_id],
+                set_={"rules_key": self.rules_key, "created_at": func.now()},
+                where=and_(seen.replied.is_(False), seen.rules_key.is_distinct_from(_CLAIMED)),
+            ),
+            [
+                {
+                    "account_id": self.account_id,
+                    "submission_id": self.submission_id,
+                    "comment_id": comment_id,
+                    "replied": False,
+                    "rules_key": self.rules_key,
+                }
+                for comment_id in self._pending
+            ],
+        )
+        self.db.commit()
+        with _blooms_lock:
+            for comment_id in self._pending:
+                self.bloom.add(comment_id)
+        self._pending = set()
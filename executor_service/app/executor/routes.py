@@ -1,87 +1,140 @@
 # executor_service/app/executor/routes.py
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
-import os
-import requests
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ..dependencies import get_current_user, get_bearer_token
 from ..database import get_db
-from ..models import ExecutionLog
-from ..schemas import ExecutionLog as ExecutionLogSchema
+from ..schemas import (
+    ExecutionLogPage, ExecutionLogDailyStat, ExecutionJob as ExecutionJobSchema, ExecutionJobAccepted,
+)
+from . import jobs, log_export, log_queries
 
 router = APIRouter()
 
-TASK_SERVICE_URL = os.getenv("TASK_SERVICE_URL", "http://task_service:8000")
+
+def _current_user_id(user: dict):
+    user_id = user.get("sub") or user.get("user_id")
+    # Si user_id es un string de dígitos, lo convertimos a int
+    if isinstance(user_id, str) and user_id.isdigit():
+        user_id = int(user_id)
+    return user_id
 
 
-@router.post("/execute/{account_id}")
+@router.post("/execute/{account_id}", status_code=202, response_model=ExecutionJobAccepted)
 def execute_tasks(
     account_id: int,
+    background_tasks: BackgroundTasks,
     user=Depends(get_current_user),           # payload JWT (sub/user_id)
     token: str = Depends(get_bearer_token),   # string del JWT para reenviar
     db: Session = Depends(get_db),
 ):
-    user_id = user.get("sub") or user.get("user_id")
-    # Si user_id es un string de dígitos, lo convertimos a int
-    if isinstance(user_id, str) and user_id.isdigit():
-        user_id = int(user_id)
+    """
+    Encola la ejecución de las tareas de la cuenta y responde enseguida con
+    el id del job. El progreso se consulta en `/jobs/{job_id}` o se sigue
+    en vivo con `/jobs/{job_id}/events`.
+    """
+    job = jobs.create_job(db, _current_user_id(user), account_id)
+    background_tasks.add_task(jobs.run_job, job.id, token)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/executor/jobs/{job.id}",
+        "events_url": f"/executor/jobs/{job.id}/events",
+    }
 
-    # 1) Traer todas las tareas del usuario desde task_service
-    try:
-        resp = requests.get(
-            f"{TASK_SERVICE_URL}/tasks/",
-            headers={"Authorization": f"Bearer {token}"},
-            timeout=15,
-        )
-        resp.raise_for_status()
-        tasks = resp.json()
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"No se pudo obtener tareas: {e}")
-
-    # 2) Filtrar por account_id
-    tasks_for_account = [t for t in tasks if t.get("account_id") == account_id]
-
-    results = []
-    for t in tasks_for_account:
-        task_type = t.get("type") or t.get("task_type") or "unknown"
-        cfg = t.get("config_json", {})
-
-        # Simulación de ejecución:
-        result_detail = {"action": task_type, "config": cfg}
-        results.append(result_detail)
-
-        # Guardar log
-        log = ExecutionLog(
-            user_id=user_id,
-            account_id=account_id,
-            task_id=t.get("id"),
-            task_type=task_type,
-            status="success",
-            detail=result_detail,
-        )
-        db.add(log)
-
-    db.commit()
-    return {"count": len(tasks_for_account), "results": results}
-
-
-@router.get("/logs", response_model=List[ExecutionLogSchema])
+
+@router.get("/jobs/{job_id}", response_model=ExecutionJobSchema)
+def get_job(job_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    job = jobs.get_job(db, job_id, _current_user_id(user))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+def stream_job_events(job_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """Eventos SSE del job (`progress`, y al final `completed` o `failed`)."""
+    if jobs.get_job(db, job_id, _current_user_id(user)) is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return StreamingResponse(
+        jobs.job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/logs", response_model=ExecutionLogPage)
 def get_logs(
     account_id: Optional[int] = Query(default=None, ge=1, description="Filtra por account_id"),
+    status: Optional[List[str]] = Query(default=None, description="Uno o varios estados (?status=failed&status=dead)"),
+    task_type: Optional[str] = Query(default=None, description="Tipo de tarea"),
+    since: Optional[datetime] = Query(default=None, description="Desde esta fecha (inclusive)"),
+    until: Optional[datetime] = Query(default=None, description="Hasta esta fecha (exclusive)"),
+    limit: int = Query(default=100, ge=1, le=500, description="Logs por página"),
+    cursor: Optional[str] = Query(default=None, description="`next_cursor` de la página anterior"),
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
     """
-    Devuelve los logs del usuario autenticado. Puedes filtrar por `account_id`.
+    Devuelve los logs del usuario autenticado, del más nuevo al más antiguo,
+    de `limit` en `limit`. Para la página siguiente se pasa el `next_cursor`
+    recibido (con los mismos filtros); es None en la última página.
     """
-    user_id = user.get("sub") or user.get("user_id")
-    if isinstance(user_id, str) and user_id.isdigit():
-        user_id = int(user_id)
+    query = log_queries.filtered_logs(db, _current_user_id(user), account_id, status, task_type, since, until)
+    try:
+        logs, next_cursor = log_queries.logs_page(db, query, limit, cursor)
+    except log_queries.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": logs, "next_cursor": next_cursor}
 
-    q = db.query(ExecutionLog).filter(ExecutionLog.user_id == user_id)
-    if account_id is not None:
-        q = q.filter(ExecutionLog.account_id == account_id)
 
-    # Devolvemos modelos SQLAlchemy (Pydantic los serializa por orm_mode)
-    return q.order_by(ExecutionLog.created_at.desc()).all()
+@router.get("/logs/export")
+def export_logs(
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$", description="ndjson | csv"),
+    account_id: Optional[int] = Query(default=None, ge=1, description="Filtra por account_id"),
+    status: Optional[List[str]] = Query(default=None, description="Uno o varios estados (?status=failed&status=dead)"),
+    task_type: Optional[str] = Query(default=None, description="Tipo de tarea"),
+    since: Optional[datetime] = Query(default=None, description="Desde esta fecha (inclusive)"),
+    until: Optional[datetime] = Query(default=None, description="Hasta esta fecha (exclusive)"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Descarga todos los logs del usuario que cumplan los filtros (los mismos
+    que `/logs`), en NDJSON o CSV comprimido con gzip. Se genera sobre la
+    marcha, así que sirve para historiales de cualquier tamaño.
+    """
+    query = log_queries.filtered_logs(db, _current_user_id(user), account_id, status, task_type, since, until)
+    filename = f"execution_logs.{format}.gz"
+    return StreamingResponse(
+        log_export.export_chunks(query, format),
+        media_type="application/gzip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Content-Type-Options": "nosniff",
+            # Que nginx no acumule la descarga entera antes de reenviarla
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get("/stats/daily", response_model=List[ExecutionLogDailyStat])
+def get_daily_stats(
+    account_id: Optional[int] = Query(default=None, ge=1, description="Filtra por account_id"),
+    task_type: Optional[str] = Query(default=None, description="Tipo de tarea"),
+    since: Optional[date] = Query(default=None, description="Desde este día (inclusive, UTC); por defecto hace 30 días"),
+    until: Optional[date] = Query(default=None, description="Hasta este día (inclusive, UTC)"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Número de ejecuciones por día, cuenta, tipo de tarea y estado. Sale de
+    los agregados diarios, no de los logs, así que sigue disponible cuando
+    la retención ya ha borrado los logs de esos días.
+    """
+    if since is None:
+        since = datetime.now(timezone.utc).date() - timedelta(days=30)
+    return log_queries.daily_stats(db, _current_user_id(user), account_id, task_type, since, until)
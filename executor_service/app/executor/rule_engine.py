@@ -0,0 +1,178 @@
+# en executor_service/app/executor/rule_engine.py
+import re
+import json
+import hashlib
+from collections import deque, namedtuple
+from functools import lru_cache
+from typing import Iterable, Optional
+
+# rule: "forbidden_word" | "spam_pattern" | "caps"; value: la palabra, el patrón o el porcentaje.
+RuleMatch = namedtuple("RuleMatch", ["rule", "value", "reason"])
+
+class KeywordMatcher:
+    """
+    Autómata de Aho-Corasick sobre palabras en minúsculas. Busca todas las
+    palabras a la vez en un solo recorrido del texto, sin importar cuántas
+    haya (equivale a `any(word in text.lower() for word in words)`).
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = [w.lower() for w in dict.fromkeys(words) if w]
+        self._goto = [{}]
+        self._fail = [0]
+        # Índice de la palabra que termina en el nodo (propia o heredada por el enlace de fallo)
+        self._output = [None]
+
+        for index, word in enumerate(self.words):
+            node = 0
+            for char in word:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                node = nxt
+            if self._output[node] is None:
+                self._output[node] = index
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                if self._output[child] is None:
+                    self._output[child] = self._output[self._fail[child]]
+
+    def __bool__(self):
+        return bool(self.words)
+
+    def find(self, text: str) -> Optional[str]:
+        """Devuelve la primera palabra encontrada en el texto, o None."""
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node] is not None:
+                return self.words[output[node]]
+        return None
+
+def caps_ratio(text: str) -> Optional[float]:
+    """
+    Porcentaje de mayúsculas sobre las letras del texto, en un solo recorrido.
+    None si el texto no tiene letras.
+    """
+    letters = upper = 0
+    for char in text:
+        if char.isalpha():
+            letters += 1
+            if char.isupper():
+                upper += 1
+    if not letters:
+        return None
+    return upper / letters * 100
+
+class RuleEngine:
+    """
+    Filtros de moderación de una tarea compilados una sola vez:
+    palabras prohibidas en un autómata de Aho-Corasick, patrones de spam en
+    una única expresión regular con un grupo por patrón (salvo los que
+    tienen grupos propios, que se evalúan aparte) y el control de
+    mayúsculas en un clasificador de una pasada. Evaluar un comentario es
+    lineal en su longitud.
+
+    Las reglas se evalúan en el mismo orden que antes: palabras prohibidas,
+    patrones de spam y mayúsculas.
+    """
+
+    def __init__(self, forbidden_words=(), spam_patterns=(), max_caps_percent=100):
+        self.forbidden = KeywordMatcher(forbidden_words)
+        self.spam_patterns = [p for p in spam_patterns if p]
+        self.max_caps_percent = max_caps_percent
+        self._spam_regex = None
+        self._spam_regexes = [re.compile(pattern, re.IGNORECASE) for pattern in self.spam_patterns]
+        # Índices (en orden) de los patrones que se evalúan por separado y no entran en la regex combinada
+        self._separate = []
+        combinable = []
+        for i, regex in enumerate(self._spam_regexes):
+            # Con grupos propios, sus referencias numéricas (\1) apuntarían a otro grupo al combinarlos
+            (self._separate if regex.groups else combinable).append(i)
+        if combinable:
+            try:
+                self._spam_regex = re.compile(
+                    "|".join(f"(?P<r{i}>{self.spam_patterns[i]})" for i in combinable),
+                    re.IGNORECASE,
+                )
+            except re.error:
+                # Flags globales en medio de un patrón (p. ej. "(?s)") no se pueden combinar.
+                self._separate = list(range(len(self.spam_patterns)))
+
+    @classmethod
+    def from_filters(cls, filters: dict) -> "RuleEngine":
+        """Devuelve el motor para la configuración `filters` de una tarea, cacheado por contenido."""
+        return _compile_rules(filters_fingerprint(filters))
+
+    def _find_spam(self, text: str) -> Optional[str]:
+        """
+        Primer patrón de `spam_patterns` (en el orden de la lista) que aparece
+        en el texto. La regex combinada devuelve el de la coincidencia más a
+        la izquierda, que no tiene por qué ser el primero: si encuentra el
+        patrón `first`, solo queda comprobar uno a uno los anteriores; si no
+        encuentra nada, solo los que van por separado. El caso habitual (sin
+        spam) sigue costando una sola pasada de la regex combinada.
+        """
+        first = None
+        if self._spam_regex is not None:
+            match = self._spam_regex.search(text)
+            if match:
+                first = int(match.lastgroup[1:])
+        for i in (range(first) if first is not None else self._separate):
+            if self._spam_regexes[i].search(text):
+                return self.spam_patterns[i]
+        return self.spam_patterns[first] if first is not None else None
+
+    def evaluate(self, text: str) -> Optional[RuleMatch]:
+        """Devuelve la primera regla que incumple el texto, o None si lo cumple todo."""
+        if not text:
+            return None
+        if self.forbidden:
+            word = self.forbidden.find(text)
+            if word is not None:
+                return RuleMatch("forbidden_word", word, "Palabra prohibida detectada")
+        if self.spam_patterns:
+            pattern = self._find_spam(text)
+            if pattern is not None:
+                return RuleMatch("spam_pattern", pattern, "Patrón de spam detectado")
+        if self.max_caps_percent < 100:
+            percent = caps_ratio(text)
+            if percent is not None and percent > self.max_caps_percent:
+                return RuleMatch("caps", round(percent, 1), f"Exceso de mayúsculas (>{self.max_caps_percent}%)")
+        return None
+
+def filters_fingerprint(filters: dict) -> str:
+    """Forma canónica de los filtros: misma configuración, misma cadena."""
+    return json.dumps(
+        {
+            "forbidden_words": list(filters.get("forbidden_words", [])),
+            "spam_patterns": list(filters.get("spam_patterns", [])),
+            "max_caps_percent": filters.get("max_caps_percent", 100),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+
+def rules_hash(filters: dict) -> str:
+    """Hash corto y estable de un conjunto de filtros."""
+    return hashlib.sha256(filters_fingerprint(filters).encode("utf-8")).hexdigest()[:16]
+
+@lru_cache(maxsize=128)
+def _compile_rules(fingerprint: str) -> RuleEngine:
+    filters = json.loads(fingerprint)
+    return RuleEngine(filters["forbidden_words"], filters["spam_patterns"], filters["max_caps_percent"])
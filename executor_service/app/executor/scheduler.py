@@ -0,0 +1,295 @@
+# en executor_service/app/executor/scheduler.py
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import select, text, update
+from ..database import SessionLocal, engine as default_engine
+from .. import models
+from ..config import SCHEDULER_REFRESH_SECONDS, SCHEDULER_LEADER_RETRY_SECONDS
+from .cron import CronExpression
+from .notifier import notify_new_task
+
+# Margen al pedir cambios por `updated_at`: cubre transacciones que confirmaron tarde
+_REFRESH_OVERLAP = timedelta(seconds=60)
+# Si materializar una ejecución falla (p. ej. la BD no responde), se reintenta tras este tiempo
+_FIRE_RETRY_SECONDS = 30
+# Clave del advisory lock de PostgreSQL que elige al planificador líder
+SCHEDULER_LOCK_KEY = 0x7363686564
+
+def _utc(value: datetime) -> datetime:
+    # SQLite no guarda la zona horaria: los valores se escribieron en UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+@lru_cache(maxsize=4096)
+def _cron(expression: str) -> CronExpression:
+    return CronExpression(expression)
+
+def compute_next_run(cron: Optional[str], interval_seconds: Optional[int], due: datetime, now: datetime) -> datetime:
+    """
+    Siguiente vencimiento posterior a `now`. Los vencimientos que se
+    perdieron (p. ej. con el executor parado) no se acumulan: se ejecutan
+    una sola vez y la programación sigue desde el presente.
+    """
+    due, now = _utc(due), _utc(now)
+    if cron:
+        return _cron(cron).next_after(max(due, now))
+    interval = timedelta(seconds=interval_seconds)
+    skipped = max(1, int((now - due) / interval) + 1)
+    return due + skipped * interval
+
+class _Leadership:
+    """
+    Liderazgo del planificador: un advisory lock de sesión tomado con una
+    conexión dedicada. Si el proceso muere o pierde la conexión, PostgreSQL
+    suelta el lock y otro planificador lo toma. En otros motores (SQLite,
+    un solo host) todos los planificadores son líderes.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._connection = None
+
+    def acquire(self) -> bool:
+        if self.engine.dialect.name != "postgresql":
+            return True
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY}
+            ).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def alive(self) -> bool:
+        """Comprueba que la conexión que sostiene el lock sigue viva."""
+        if self._connection is None:
+            return True
+        try:
+            self._connection.execute(text("SELECT 1"))
+            self._connection.commit()
+            return True
+        except Exception:
+            logging.warning("Planificador: se perdió la conexión del lock de líder.", exc_info=True)
+            return False
+
+    def release(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEDULER_LOCK_KEY})
+            self._connection.commit()
+        except Exception:
+            # Conexión rota: PostgreSQL ya soltó el lock al cerrarse la sesión
+            self._connection.invalidate()
+        finally:
+            self._connection.close()
+            self._connection = None
+
+class DueTimeScheduler:
+    """
+    Materializa las tareas programadas (`task_schedules`) justo a tiempo.
+
+    Los vencimientos se mantienen en un heap en memoria, así que cada
+    disparo cuesta O(log n) y nunca se recorre la tabla de tareas. El heap
+    se carga completo al arrancar y después solo se piden las filas con
+    `updated_at` reciente (o se despierta con `wake` cuando task_service
+    avisa de un cambio). Las entradas obsoletas no se borran del heap: se
+    descartan al salir si ya no coinciden con `_due`.
+
+    El estado real vive en la BD: al disparar, `next_run_at` se avanza con
+    una actualización condicional sobre el valor esperado, en la misma
+    transacción que inserta la tarea 'pending'; y como `next_run_at` solo
+    avanza cuando se creó la ejecución, un reinicio no pierde disparos: los
+    vencidos se ejecutan al volver a cargar.
+
+    Cada proceso de workers arranca uno, pero solo el líder (ver
+    `_Leadership`) carga el heap y dispara; el resto espera su turno sin
+    consultar la tabla. Durante un relevo dos planificadores pueden
+    solaparse un instante: la actualización condicional hace que solo uno
+    gane cada vencimiento.
+    """
+
+    def __init__(self, session_factory=SessionLocal, engine=default_engine):
+        self.session_factory = session_factory
+        self.leadership = _Leadership(engine)
+        self._heap = []       # (timestamp, schedule_id, next_run_at)
+        self._due = {}        # schedule_id -> next_run_at (UTC) según la BD
+        self._watermark = None
+        self._wake = threading.Event()
+
+    def wake(self):
+        """Fuerza una recarga de cambios (p. ej. al recibir un aviso de task_service)."""
+        self._wake.set()
+
+    def _track(self, schedule_id: int, next_run_at: datetime):
+        next_run_at = _utc(next_run_at)
+        if self._due.get(schedule_id) == next_run_at:
+            return
+        self._due[schedule_id] = next_run_at
+        heapq.heappush(self._heap, (next_run_at.timestamp(), schedule_id, next_run_at))
+
+    def _advance_watermark(self, updated_at: Optional[datetime]):
+        if updated_at is not None and (self._watermark is None or _utc(updated_at) > self._watermark):
+            self._watermark = _utc(updated_at)
+
+    def load(self):
+        """Carga todas las programaciones activas."""
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(models.TaskSchedule.id, models.TaskSchedule.next_run_at, models.TaskSchedule.updated_at)
+                .where(models.TaskSchedule.enabled.is_(True))
+            ).all()
+        finally:
+            db.close()
+        self._due = {schedule_id: _utc(next_run_at) for schedule_id, next_run_at, _ in rows}
+        self._heap = [(next_run_at.timestamp(), schedule_id, next_run_at) for schedule_id, next_run_at in self._due.items()]
+        heapq.heapify(self._heap)
+        for _, _, updated_at in rows:
+            self._advance_watermark(updated_at)
+        logging.info(f"Planificador: {len(self._due)} programaciones cargadas.")
+
+    def refresh(self):
+        """Incorpora las programaciones creadas, editadas o desactivadas desde la última carga."""
+        query = select(
+            models.TaskSchedule.id, models.TaskSchedule.next_run_at,
+            models.TaskSchedule.enabled, models.TaskSchedule.updated_at,
+        )
+        if self._watermark is not None:
+            query = query.where(models.TaskSchedule.updated_at >= self._watermark - _REFRESH_OVERLAP)
+        db = self.session_factory()
+        try:
+            rows = db.execute(query).all()
+        finally:
+            db.close()
+        for schedule_id, next_run_at, enabled, updated_at in rows:
+            if enabled:
+                self._track(schedule_id, next_run_at)
+            else:
+                self._due.pop(schedule_id, None)
+            self._advance_watermark(updated_at)
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - now.timestamp())
+
+    def fire_due(self, now: datetime) -> int:
+        """Materializa todas las programaciones vencidas. Devuelve cuántas ejecuciones se crearon."""
+        fired = 0
+        while self._heap and self._heap[0][0] <= now.timestamp():
+            _, schedule_id, next_run_at = heapq.heappop(self._heap)
+            if self._due.get(schedule_id) != next_run_at:
+                continue  # entrada obsoleta
+            try:
+                fired += self._fire(schedule_id, next_run_at, now)
+            except Exception:
+                logging.error(f"ERROR al materializar la programación {schedule_id}", exc_info=True)
+                retry_at = now.timestamp() + _FIRE_RETRY_SECONDS
+                heapq.heappush(self._heap, (retry_at, schedule_id, next_run_at))
+        return fired
+
+    def _fire(self, schedule_id: int, due: datetime, now: datetime) -> int:
+        db = self.session_factory()
+        try:
+            schedule = db.get(models.TaskSchedule, schedule_id)
+            if schedule is None or not schedule.enabled:
+                self._due.pop(schedule_id, None)
+                return 0
+            if _utc(schedule.next_run_at) != due:
+                # Otra réplica ya la disparó, o se editó: seguimos el valor actual
+                self._track(schedule_id, schedule.next_run_at)
+                return 0
+
+            template = db.get(models.Task, schedule.task_id)
+            if template is None:
+                schedule.enabled = False
+                db.commit()
+                self._due.pop(schedule_id, None)
+                logging.warning(f"Programación {schedule_id} desactivada: su tarea {schedule.task_id} ya no existe.")
+                return 0
+
+            next_run_at = compute_next_run(schedule.cron, schedule.interval_seconds, due, now)
+            claimed = db.execute(
+                update(models.TaskSchedule)
+                .where(models.TaskSchedule.id == schedule_id, models.TaskSchedule.next_run_at == due)
+                .values(next_run_at=next_run_at, last_run_at=due)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not claimed:
+                db.rollback()
+                current = db.get(models.TaskSchedule, schedule_id, populate_existing=True)
+                if current is not None and current.enabled:
+                    self._track(schedule_id, current.next_run_at)
+                return 0
+
+            run = models.Task(
+                account_id=template.account_id,
+                type=template.type,
+                config_json=template.config_json,
+                priority=template.priority,
+                status="pending",
+                schedule_id=schedule_id,
+            )
+            db.add(run)
+            db.flush()
+            notify_new_task(db, run.id)
+            db.commit()
+            logging.info(f"Programación {schedule_id}: creada la tarea {run.id}. Próxima ejecución: {next_run_at}.")
+            self._track(schedule_id, next_run_at)
+            return 1
+        finally:
+            db.close()
+
+    def run(self, stop_event: threading.Event):
+        while not stop_event.is_set():
+            try:
+                leader = self.leadership.acquire()
+            except Exception:
+                logging.error("ERROR al intentar tomar el liderazgo del planificador", exc_info=True)
+                leader = False
+            if not leader:
+                stop_event.wait(SCHEDULER_LEADER_RETRY_SECONDS)
+                continue
+            logging.info("Planificador: este proceso es el líder.")
+            try:
+                self._run_as_leader(stop_event)
+            except Exception:
+                logging.error("ERROR en el planificador líder; se cede el liderazgo", exc_info=True)
+                stop_event.wait(_FIRE_RETRY_SECONDS)
+            finally:
+                self.leadership.release()
+
+    def _run_as_leader(self, stop_event: threading.Event):
+        self.load()
+        next_refresh = datetime.now(timezone.utc) + timedelta(seconds=SCHEDULER_REFRESH_SECONDS)
+        while not stop_event.is_set():
+            try:
+                now = datetime.now(timezone.utc)
+                if self._wake.is_set() or now >= next_refresh:
+                    self._wake.clear()
+                    if not self.leadership.alive():
+                        return
+                    self.refresh()
+                    next_refresh = now + timedelta(seconds=SCHEDULER_REFRESH_SECONDS)
+                self.fire_due(now)
+                timeout = (next_refresh - now).total_seconds()
+                until_next = self.seconds_until_next(datetime.now(timezone.utc))
+                if until_next is not None:
+                    timeout = min(timeout, until_next)
+            except Exception:
+                logging.error("ERROR en el bucle del planificador", exc_info=True)
+                timeout = _FIRE_RETRY_SECONDS
+            self._wake.wait(max(0.0, timeout))
@@ -0,0 +1,88 @@
+# en executor_service/app/executor/task_client.py
+import threading
+from typing import List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+from ..config import (
+    TASK_SERVICE_URL, TASK_SERVICE_POOL_SIZE, TASK_SERVICE_CONNECT_TIMEOUT,
+    TASK_SERVICE_READ_TIMEOUT, TASK_SERVICE_RETRIES,
+)
+
+class RetryBudget:
+    """
+    Limita los reintentos a una fracción de las peticiones (`ratio`), con
+    un pequeño saldo inicial. Si task_service está caído, los reintentos
+    no multiplican la carga: se agotan y las peticiones fallan enseguida.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+retry_budget = RetryBudget()
+
+class BudgetedRetry(Retry):
+    """`Retry` de urllib3 que además consume saldo del `RetryBudget` en cada reintento."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if not retry_budget.withdraw():
+            raise MaxRetryError(_pool, url, error or ResponseError("presupuesto de reintentos agotado"))
+        return new_retry
+
+def _build_session() -> requests.Session:
+    retries = BudgetedRetry(
+        total=TASK_SERVICE_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=TASK_SERVICE_POOL_SIZE, max_retries=retries)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Una sola sesión por proceso: las conexiones keep-alive se reutilizan entre peticiones
+_session = _build_session()
+
+def get_tasks(token: str, account_id: Optional[int] = None, status: Optional[List[str]] = None,
+              task_type: Optional[str] = None, fields: Optional[List[str]] = None) -> list:
+    """
+    Tareas del usuario del token, filtradas en task_service. Con `fields`
+    solo viajan esas columnas.
+    """
+    params = {}
+    if account_id is not None:
+        params["account_id"] = account_id
+    if status:
+        params["status"] = status
+    if task_type:
+        params["type"] = task_type
+    if fields:
+        params["fields"] = ",".join(fields)
+    retry_budget.deposit()
+    resp = _session.get(
+        f"{TASK_SERVICE_URL}/tasks/",
+        params=params,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=(TASK_SERVICE_CONNECT_TIMEOUT, TASK_SERVICE_READ_TIMEOUT),
+    )
+    resp.raise_for_status()
+    return resp.json()
@@ -0,0 +1,91 @@
+# en executor_service/app/executor/task_context.py
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+class TaskCancelled(Exception):
+    """La tarea fue cancelada (timeout o lease perdido) mientras se ejecutaba."""
+
+class TaskContext:
+    """
+    Estado de la tarea en ejecución que el worker comparte con el plugin:
+    el plazo máximo y la señal de cancelación.
+
+    Python no puede matar un hilo, así que la cancelación es cooperativa:
+    `heartbeat()` lanza `TaskCancelled` si el worker canceló la tarea, y
+    cada petición a Reddit lo comprueba antes de salir (ver
+    `RateLimitedRequestor`), de modo que un plugin cancelado se detiene en
+    su siguiente llamada a la API. Los plugins async, además, se cancelan
+    directamente con `asyncio`.
+    """
+
+    def __init__(self, task_id: int, task_type: str, timeout: float):
+        self.task_id = task_id
+        self.task_type = task_type
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + timeout
+        self._cancelled = threading.Event()
+        self.cancel_reason = None
+
+    def cancel(self, reason: str):
+        self.cancel_reason = reason
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def heartbeat(self):
+        """Punto de cancelación: los plugins largos lo llaman periódicamente y corta si hubo cancelación."""
+        if self._cancelled.is_set():
+            raise TaskCancelled(f"Tarea {self.task_id} cancelada: {self.cancel_reason}")
+
+    def sleep(self, seconds: float):
+        """Espera como `time.sleep`, pero despierta y corta en cuanto se cancela la tarea."""
+        if self._cancelled.wait(max(0.0, seconds)):
+            raise TaskCancelled(f"Tarea {self.task_id} cancelada: {self.cancel_reason}")
+
+# Una ContextVar sirve tanto para hilos (cada hilo empieza sin contexto) como para
+# las tareas de asyncio que comparten hilo (cada una copia el suyo al crearse).
+_current = ContextVar("task_context", default=None)
+
+def current() -> Optional[TaskContext]:
+    """Contexto de la tarea que se ejecuta en este hilo (o tarea de asyncio), si lo hay."""
+    return _current.get()
+
+@contextmanager
+def bind(context: Optional[TaskContext]):
+    """Asocia el contexto al hilo actual (p. ej. en los hilos auxiliares de un plugin)."""
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+def heartbeat():
+    """Atajo para los plugins: `task_context.heartbeat()` sin tener el contexto a mano."""
+    context = current()
+    if context is not None:
+        context.heartbeat()
+
+def sleep(seconds: float):
+    """Espera cancelable desde los plugins (sin tarea en curso, un `time.sleep` normal)."""
+    context = current()
+    if context is not None:
+        context.sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+class TaskTimeout(TaskCancelled):
+    """El plugin superó el tiempo máximo de su tipo de tarea."""
+
+class TaskAbandoned(TaskTimeout):
+    """
+    El plugin superó su plazo y tampoco se detuvo tras cancelarlo: su hilo
+    puede seguir actuando en Reddit, así que la tarea no se reintenta.
+    """
+
+class LeaseLost(TaskCancelled):
+    """El lease de la tarea venció y otro worker pudo reclamarla."""
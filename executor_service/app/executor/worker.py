@@ -1,72 +1,678 @@
+import os
+import json
 import time
+import random
+import asyncio
+import socket
 import logging
+import threading
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import func, or_, select, update
 from sqlalchemy.orm import Session
 from ..database import SessionLocal, engine
 from .. import models
+from ..config import (
+    WORKER_CONCURRENCY, WORKER_POOL_MODE, WORKER_IDLE_SECONDS, WORKER_BATCH_SIZE, ACCOUNT_NOTIFY_CHANNEL,
+    WORKER_BATCH_MAX_SECONDS,
+    TASK_LEASE_SECONDS, TASK_HEARTBEAT_SECONDS, TASK_REAPER_INTERVAL, TASK_CANCEL_GRACE_SECONDS,
+    TASK_MAX_ATTEMPTS, TASK_RETRY_BASE_SECONDS, TASK_RETRY_MAX_SECONDS,
+    SCHEDULER_ENABLED, SCHEDULE_NOTIFY_CHANNEL, TASK_URGENT_PRIORITY, WORKER_URGENT_SLOTS, METRICS_PORT,
+)
 from .kernel import Kernel
-from .reddit_bot import get_reddit_instance
+from .plugin_interface import AsyncPluginInterface
+from .notifier import TaskNotifier, notify_new_task
+from .reddit_bot import client_cache, reddit_session
+from .scheduler import DueTimeScheduler
+from .fair_queue import batch_candidates, candidate_tasks, charge
+from .log_writer import get_log_writer
+from . import log_storage
+from .metrics import (
+    CLAIM_SECONDS, QUEUE_WAIT_SECONDS, TASKS_FINISHED, process_exited, reset_multiprocess_dir,
+    start_metrics_server, time_plugin,
+)
+from .errors import AuthenticationError, is_auth_error, is_transient_error, retry_after_seconds
+from . import task_context
+from .task_context import TaskContext, TaskTimeout, TaskAbandoned, LeaseLost
 
 # Configuración del Logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s')
 
 # --- Funciones de Lógica del Worker ---
 
-def get_pending_task(db: Session):
-    """Busca en la BD una tarea pendiente y la marca como 'running'."""
-    task = db.query(models.Task).filter(models.Task.status == "pending").first()
-    if task:
-        logging.info(f"Tarea encontrada: ID={task.id}, Tipo={task.type}")
-        task.status = "running"
+def _worker_id() -> str:
+    """Identifica al worker que tiene el lease (máquina, proceso e hilo)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+def _lease_deadline() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=TASK_LEASE_SECONDS)
+
+def claim_pending_tasks(db: Session, worker_id: str, limit: int = 1,
+                        min_priority: Optional[int] = None) -> List[models.Task]:
+    """
+    Reclama atómicamente un lote de hasta `limit` tareas pendientes cuyo
+    `run_at` ya llegó: las marca como 'running', cuenta el intento y les
+    asigna un lease de `TASK_LEASE_SECONDS` a nombre de `worker_id`.
+
+    El orden lo decide `fair_queue` (prioridad y reparto justo entre
+    usuarios y cuentas). En PostgreSQL la primera tarea se reclama con
+    `UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED)`: si otro
+    worker (hilo, proceso o réplica) ya la tiene bloqueada o la tomó, no
+    afecta filas y se prueba la siguiente candidata sin esperar a que su
+    transacción termine. En SQLite (sin bloqueos de fila) basta el `UPDATE`
+    condicional sobre `status`. El resto del lote se reclama igual con un
+    único `UPDATE ... WHERE id IN (...)`; las que otro worker tomó o tiene
+    bloqueadas simplemente no entran. El cobro en los relojes del reparto va
+    en la misma transacción que el reclamo.
+    Con `min_priority` solo se consideran tareas de ese nivel o superior.
+
+    Todas las tareas del lote son de la misma cuenta, en el orden en que
+    se ejecutarán.
+    """
+    start = time.perf_counter()
+    tasks = _claim(db, worker_id, limit, min_priority)
+    CLAIM_SECONDS.labels(result="claimed" if tasks else "empty").observe(time.perf_counter() - start)
+    now = datetime.now(timezone.utc)
+    for task in tasks:
+        # Espera en la cola desde que la tarea pudo ejecutarse (creación o reintento programado)
+        due = task.run_at or task.created_at
+        if due is not None:
+            if due.tzinfo is None:
+                due = due.replace(tzinfo=timezone.utc)
+            QUEUE_WAIT_SECONDS.labels(task_type=task.type).observe(max(0.0, (now - due).total_seconds()))
+    return tasks
+
+def claim_pending_task(db: Session, worker_id: str, min_priority: Optional[int] = None) -> Optional[models.Task]:
+    """Reclama una sola tarea (ver `claim_pending_tasks`)."""
+    tasks = claim_pending_tasks(db, worker_id, 1, min_priority)
+    return tasks[0] if tasks else None
+
+def _pending_ids(db: Session, ids: Sequence[int]):
+    """
+    Condición sobre `Task.id` para reclamar las tareas `ids` que sigan
+    pendientes. En PostgreSQL salta las filas bloqueadas por otro reclamo en
+    curso (`SKIP LOCKED`) en lugar de esperar a que se confirme; en SQLite la
+    escritura ya es exclusiva y basta con filtrar por `status`.
+    """
+    pending = select(models.Task.id).where(models.Task.id.in_(ids), models.Task.status == "pending")
+    if db.get_bind().dialect.name == "postgresql":
+        return models.Task.id.in_(pending.with_for_update(skip_locked=True))
+    return models.Task.id.in_(pending)
+
+def _claim(db: Session, worker_id: str, limit: int, min_priority: Optional[int]) -> List[models.Task]:
+    lease = dict(
+        status="running",
+        leased_by=worker_id,
+        lease_expires_at=_lease_deadline(),
+        attempts=models.Task.attempts + 1,
+    )
+    for _ in range(3):
+        candidates = candidate_tasks(db, min_priority)
+        if not candidates:
+            db.commit()
+            return []
+        for candidate in candidates:
+            claimed = db.execute(
+                update(models.Task)
+                .where(_pending_ids(db, [candidate]), models.Task.status == "pending")
+                .values(**lease)
+                .returning(models.Task.account_id, models.Task.priority)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if claimed is None:
+                continue
+            claimed_ids = [candidate]
+            charged = [claimed.account_id]
+            extra_ids = batch_candidates(db, claimed.account_id, claimed.priority, limit - 1)
+            if extra_ids:
+                extra = db.execute(
+                    update(models.Task)
+                    .where(_pending_ids(db, extra_ids), models.Task.status == "pending")
+                    .values(**lease)
+                    .returning(models.Task.id)
+                    .execution_options(synchronize_session=False)
+                ).scalars().all()
+                claimed_ids += extra
+                charged += [claimed.account_id] * len(extra)
+            charge(db, charged)
+            db.commit()
+
+            tasks = db.execute(select(models.Task).where(models.Task.id.in_(claimed_ids))).scalars().all()
+            order = {task_id: i for i, task_id in enumerate([candidate] + extra_ids)}
+            tasks.sort(key=lambda task: order[task.id])
+            for task in tasks:
+                logging.info(f"Tarea reclamada: ID={task.id}, Tipo={task.type}, Prioridad={task.priority}")
+            return tasks
+        # Todas las candidatas las tomaron otros workers: se vuelve a consultar
         db.commit()
-        db.refresh(task)
-        return task
-    return None
+    return []
+
+def renew_lease(db: Session, task_id: int, worker_id: str, waiting: Sequence[int] = ()) -> bool:
+    """
+    Extiende el lease de una tarea propia y, de paso, el de las tareas del
+    mismo lote que esperan turno (`waiting`). False si la tarea ya no nos
+    pertenece.
+    """
+    renewed = db.execute(
+        update(models.Task)
+        .where(
+            models.Task.id.in_([task_id, *waiting]),
+            models.Task.status == "running",
+            models.Task.leased_by == worker_id,
+        )
+        .values(lease_expires_at=_lease_deadline())
+        .returning(models.Task.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    return task_id in renewed
+
+def release_tasks(db: Session, task_ids: Sequence[int], worker_id: str) -> int:
+    """
+    Devuelve a la cola tareas reclamadas que no llegaron a ejecutarse (p. ej.
+    el resto de un lote cuando el worker falla). No cuentan como intento.
+    """
+    released = db.execute(
+        update(models.Task)
+        .where(
+            models.Task.id.in_(task_ids),
+            models.Task.status == "running",
+            models.Task.leased_by == worker_id,
+        )
+        .values(status="pending", leased_by=None, lease_expires_at=None, attempts=models.Task.attempts - 1)
+        .returning(models.Task.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    for task_id in released:
+        notify_new_task(db, task_id)
+    db.commit()
+    return len(released)
+
+def finish_task(db: Session, task_id: int, worker_id: str, status: str, **values) -> bool:
+    """
+    Deja la tarea en `status` (y los campos extra de `values`) y libera el
+    lease, solo si seguimos siendo sus dueños: si el lease venció y otro
+    worker la reclamó, no se pisa su trabajo.
+    """
+    result = db.execute(
+        update(models.Task)
+        .where(models.Task.id == task_id, models.Task.status == "running", models.Task.leased_by == worker_id)
+        .values(status=status, leased_by=None, lease_expires_at=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+def retry_delay(attempts: int, exc: BaseException) -> float:
+    """
+    Espera antes del siguiente intento: backoff exponencial con jitter,
+    acotado por `TASK_RETRY_MAX_SECONDS`, y nunca menor que el Retry-After
+    que haya pedido Reddit.
+    """
+    delay = min(TASK_RETRY_MAX_SECONDS, TASK_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    delay *= random.uniform(0.5, 1.5)
+    return max(delay, retry_after_seconds(exc) or 0)
+
+def fail_task(db: Session, task_id: int, worker_id: str, attempts: int, exc: BaseException) -> str:
+    """
+    Registra el fallo de un intento y decide el siguiente estado:
+    - error transitorio con intentos disponibles: vuelve a 'pending' con `run_at` diferido;
+    - error transitorio sin intentos: 'dead' (cola de tareas muertas, para revisión manual);
+    - error permanente: 'failed'.
+    """
+    error = f"{type(exc).__name__}: {exc}"[:1000]
+    if not is_transient_error(exc):
+        status, values = "failed", {}
+    elif attempts < TASK_MAX_ATTEMPTS:
+        delay = retry_delay(attempts, exc)
+        status, values = "pending", {"run_at": datetime.now(timezone.utc) + timedelta(seconds=delay)}
+        logging.warning(f"Tarea {task_id}: error transitorio en el intento {attempts}. Reintento en {delay:.0f}s.")
+    else:
+        status, values = "dead", {}
+        logging.error(f"Tarea {task_id}: agotó sus {attempts} intentos. Pasa a 'dead'.")
+    finish_task(db, task_id, worker_id, status, last_error=error, **values)
+    return status
 
-def get_account_for_task(db: Session, task: models.Task): # <--- AQUÍ ESTABA EL ERROR
+def requeue_expired_leases(db: Session) -> int:
+    """
+    Devuelve a 'pending' las tareas 'running' cuyo lease venció (el worker
+    murió o se quedó colgado sin renovarlo). Las que no tienen lease se
+    reclamaron antes de existir los leases y también se recuperan. Una tarea
+    que ya agotó sus intentos (p. ej. porque tumba al worker cada vez) pasa
+    a 'dead' en lugar de volver a la cola.
+    """
+    expired = (
+        models.Task.status == "running",
+        or_(models.Task.lease_expires_at.is_(None), models.Task.lease_expires_at < datetime.now(timezone.utc)),
+    )
+    dead = db.execute(
+        update(models.Task)
+        .where(*expired, models.Task.attempts >= TASK_MAX_ATTEMPTS)
+        .values(status="dead", leased_by=None, lease_expires_at=None, last_error="Lease vencido")
+        .returning(models.Task.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    requeued = db.execute(
+        update(models.Task)
+        .where(*expired)
+        .values(status="pending", leased_by=None, lease_expires_at=None, run_at=None, last_error="Lease vencido")
+        .returning(models.Task.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    for task_id in requeued:
+        notify_new_task(db, task_id)
+    db.commit()
+    if dead:
+        logging.error(f"Leases vencidos sin intentos restantes: {len(dead)} tarea(s) pasan a 'dead': {dead}")
+    if requeued:
+        logging.warning(f"Leases vencidos: {len(requeued)} tarea(s) devueltas a la cola: {requeued}")
+    return len(requeued)
+
+def seconds_until_next_task(db: Session) -> Optional[float]:
+    """Segundos hasta el próximo reintento programado, o None si no hay ninguno."""
+    next_run = db.execute(
+        select(func.min(models.Task.run_at)).where(
+            models.Task.status == "pending",
+            models.Task.run_at > datetime.now(timezone.utc),
+        )
+    ).scalar()
+    if next_run is None:
+        return None
+    if next_run.tzinfo is None:
+        # SQLite no guarda la zona horaria: los valores se escribieron en UTC
+        next_run = next_run.replace(tzinfo=timezone.utc)
+    return max(0.0, (next_run - datetime.now(timezone.utc)).total_seconds())
+
+def get_account_for_task(db: Session, task: models.Task):
     """Obtiene la cuenta asociada a una tarea."""
     account = db.query(models.Account).filter(models.Account.id == task.account_id).first()
     if not account:
         raise Exception(f"No se encontró la cuenta con ID {task.account_id}")
     return account
 
-def main_loop():
-    logging.info("Iniciando worker del executor_service...")
-    kernel = Kernel()
+def load_accounts(db: Session, account_ids) -> Dict[int, models.Account]:
+    """
+    Carga las cuentas de un lote con una sola consulta. Quedan desligadas
+    de la sesión: los plugins las usan desde otros hilos.
+    """
+    accounts = db.query(models.Account).filter(models.Account.id.in_(set(account_ids))).all()
+    for account in accounts:
+        db.expunge(account)
+    return {account.id: account for account in accounts}
 
-    while True:
-        db = SessionLocal()
-        task = None
-        try:
-            task = get_pending_task(db)
-            if task:
-                account = get_account_for_task(db, task)
-                plugin = kernel.get_plugin(task.type)
-                reddit = get_reddit_instance(account.token)
-                plugin.execute(
+def _mark_account_invalid(db: Session, account_id: int):
+    """Deja constancia de que el token fue rechazado, para que otras tareas no lo intenten."""
+    db.query(models.Account).filter(models.Account.id == account_id).update(
+        {"health_status": "invalid", "last_checked_at": datetime.now(timezone.utc)},
+        synchronize_session=False,
+    )
+
+def _execute_plugin(plugin, task_config, account, context: TaskContext, outcome: dict):
+    """Cuerpo del hilo que ejecuta el plugin, con su propia sesión de BD."""
+    db = SessionLocal()
+    try:
+        if isinstance(plugin, AsyncPluginInterface):
+            # Plugin async en un worker de hilos: corre en un event loop propio
+            outcome["result"] = asyncio.run(_execute_async_plugin(db, plugin, task_config, account, context))
+        else:
+            with task_context.bind(context), reddit_session(account) as reddit, \
+                    time_plugin(plugin.task_type):
+                outcome["result"] = plugin.execute(
+                    db_session=db,
+                    reddit_instance=reddit,
+                    task_config=task_config,
+                    account=account
+                )
+    except BaseException as e:
+        outcome["error"] = e
+    finally:
+        db.close()
+
+async def _execute_async_plugin(db: Session, plugin, task_config, account, context: TaskContext, clients=None):
+    from .async_reddit import async_reddit_session
+    with task_context.bind(context):
+        async with async_reddit_session(account, clients) as reddit:
+            with time_plugin(plugin.task_type):
+                return await plugin.execute(
                     db_session=db,
                     reddit_instance=reddit,
-                    task_config=task.config_json,
+                    task_config=task_config,
                     account=account
                 )
-                task.status = "completed"
-                logging.info(f"Tarea {task.id} completada por el plugin '{plugin.task_type}'.")
-            else:
-                logging.info("No hay tareas pendientes. Durmiendo por 60 segundos...")
-                time.sleep(60)
-        except Exception as e:
-            logging.error(f"ERROR al procesar la tarea ID={task.id if task else 'N/A'}", exc_info=True)
-            if task:
-                task.status = "failed"
+
+def run_with_lease(db: Session, task_id: int, worker_id: str, plugin, task_config, account, context: TaskContext,
+                   waiting: Sequence[int] = ()):
+    """
+    Ejecuta el plugin en un hilo aparte mientras este renueva el lease cada
+    `TASK_HEARTBEAT_SECONDS`, también el de las tareas del lote en
+    `waiting`; si la tarea pasa de `WORKER_BATCH_MAX_SECONDS`, esas se
+    devuelven a la cola y `waiting` queda vacía. Si el plugin supera su
+    plazo se cancela y se espera a que su hilo termine (hasta
+    `TASK_CANCEL_GRACE_SECONDS`, sin soltar el lease): solo entonces la
+    tarea puede reintentarse sin que dos ejecuciones actúen a la vez. Si el
+    hilo no se detiene, la tarea falla sin reintento (`TaskAbandoned`). Si
+    el lease se perdió, otro worker ya puede tenerla: se cancela y se sale
+    sin esperar.
+    """
+    outcome = {}
+    thread = threading.Thread(
+        target=_execute_plugin,
+        args=(plugin, task_config, account, context, outcome),
+        name=f"{threading.current_thread().name}-task-{task_id}",
+        daemon=True,
+    )
+    thread.start()
+    while True:
+        remaining = context.deadline - time.monotonic()
+        thread.join(max(0, min(TASK_HEARTBEAT_SECONDS, remaining)))
+        if not thread.is_alive():
+            break
+        if time.monotonic() >= context.deadline:
+            context.cancel("timeout")
+            if _join_cancelled(db, thread, task_id, worker_id, waiting):
+                raise TaskTimeout(f"La tarea {task_id} superó su tiempo máximo de ejecución.")
+            raise TaskAbandoned(
+                f"La tarea {task_id} superó su tiempo máximo y el plugin no se detuvo tras "
+                f"{TASK_CANCEL_GRACE_SECONDS:.0f}s: no se reintenta."
+            )
+        if waiting and time.monotonic() - context.started_at >= WORKER_BATCH_MAX_SECONDS:
+            released = release_tasks(db, waiting, worker_id)
+            waiting.clear()
+            logging.info(f"{released} tarea(s) del lote devueltas a la cola: la tarea {task_id} se alarga.")
+        if not renew_lease(db, task_id, worker_id, waiting):
+            context.cancel("lease perdido")
+            raise LeaseLost(f"El lease de la tarea {task_id} ya no pertenece a {worker_id}.")
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+def _join_cancelled(db: Session, thread: threading.Thread, task_id: int, worker_id: str,
+                    waiting: Sequence[int]) -> bool:
+    """Espera a que el hilo de un plugin cancelado termine, renovando el lease mientras tanto."""
+    grace_deadline = time.monotonic() + TASK_CANCEL_GRACE_SECONDS
+    while thread.is_alive():
+        remaining = grace_deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        thread.join(min(TASK_HEARTBEAT_SECONDS, remaining))
+        if thread.is_alive() and not renew_lease(db, task_id, worker_id, waiting):
+            return False
+    return True
+
+def prepare_task(kernel: Kernel, db: Session, task: models.Task, account: Optional[models.Account] = None):
+    """
+    Resuelve lo necesario para ejecutar una tarea reclamada. Devuelve
+    (plugin, cuenta, configuración, contexto); la cuenta queda desligada de
+    la sesión porque el plugin la usa desde otro hilo o tarea de asyncio.
+    Si se pasa `account` (ya cargada con `load_accounts`), no se consulta.
+    """
+    if account is None:
+        account = get_account_for_task(db, task)
+        db.expunge(account)
+    if account.health_status == "invalid":
+        # La validación ya detectó credenciales rechazadas: ni siquiera intentamos conectar
+        raise AuthenticationError(f"La cuenta {account.id} está marcada como inválida.")
+    plugin = kernel.get_plugin(task.type)
+    context = TaskContext(task.id, task.type, plugin.get_timeout(task.config_json))
+    task_config = task.config_json
+    # Se libera la conexión mientras corre el plugin
+    db.commit()
+    return plugin, account, task_config, context
+
+def complete_task(db: Session, task_id: int, worker_id: str, plugin, result, account: models.Account):
+    if finish_task(db, task_id, worker_id, "completed"):
+        TASKS_FINISHED.labels(task_type=plugin.task_type, status="completed").inc()
+        logging.info(f"Tarea {task_id} completada por el plugin '{plugin.task_type}'.")
+        get_log_writer().write(
+            user_id=account.user_id,
+            account_id=account.id,
+            task_id=task_id,
+            task_type=plugin.task_type,
+            status="success",
+            detail=result if isinstance(result, dict) or result is None else {"result": result},
+        )
+    if result:
+        logging.info(f"Resultado de la tarea {task_id}: {_summarize(result)}")
+    db.commit()
+
+def handle_task_error(db: Session, task: models.Task, worker_id: str, error: Exception,
+                      account: Optional[models.Account] = None):
+    """Registra el fallo de una tarea reclamada (reintento, 'failed' o 'dead')."""
+    db.rollback()
+    if isinstance(error, LeaseLost):
+        # Otro worker puede tenerla ya: no se toca su estado
+        logging.warning(str(error))
+        TASKS_FINISHED.labels(task_type=task.type, status="lease_lost").inc()
+        return
+    logging.error(f"ERROR al procesar la tarea ID={task.id}", exc_info=error)
+    status = fail_task(db, task.id, worker_id, task.attempts, error)
+    # 'pending' significa que se reintentará
+    status = "retry" if status == "pending" else status
+    TASKS_FINISHED.labels(task_type=task.type, status=status).inc()
+    if is_auth_error(error):
+        _mark_account_invalid(db, task.account_id)
+    user_id = account.user_id if account is not None else db.execute(
+        select(models.Account.user_id).where(models.Account.id == task.account_id)
+    ).scalar()
+    db.commit()
+    if user_id is not None:
+        get_log_writer().write(
+            user_id=user_id,
+            account_id=task.account_id,
+            task_id=task.id,
+            task_type=task.type,
+            status=status,
+            detail={"error": f"{type(error).__name__}: {error}"[:1000], "attempt": task.attempts},
+        )
+
+def process_claimed_task(kernel: Kernel, db: Session, task: models.Task, worker_id: str,
+                         account: Optional[models.Account] = None, waiting: Sequence[int] = ()):
+    """Ejecuta una tarea ya reclamada y deja registrado su resultado."""
+    task_id = task.id
+    try:
+        plugin, account, task_config, context = prepare_task(kernel, db, task, account)
+        result = run_with_lease(db, task_id, worker_id, plugin, task_config, account, context, waiting)
+        complete_task(db, task_id, worker_id, plugin, result, account)
+    except Exception as e:
+        if account is not None and is_auth_error(e):
+            # Las siguientes tareas del lote con esta cuenta ya no intentan conectar
+            account.health_status = "invalid"
+        handle_task_error(db, task, worker_id, e, account)
+
+def process_batch(kernel: Kernel, db: Session, tasks: List[models.Task], worker_id: str):
+    """
+    Ejecuta un lote reclamado con `claim_pending_tasks` (todas las tareas
+    de una misma cuenta): corren seguidas y reutilizan el cliente
+    autenticado que la caché les devuelve. Antes de cada tarea se confirma
+    que su lease sigue siendo nuestro. Las que llevan más de
+    `WORKER_BATCH_MAX_SECONDS` esperando turno, o todas si el worker falla
+    a mitad de lote, vuelven a la cola para otros workers.
+    """
+    accounts = load_accounts(db, (task.account_id for task in tasks))
+    by_id = {task.id: task for task in tasks}
+    waiting = [task.id for task in tasks]
+    batch_deadline = time.monotonic() + WORKER_BATCH_MAX_SECONDS
+    try:
+        while waiting:
+            if waiting[0] != tasks[0].id and time.monotonic() >= batch_deadline:
+                break
+            task = by_id[waiting.pop(0)]
+            if task is not tasks[0] and not renew_lease(db, task.id, worker_id):
+                logging.warning(f"El lease de la tarea {task.id} venció mientras esperaba en el lote. Se omite.")
+                continue
+            process_claimed_task(kernel, db, task, worker_id, accounts.get(task.account_id), waiting)
+    finally:
+        if waiting:
+            db.rollback()
+            try:
+                released = release_tasks(db, waiting, worker_id)
+                logging.warning(f"{released} tarea(s) del lote devueltas a la cola sin ejecutarse.")
+            except Exception:
+                logging.error("ERROR al devolver a la cola el resto del lote", exc_info=True)
+
+def process_next_task(kernel: Kernel, min_priority: Optional[int] = None) -> bool:
+    """
+    Reclama y ejecuta un lote de hasta `WORKER_BATCH_SIZE` tareas. Devuelve
+    False si no había tareas pendientes.
+    """
+    db = SessionLocal()
+    worker_id = _worker_id()
+    try:
+        tasks = claim_pending_tasks(db, worker_id, max(1, WORKER_BATCH_SIZE), min_priority)
+        if not tasks:
+            return False
+        process_batch(kernel, db, tasks, worker_id)
+    finally:
+        db.close()
+    return True
+
+def _summarize(result):
+    """Versión corta del resultado para el log (sin el detalle por comentario)."""
+    if not isinstance(result, dict):
+        return result
+    return {key: _summarize(value) for key, value in result.items() if key != "outcomes"}
+
+def idle_timeout() -> float:
+    """Cuánto esperar sin tareas: hasta el próximo reintento programado, como mucho `WORKER_IDLE_SECONDS`."""
+    db = SessionLocal()
+    try:
+        next_retry = seconds_until_next_task(db)
+    finally:
+        db.close()
+    return WORKER_IDLE_SECONDS if next_retry is None else min(WORKER_IDLE_SECONDS, next_retry)
+
+def run_worker(kernel: Kernel, notifier: TaskNotifier, stop_event: threading.Event,
+               min_priority: Optional[int] = None):
+    """
+    Bucle de un worker individual del pool. Cuando la cola está vacía espera
+    una notificación de tarea nueva o, como mucho, hasta el próximo
+    reintento programado; `WORKER_IDLE_SECONDS` queda solo como sondeo de
+    respaldo por si se pierde algún aviso. Un worker reservado
+    (`min_priority`) solo atiende tareas urgentes.
+    """
+    while not stop_event.is_set():
+        generation = notifier.generation
+        try:
+            if process_next_task(kernel, min_priority):
+                continue
+            timeout = idle_timeout()
+            logging.debug(f"No hay tareas pendientes. Esperando notificación (máx. {timeout:.0f}s)...")
+            notifier.wait(generation, timeout)
+        except Exception:
+            # Errores de infraestructura (p. ej. la BD no responde): no tumbar el worker.
+            logging.error("ERROR en el bucle del worker", exc_info=True)
+            stop_event.wait(1)
+
+def run_reaper(stop_event: threading.Event):
+    """
+    Recupera periódicamente las tareas con el lease vencido. Corre en cada
+    proceso de workers; la operación es idempotente, así que varias
+    réplicas pueden ejecutarla a la vez.
+    """
+    while True:
+        db = SessionLocal()
+        try:
+            requeue_expired_leases(db)
+        except Exception:
+            logging.error("ERROR al recuperar tareas con el lease vencido", exc_info=True)
         finally:
-            if task:
-                db.commit()
             db.close()
-            if not task:
-                time.sleep(1)
+        if stop_event.wait(TASK_REAPER_INTERVAL):
+            return
+
+def start_background(stop_event: threading.Event, on_account_changed=None) -> TaskNotifier:
+    """
+    Arranca los servicios compartidos por los workers de un proceso: el
+    listener de notificaciones, el planificador, el reaper de leases y el
+    mantenimiento de las particiones de logs.
+    `on_account_changed(account_id)` se suma a la invalidación de la caché
+    de clientes cuando account_service avisa de un cambio.
+    """
+    def account_changed(payload):
+        account_id = json.loads(payload)["account_id"]
+        client_cache.invalidate(account_id)
+        if on_account_changed:
+            on_account_changed(account_id)
+
+    notifier = TaskNotifier(engine)
+    notifier.subscribe(ACCOUNT_NOTIFY_CHANNEL, account_changed)
+    if SCHEDULER_ENABLED:
+        scheduler = DueTimeScheduler()
+        notifier.subscribe(SCHEDULE_NOTIFY_CHANNEL, lambda payload: scheduler.wake())
+        threading.Thread(target=scheduler.run, args=(stop_event,), name="scheduler", daemon=True).start()
+    notifier.start()
+    threading.Thread(target=run_reaper, args=(stop_event,), name="reaper", daemon=True).start()
+    threading.Thread(target=log_storage.run_maintenance, args=(stop_event,), name="log-maintenance", daemon=True).start()
+    return notifier
+
+def worker_lanes(size: int, urgent_slots: int) -> List[Optional[int]]:
+    """
+    `min_priority` de cada uno de los `size` workers del executor (hilos o
+    procesos): los primeros `urgent_slots` quedan reservados para tareas
+    urgentes, pero siempre queda al menos uno general.
+    """
+    urgent_slots = max(0, min(urgent_slots, size - 1))
+    return [TASK_URGENT_PRIORITY if i < urgent_slots else None for i in range(size)]
+
+def _run_thread_pool(kernel: Kernel, lanes: Sequence[Optional[int]]):
+    """Un worker (hilo) por elemento de `lanes`, con ese `min_priority` (ver `worker_lanes`)."""
+    stop_event = threading.Event()
+    notifier = start_background(stop_event)
+    threads = [
+        threading.Thread(
+            target=run_worker,
+            args=(kernel, notifier, stop_event, min_priority),
+            name=f"worker-urgent-{i}" if min_priority is not None else f"worker-{i}",
+            daemon=True,
+        )
+        for i, min_priority in enumerate(lanes)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        stop_event.set()
+        notifier.stop()
+        notifier.notify()
+
+def _process_main(min_priority: Optional[int] = None):
+    # Cada proceso hijo necesita sus propias conexiones: las heredadas del padre no se comparten.
+    engine.dispose(close=False)
+    # Las métricas del hijo van a PROMETHEUS_MULTIPROC_DIR: las sirve el padre
+    _run_thread_pool(Kernel(), [min_priority])
+
+def main_loop():
+    logging.info(
+        f"Iniciando worker del executor_service con {WORKER_CONCURRENCY} worker(s) en modo '{WORKER_POOL_MODE}'..."
+    )
+    if WORKER_POOL_MODE == "process" and WORKER_CONCURRENCY > 1:
+        reset_multiprocess_dir()
+    start_metrics_server(METRICS_PORT)
+    if WORKER_POOL_MODE == "async":
+        from .async_worker import run_async_engine
+        run_async_engine(Kernel())
+    elif WORKER_POOL_MODE == "process" and WORKER_CONCURRENCY > 1:
+        # El reparto de carriles se hace entre procesos: cada hijo es un único worker
+        processes = [
+            multiprocessing.Process(target=_process_main, args=(min_priority,), name=f"worker-{i}", daemon=True)
+            for i, min_priority in enumerate(worker_lanes(WORKER_CONCURRENCY, WORKER_URGENT_SLOTS))
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            process_exited(process.pid)
+    else:
+        _run_thread_pool(Kernel(), worker_lanes(max(1, WORKER_CONCURRENCY), WORKER_URGENT_SLOTS))
 
 # --- Punto de Entrada del Script ---
 
 if __name__ == "__main__":
-    from ..models import Base
-    Base.metadata.create_all(bind=engine)
-    main_loop()
\ No newline at end of file
+    from ..database import sync_schema
+    from ..config import SCHEMA_SYNC_ON_STARTUP
+    if SCHEMA_SYNC_ON_STARTUP:
+        sync_schema()
+    main_loop()
@@ -1,17 +1,40 @@
 
 
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Security
 from fastapi.security import HTTPBearer
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import Response
 from .executor import routes as executor_routes
-from .database import Base, engine
+from .executor import jobs as executor_jobs
+from .executor import metrics
+from .database import SessionLocal, sync_schema
 from .models import ExecutionLog
+from .config import SCHEMA_SYNC_ON_STARTUP
+
+def _expire_stale_jobs():
+	# Jobs que quedaron a medias si una réplica de la API cayó (ver `jobs.expire_stale_jobs`)
+	db = SessionLocal()
+	try:
+		executor_jobs.expire_stale_jobs(db)
+	except Exception:
+		logging.error("ERROR al revisar los jobs abandonados al arrancar", exc_info=True)
+	finally:
+		db.close()
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	# Se hace al arrancar el servidor, no al importar el módulo
+	if SCHEMA_SYNC_ON_STARTUP:
+		sync_schema()
+	_expire_stale_jobs()
+	yield
 
 security_scheme = HTTPBearer()
 
-app = FastAPI(title="Executor Service")
-from fastapi.middleware.cors import CORSMiddleware
+app = FastAPI(title="Executor Service", lifespan=lifespan)
 app.add_middleware(
 	CORSMiddleware,
 	allow_origins=["*"],
@@ -21,9 +44,13 @@ app.add_middleware(
 )
 app.include_router(executor_routes.router, prefix="/executor", tags=["Executor"])
 
+# Métricas en formato Prometheus (las de ejecución las expone cada worker en METRICS_PORT)
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+	return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # Agrega el esquema de seguridad global para Swagger UI
 app.openapi_schema = None
-from fastapi.openapi.utils import get_openapi
 def custom_openapi():
 	if app.openapi_schema:
 		return app.openapi_schema
@@ -1,6 +1,6 @@
 # executor_service/app/models.py
 
-from sqlalchemy import Column, Integer, String, JSON, DateTime, func
+from sqlalchemy import Column, Integer, String, JSON, Date, DateTime, Float, Boolean, Index, func, true
 from .database import Base
 
 # Copiado desde account_service/app/models.py
@@ -13,6 +13,9 @@ class Account(Base):
     handle = Column(String, nullable=False)
     token = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Resultado de la última validación: "active" | "invalid" | "error" (NULL = sin validar)
+    health_status = Column(String, nullable=True)
+    last_checked_at = Column(DateTime(timezone=True), nullable=True)
 
 # Copiado desde task_service/app/models.py
 class Task(Base):
@@ -23,4 +26,168 @@ class Task(Base):
     type = Column(String, nullable=False)
     config_json = Column(JSON, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    status = Column(String, default="pending", nullable=False)
\ No newline at end of file
+    status = Column(String, default="pending", nullable=False)
+    # Mayor = más urgente; las tareas se reclaman por prioridad y luego por reparto justo
+    priority = Column(Integer, nullable=False, default=0, server_default="0")
+    # Mientras está 'running': quién la ejecuta y hasta cuándo es válido su lease
+    leased_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # Reintentos: no se reclama antes de `run_at` (NULL = cuanto antes)
+    run_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(String, nullable=True)
+    # Programación que generó esta ejecución (NULL = tarea puntual)
+    schedule_id = Column(Integer, nullable=True, index=True)
+
+    __table_args__ = (
+        Index("ix_tasks_status_lease", "status", "lease_expires_at"),
+        Index("ix_tasks_status_run_at", "status", "run_at"),
+        # Primera tarea pendiente de cada cuenta para el reparto justo (ver `fair_queue.candidate_tasks`)
+        Index(
+            "ix_tasks_pending_account_head", "account_id", priority.desc(), "id",
+            postgresql_where=status == "pending", sqlite_where=status == "pending",
+        ),
+        # Copiado desde task_service: listado de tareas filtrado por cuenta
+        Index("ix_tasks_account_status", "account_id", "status"),
+    )
+
+# Copiado desde task_service/app/adapters/db/models.py
+class TaskSchedule(Base):
+    """
+    Programación recurrente de una tarea plantilla (status 'scheduled'): en
+    cada vencimiento se crea una tarea 'pending' con su misma configuración.
+    """
+    __tablename__ = "task_schedules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, nullable=False, unique=True)
+    cron = Column(String, nullable=True)               # p. ej. "*/15 * * * *" (UTC)
+    interval_seconds = Column(Integer, nullable=True)  # alternativa a cron
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    enabled = Column(Boolean, nullable=False, default=True, server_default=true())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_task_schedules_updated_at", "updated_at"),
+    )
+
+class FairShareClock(Base):
+    """
+    Tiempo virtual de cada usuario y cuenta para el reparto justo de la cola
+    (start-time fair queuing). `scope` es "user", "account" o "system".
+    """
+    __tablename__ = "fair_share_clocks"
+
+    scope = Column(String, primary_key=True)
+    owner_id = Column(Integer, primary_key=True)
+    virtual_time = Column(Float, nullable=False, default=0)
+
+class RateLimitBucket(Base):
+    """Estado de un token bucket compartido por todos los workers."""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # epoch en segundos
+    version = Column(Integer, nullable=False, default=0)
+
+
+class ModerationWatermark(Base):
+    """Último comentario (por `created_utc`) revisado en un post con un conjunto de filtros."""
+    __tablename__ = "moderation_watermarks"
+
+    submission_id = Column(String, primary_key=True)
+    rules_hash = Column(String, primary_key=True)
+    high_water_utc = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ModerationSeenComment(Base):
+    """Comentarios ya evaluados cerca de la marca de agua (los anteriores se podan)."""
+    __tablename__ = "moderation_seen_comments"
+
+    submission_id = Column(String, primary_key=True)
+    rules_hash = Column(String, primary_key=True)
+    comment_id = Column(String, primary_key=True)
+    created_utc = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_moderation_seen_comments_created", "submission_id", "rules_hash", "created_utc"),
+    )
+
+
+class ResponderSeenComment(Base):
+    """
+    Comentarios ya revisados (y si se respondieron) por una cuenta en un post.
+    Los descartados valen solo para las palabras clave con que se revisaron
+    (`rules_key`); los reclamados para responder (`rules_key = '*'`) y los
+    respondidos valen para cualquier tarea.
+    """
+    __tablename__ = "responder_seen_comments"
+
+    account_id = Column(Integer, primary_key=True)
+    submission_id = Column(String, primary_key=True)
+    comment_id = Column(String, primary_key=True)
+    replied = Column(Boolean, nullable=False, default=False)
+    rules_key = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ExecutionLog(Base):
+    """
+    Resultado de la ejecución de una tarea, para el historial del usuario.
+    La tabla está particionada por mes de `created_at` (ver
+    `executor/log_storage.py`): se escribe y se lee a través de ese módulo.
+    """
+    __tablename__ = "execution_logs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    account_id = Column(Integer, nullable=False)
+    task_id = Column(Integer, nullable=True)
+    task_type = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    detail = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Paginación por (created_at, id) descendente: cada página es un recorrido corto del índice
+        Index("ix_execution_logs_user_account_created", "user_id", "account_id", "created_at", "id"),
+        Index("ix_execution_logs_user_created", "user_id", "created_at", "id"),
+    )
+
+class ExecutionLogDaily(Base):
+    """
+    Logs de ejecución agregados por día (UTC), usuario, cuenta, tipo de tarea
+    y estado. Se actualiza con cada lote que escribe el log writer y no se
+    borra con la retención de los logs: sirve las estadísticas sin recorrer
+    las filas crudas.
+    """
+    __tablename__ = "execution_log_daily"
+
+    # El orden de la clave primaria sirve las consultas por usuario y rango de días
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    account_id = Column(Integer, primary_key=True)
+    task_type = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+
+class ExecutionJob(Base):
+    """
+    Ejecución lanzada con POST /executor/execute/{account_id}. La petición
+    responde enseguida con el id del job y el trabajo sigue en segundo
+    plano; el cliente consulta aquí el estado y el progreso.
+    """
+    __tablename__ = "execution_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 en hex
+    user_id = Column(Integer, nullable=False, index=True)
+    account_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued | running | completed | failed
+    total = Column(Integer, nullable=True)  # tareas a ejecutar, conocidas al empezar
+    processed = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
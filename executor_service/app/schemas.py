@@ -1,10 +1,10 @@
 from pydantic import BaseModel
-from typing import Any, Dict, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 
 class ExecutionLogCreate(BaseModel):
     user_id: int
-    account_id: str
+    account_id: int
     task_id: Optional[int]
     task_type: str
     status: str
@@ -13,7 +13,7 @@ class ExecutionLogCreate(BaseModel):
 class ExecutionLog(BaseModel):
     id: int
     user_id: int
-    account_id: str
+    account_id: int
     task_id: Optional[int]
     task_type: str
     status: str
@@ -22,3 +22,37 @@ class ExecutionLog(BaseModel):
 
     class Config:
         orm_mode = True
+
+class ExecutionLogPage(BaseModel):
+    items: List[ExecutionLog]
+    # Cursor opaco para pedir la página siguiente; None en la última
+    next_cursor: Optional[str] = None
+
+class ExecutionLogDailyStat(BaseModel):
+    day: date
+    account_id: int
+    task_type: str
+    status: str
+    count: int
+
+    class Config:
+        orm_mode = True
+
+class ExecutionJob(BaseModel):
+    id: str
+    account_id: int
+    status: str
+    total: Optional[int] = None
+    processed: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class ExecutionJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
@@ -0,0 +1,41 @@
+# en executor_service/tests/conftest.py
+import os
+import tempfile
+import pytest
+
+# La app lee DATABASE_URL al importarse: las pruebas nunca usan la BD del entorno,
+# sino TEST_DATABASE_URL o un SQLite temporal.
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='executor-tests-'), 'tests.db')}"
+)
+
+@pytest.fixture(scope="session")
+def schema():
+    from app.database import sync_schema
+    sync_schema()
+
+@pytest.fixture
+def db(schema):
+    """Sesión sobre la BD de pruebas; al terminar se vacían las tablas de los modelos."""
+    from app.database import Base, SessionLocal, engine
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+@pytest.fixture
+def log_db(db):
+    """Como `db`, y además borra las tablas mensuales de logs (SQLite) al terminar."""
+    from sqlalchemy import text
+    from app.database import engine
+    from app.executor import log_storage
+    try:
+        yield db
+    finally:
+        with engine.begin() as conn:
+            for name in log_storage._list_periods(conn).values():
+                conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
@@ -0,0 +1,35 @@
+# en executor_service/tests/test_bloom.py
+from app.executor.bloom import BloomFilter
+
+def test_no_false_negatives():
+    bloom = BloomFilter(capacity=1000)
+    items = [f"t1_{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+def test_false_positive_rate_close_to_target():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"visto_{i}")
+    false_positives = sum(f"nuevo_{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.03
+
+def test_empty_filter_contains_nothing():
+    bloom = BloomFilter(capacity=10)
+    assert "x" not in bloom
+    assert not bloom.saturated
+
+def test_saturated_after_capacity():
+    bloom = BloomFilter(capacity=3)
+    for item in "abc":
+        bloom.add(item)
+    assert not bloom.saturated
+    bloom.add("d")
+    assert bloom.saturated
+
+def test_minimum_size_for_tiny_capacity():
+    bloom = BloomFilter(capacity=0)
+    bloom.add("único")
+    assert "único" in bloom
+    assert bloom.size >= 8 and bloom.hashes >= 1
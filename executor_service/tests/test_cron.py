@@ -0,0 +1,62 @@
+# en executor_service/tests/test_cron.py
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.executor.cron import CronExpression
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("*/15 * * * *", utc(2024, 1, 1, 10, 7), utc(2024, 1, 1, 10, 15)),
+    ("*/15 * * * *", utc(2024, 1, 1, 10, 15), utc(2024, 1, 1, 10, 30)),
+    ("0 9 * * *", utc(2024, 1, 1, 9, 0, 30), utc(2024, 1, 2, 9, 0)),
+    ("30 23 31 12 *", utc(2024, 6, 1), utc(2024, 12, 31, 23, 30)),
+    ("0 0 29 2 *", utc(2023, 3, 1), utc(2024, 2, 29)),
+    ("0 12 * * 1-5", utc(2024, 1, 5, 13, 0), utc(2024, 1, 8, 12, 0)),   # viernes -> lunes
+    ("0 0 * * 7", utc(2024, 1, 1), utc(2024, 1, 7)),                   # 7 también es domingo
+    ("5,35 8-9 * * *", utc(2024, 1, 1, 8, 40), utc(2024, 1, 1, 9, 5)),
+])
+def test_next_after(expression, after, expected):
+    assert CronExpression(expression).next_after(after) == expected
+
+def test_day_of_month_or_weekday():
+    # Con ambos restringidos basta con que coincida uno: día 15 o cualquier lunes
+    cron = CronExpression("0 0 15 * 1")
+    assert cron.next_after(utc(2024, 1, 9)) == utc(2024, 1, 15)
+    assert cron.next_after(utc(2024, 1, 2)) == utc(2024, 1, 8)
+
+def test_naive_datetimes_are_utc():
+    assert CronExpression("0 * * * *").next_after(datetime(2024, 1, 1, 10, 30)) == utc(2024, 1, 1, 11)
+
+def test_result_is_strictly_after_and_matches_brute_force():
+    cron = CronExpression("*/7 3-5 */2 * *")
+    moment = utc(2024, 2, 27, 22, 0)
+    for _ in range(20):
+        expected = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        while not (expected.minute % 7 == 0 and 3 <= expected.hour <= 5 and expected.day % 2 == 1):
+            expected += timedelta(minutes=1)
+        moment = cron.next_after(moment)
+        assert moment == expected
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "*/0 * * * *", "5-1 * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+def test_never_matching_expression():
+    with pytest.raises(ValueError):
+        CronExpression("0 0 31 2 *").next_after(utc(2024, 1, 1))
+
+def test_compute_next_run_interval_skips_missed_runs():
+    from app.executor.scheduler import compute_next_run
+    due = utc(2024, 1, 1, 10, 0)
+    # En hora: el siguiente intervalo
+    assert compute_next_run(None, 600, due, utc(2024, 1, 1, 10, 0, 5)) == utc(2024, 1, 1, 10, 10)
+    # Tras una parada: los vencimientos perdidos no se acumulan
+    assert compute_next_run(None, 600, due, utc(2024, 1, 1, 11, 3)) == utc(2024, 1, 1, 11, 10)
+
+def test_compute_next_run_cron_continues_from_now():
+    from app.executor.scheduler import compute_next_run
+    due = datetime(2024, 1, 1, 9, 0)  # SQLite devuelve fechas sin zona
+    assert compute_next_run("0 9 * * *", None, due, utc(2024, 1, 1, 9, 0, 2)) == utc(2024, 1, 2, 9, 0)
+    assert compute_next_run("0 9 * * *", None, due, utc(2024, 1, 5, 12, 0)) == utc(2024, 1, 6, 9, 0)
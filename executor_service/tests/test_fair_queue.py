@@ -0,0 +1,134 @@
+# en executor_service/tests/test_fair_queue.py
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from app import models
+from app.executor import fair_queue
+from app.executor.fair_queue import batch_candidates, candidate_tasks, charge
+from app.executor.worker import claim_pending_tasks
+
+def add_accounts(db, *pairs):
+    """Cuentas como (account_id, user_id)."""
+    db.add_all(
+        models.Account(id=account_id, user_id=user_id, platform="reddit", handle=f"cuenta{account_id}", token="t")
+        for account_id, user_id in pairs
+    )
+    db.commit()
+
+def add_tasks(db, account_id, count=1, **values) -> list:
+    tasks = [models.Task(account_id=account_id, type="x", config_json={}, status="pending", **values)
+             for _ in range(count)]
+    db.add_all(tasks)
+    db.commit()
+    return [task.id for task in tasks]
+
+def claim_order(db, limit=1):
+    """Cuentas en el orden en que se reclaman sus tareas hasta vaciar la cola."""
+    order = []
+    while True:
+        tasks = claim_pending_tasks(db, "pruebas", limit)
+        if not tasks:
+            return order
+        order.append([task.account_id for task in tasks] if limit > 1 else tasks[0].account_id)
+
+def clock(db, scope, owner_id):
+    row = db.get(models.FairShareClock, (scope, owner_id), populate_existing=True)
+    return row.virtual_time if row else None
+
+def test_priority_lane_comes_first(db):
+    add_accounts(db, (1, 1), (2, 2))
+    add_tasks(db, 1, 3)
+    urgent = add_tasks(db, 2, 1, priority=100)
+    assert candidate_tasks(db)[0] == urgent[0]
+    assert candidate_tasks(db, min_priority=100) == urgent
+
+def test_one_head_per_account(db):
+    add_accounts(db, (1, 1), (2, 2))
+    first = add_tasks(db, 1, 50)[0]
+    other = add_tasks(db, 2, 1)[0]
+    assert sorted(candidate_tasks(db)) == sorted([first, other])
+
+def test_head_is_highest_priority_then_oldest(db):
+    add_accounts(db, (1, 1))
+    add_tasks(db, 1, 1)
+    high = add_tasks(db, 1, 2, priority=5)
+    assert candidate_tasks(db) == [high[0]]
+
+def test_future_run_at_is_not_a_candidate(db):
+    add_accounts(db, (1, 1))
+    add_tasks(db, 1, 1, run_at=datetime.now(timezone.utc) + timedelta(hours=1))
+    assert candidate_tasks(db) == []
+    ready = add_tasks(db, 1, 1)
+    assert candidate_tasks(db) == ready
+
+def test_users_alternate_regardless_of_backlog(db):
+    # El usuario 1 tiene dos cuentas y mucho más trabajo en cola que el 2
+    add_accounts(db, (1, 1), (2, 1), (3, 2))
+    add_tasks(db, 1, 6)
+    add_tasks(db, 2, 6)
+    add_tasks(db, 3, 4)
+    order = claim_order(db)
+    # Mientras el usuario 2 tiene tareas recibe uno de cada dos turnos...
+    assert order[:8].count(3) == 4
+    # ...y las dos cuentas del usuario 1 se reparten los suyos
+    assert Counter(account for account in order[:8] if account != 3) == {1: 2, 2: 2}
+
+def test_user_weight_gives_more_turns(db, monkeypatch):
+    monkeypatch.setattr(fair_queue, "FAIR_SHARE_USER_WEIGHTS", {1: 2.0})
+    add_accounts(db, (1, 1), (2, 2))
+    add_tasks(db, 1, 10)
+    add_tasks(db, 2, 10)
+    assert Counter(claim_order(db)[:9]) == {1: 6, 2: 3}
+
+def test_idle_user_does_not_bank_credit(db):
+    add_accounts(db, (1, 1), (2, 2))
+    add_tasks(db, 1, 6)
+    for _ in range(4):
+        claim_pending_tasks(db, "pruebas")
+    # El usuario 2 llega tarde: entra con el tiempo del sistema, no con su reloj a cero
+    add_tasks(db, 2, 4)
+    assert claim_order(db)[:4] in ([2, 1, 2, 1], [1, 2, 1, 2])
+
+def test_charge_aggregates_costs_per_clock(db):
+    add_accounts(db, (1, 1), (2, 1), (3, 2))
+    charge(db, [1, 1, 2, 3])
+    db.commit()
+    assert clock(db, "account", 1) == 2.0
+    assert clock(db, "account", 2) == 1.0
+    assert clock(db, "user", 1) == 3.0
+    assert clock(db, "user", 2) == 1.0
+    # La marca de inicio del usuario de la cabeza era 0: el reloj del sistema no se toca
+    assert clock(db, "system", 0) is None
+    charge(db, [3])
+    db.commit()
+    assert clock(db, "system", 0) == 1.0
+    assert clock(db, "user", 2) == 2.0
+
+def test_charge_never_moves_system_clock_back(db):
+    add_accounts(db, (1, 1), (2, 2))
+    charge(db, [1, 1, 1])
+    charge(db, [1])
+    db.commit()
+    assert clock(db, "system", 0) == 3.0
+    # Un usuario nuevo entra con el tiempo del sistema y no lo atrasa
+    charge(db, [2])
+    db.commit()
+    assert clock(db, "user", 2) == 4.0
+    assert clock(db, "system", 0) == 3.0
+
+def test_batch_only_takes_the_claimed_account(db):
+    add_accounts(db, (1, 1), (2, 2))
+    own = add_tasks(db, 1, 4)
+    add_tasks(db, 2, 4)
+    low = add_tasks(db, 1, 1, priority=-1)
+    assert batch_candidates(db, 1, 0, 10) == own
+    assert batch_candidates(db, 1, -1, 10) == own + low
+    assert batch_candidates(db, 1, 0, 2) == own[:2]
+    assert batch_candidates(db, 1, 0, 0) == []
+
+def test_claimed_batch_is_one_account(db):
+    add_accounts(db, (1, 1), (2, 2))
+    add_tasks(db, 1, 3)
+    add_tasks(db, 2, 3)
+    batches = claim_order(db, limit=4)
+    assert all(len(set(batch)) == 1 for batch in batches)
+    assert sorted(account for batch in batches for account in batch) == [1, 1, 1, 2, 2, 2]
@@ -0,0 +1,80 @@
+# en executor_service/tests/test_log_queries.py
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.database import engine
+from app.executor import log_storage
+from app.executor.log_queries import InvalidCursor, decode_cursor, encode_cursor, filtered_logs, logs_page
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+def write_logs(records):
+    with engine.begin() as conn:
+        log_storage.insert_logs(conn, records)
+
+def log(created_at, user_id=1, account_id=1, status="success", task_type="moderar"):
+    return {"user_id": user_id, "account_id": account_id, "task_id": None, "task_type": task_type,
+            "status": status, "detail": None, "created_at": created_at}
+
+def all_pages(db, query, limit):
+    pages, cursor = [], None
+    while True:
+        items, cursor = logs_page(db, query, limit, cursor)
+        pages.append(items)
+        if cursor is None:
+            return pages
+
+class _Row:
+    def __init__(self, created_at, id):
+        self.created_at = created_at
+        self.id = id
+
+def test_cursor_round_trip():
+    created_at = utc(2024, 3, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(_Row(created_at, 42))
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+@pytest.mark.parametrize("cursor", ["", "no-es-base64!", "eyJ4IjoxfQ", "bnVsbA"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+def test_keyset_pages_cover_everything_once_newest_first(log_db):
+    base = utc(2024, 1, 30, 23, 0)
+    # Logs a caballo entre dos meses (dos tablas en SQLite) y con instantes repetidos
+    write_logs([log(base + timedelta(hours=i // 2)) for i in range(11)])
+    query = filtered_logs(log_db, 1)
+    pages = all_pages(log_db, query, 4)
+    assert [len(page) for page in pages] == [4, 4, 3]
+    rows = [row for page in pages for row in page]
+    keys = [(row.created_at, row.id) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == 11
+
+def test_last_full_page_has_no_cursor(log_db):
+    write_logs([log(utc(2024, 5, 1, 10, i)) for i in range(4)])
+    items, cursor = logs_page(log_db, filtered_logs(log_db, 1), 4)
+    assert len(items) == 4 and cursor is None
+
+def test_filters_and_range(log_db):
+    write_logs([
+        log(utc(2024, 1, 10), status="failed"),
+        log(utc(2024, 2, 10), status="success"),
+        log(utc(2024, 2, 11), status="failed", task_type="responder"),
+        log(utc(2024, 2, 12), status="failed", account_id=2),
+        log(utc(2024, 2, 13), status="failed", user_id=2),
+    ])
+    def fetch(**filters):
+        items, _ = logs_page(log_db, filtered_logs(log_db, 1, **filters), 100)
+        return [row.created_at.day for row in items]
+    assert fetch(status=["failed"]) == [12, 11, 10]
+    assert fetch(status=["failed"], account_id=1) == [11, 10]
+    assert fetch(task_type="responder") == [11]
+    assert fetch(since=utc(2024, 2, 1), until=utc(2024, 2, 12)) == [11, 10]
+
+def test_cursor_pages_respect_filters(log_db):
+    write_logs([log(utc(2024, 4, 1, 0, i), status="failed" if i % 2 else "success") for i in range(10)])
+    query = filtered_logs(log_db, 1, status=["failed"])
+    rows = [row for page in all_pages(log_db, query, 2) for row in page]
+    assert [row.created_at.minute for row in rows] == [9, 7, 5, 3, 1]
@@ -0,0 +1,93 @@
+# en executor_service/tests/test_log_storage.py
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from sqlalchemy import func, select
+from app import models
+from app.database import engine
+from app.executor import log_storage
+from app.executor.log_storage import add_months, month_start, period_name
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+def log(created_at, status="success"):
+    return {"user_id": 1, "account_id": 1, "task_id": None, "task_type": "moderar",
+            "status": status, "detail": None, "created_at": created_at}
+
+def write_logs(records):
+    with engine.begin() as conn:
+        log_storage.insert_logs(conn, records)
+        log_storage.add_to_rollups(conn, records)
+
+def periods():
+    with engine.connect() as conn:
+        return sorted(log_storage._list_periods(conn))
+
+@pytest.mark.parametrize("value, expected", [
+    (utc(2024, 3, 31, 23, 59), utc(2024, 3, 1)),
+    (datetime(2024, 3, 15), utc(2024, 3, 1)),   # sin zona = UTC
+    # 00:30 del 1 de abril en UTC+2 sigue siendo marzo en UTC
+    (datetime(2024, 4, 1, 0, 30, tzinfo=timezone(timedelta(hours=2))), utc(2024, 3, 1)),
+])
+def test_month_start(value, expected):
+    assert month_start(value) == expected
+
+@pytest.mark.parametrize("start, months, expected", [
+    (utc(2024, 1, 1), 1, utc(2024, 2, 1)),
+    (utc(2024, 12, 1), 1, utc(2025, 1, 1)),
+    (utc(2024, 1, 1), -1, utc(2023, 12, 1)),
+    (utc(2024, 3, 1), -15, utc(2022, 12, 1)),
+    (utc(2024, 3, 1), 0, utc(2024, 3, 1)),
+])
+def test_add_months(start, months, expected):
+    assert add_months(start, months) == expected
+
+def test_months_and_period_names():
+    months = log_storage._months(utc(2023, 11, 20), utc(2024, 2, 1))
+    assert [period_name(m) for m in months] == [
+        "execution_logs_202311", "execution_logs_202312", "execution_logs_202401", "execution_logs_202402",
+    ]
+
+def test_ensure_periods_creates_current_and_ahead(log_db, monkeypatch):
+    monkeypatch.setattr(log_storage, "LOG_PARTITIONS_AHEAD", 2)
+    with engine.begin() as conn:
+        log_storage.ensure_periods(conn, now=utc(2030, 11, 15))
+    assert {utc(2030, 11, 1), utc(2030, 12, 1), utc(2031, 1, 1)} <= set(periods())
+
+def test_writes_go_to_their_month(log_db):
+    write_logs([log(utc(2024, 1, 31, 23, 59)), log(utc(2024, 2, 1, 0, 0)), log(utc(2024, 2, 2))])
+    with engine.connect() as conn:
+        counts = {
+            start: conn.execute(select(func.count()).select_from(log_storage._period_table(start))).scalar()
+            for start in (utc(2024, 1, 1), utc(2024, 2, 1))
+        }
+    assert counts == {utc(2024, 1, 1): 1, utc(2024, 2, 1): 2}
+
+def test_drop_expired_keeps_the_last_complete_months(log_db):
+    write_logs([log(utc(2024, month, 10)) for month in range(1, 7)])
+    with engine.begin() as conn:
+        dropped = log_storage.drop_expired(conn, retention_months=3, now=utc(2024, 6, 20))
+    # Junio en curso + 3 meses completos (marzo, abril, mayo)
+    assert dropped == ["execution_logs_202401", "execution_logs_202402"]
+    remaining = [start for start in periods() if start <= utc(2024, 6, 1)]
+    assert remaining == [utc(2024, 3, 1), utc(2024, 4, 1), utc(2024, 5, 1), utc(2024, 6, 1)]
+
+def test_drop_expired_disabled_with_zero(log_db):
+    write_logs([log(utc(2020, 1, 1))])
+    with engine.begin() as conn:
+        assert log_storage.drop_expired(conn, retention_months=0, now=utc(2024, 6, 1)) == []
+    assert utc(2020, 1, 1) in periods()
+
+def test_rollups_survive_retention_and_rebuild(log_db):
+    write_logs([log(utc(2024, 1, 5)), log(utc(2024, 1, 5), "failed"), log(utc(2024, 5, 5)), log(utc(2024, 5, 5))])
+    with engine.begin() as conn:
+        log_storage.drop_expired(conn, retention_months=2, now=utc(2024, 5, 20))
+        log_storage.rebuild_rollups(conn)
+    rollups = {
+        (row.day, row.status): row.count
+        for row in log_db.execute(select(models.ExecutionLogDaily)).scalars()
+    }
+    # Los días de enero ya no tienen logs, pero sus agregados se conservan
+    assert rollups == {
+        (date(2024, 1, 5), "success"): 1, (date(2024, 1, 5), "failed"): 1, (date(2024, 5, 5), "success"): 2,
+    }
@@ -0,0 +1,39 @@
+# en executor_service/tests/test_responder_state.py
+from app.executor.responder_state import ReplyLedger, rules_key
+
+def ledger(db, words=("hola",), submission_id="post1"):
+    return ReplyLedger(db, 1, submission_id, rules_key(words))
+
+def test_rules_key_ignores_order_and_repeats():
+    assert rules_key(["b", "a", "a"]) == rules_key(["a", "b"])
+    assert rules_key(["a"]) != rules_key(["a", "b"])
+
+def test_discarded_comments_are_seen_only_with_the_same_keywords(db):
+    first = ledger(db, ["hola"])
+    first.record("c1")
+    first.save()
+    assert ledger(db, ["hola"]).unseen(["c1", "c2"]) == {"c2"}
+    # Otra tarea sobre el mismo post con otras palabras clave los vuelve a evaluar
+    assert ledger(db, ["adios"]).unseen(["c1", "c2"]) == {"c1", "c2"}
+
+def test_discarded_comment_can_be_claimed_by_other_keywords(db):
+    first = ledger(db, ["hola"])
+    first.record("c1")
+    first.save()
+    other = ledger(db, ["adios"])
+    assert other.claim("c1")
+    other.mark_replied("c1")
+    # Respondido: visto para cualquier juego de palabras, y no se puede reclamar otra vez
+    assert ledger(db, ["hola"]).unseen(["c1"]) == set()
+    assert not ledger(db, ["otra"]).claim("c1")
+
+def test_claim_is_exclusive_and_release_frees_it(db):
+    first, second = ledger(db), ledger(db, ["adios"])
+    assert first.claim("c1")
+    assert not second.claim("c1")
+    # Un descarte de otra tarea no pisa el reclamo en curso
+    second.record("c1")
+    second.save()
+    assert ledger(db, ["otra"]).unseen(["c1"]) == set()
+    first.release("c1")
+    assert second.claim("c1")
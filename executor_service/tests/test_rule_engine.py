@@ -0,0 +1,70 @@
+# en executor_service/tests/test_rule_engine.py
+import pytest
+from app.executor.rule_engine import KeywordMatcher, RuleEngine, caps_ratio, rules_hash
+
+def test_keyword_matcher_finds_any_word_case_insensitive():
+    matcher = KeywordMatcher(["spam", "estafa", "he", "she", "hers"])
+    assert matcher.find("Esto es una ESTAFA clara") == "estafa"
+    assert matcher.find("ushers") in ("she", "he", "hers")
+    assert matcher.find("nada que ver") is None
+
+def test_keyword_matcher_matches_naive_search():
+    words = ["ab", "bab", "bc", "bca", "c", "caa"]
+    matcher = KeywordMatcher(words)
+    for text in ("abccab", "xyz", "bbbbca", "aaaa", "cab"):
+        expected = any(word in text for word in words)
+        assert (matcher.find(text) is not None) == expected
+
+def test_keyword_matcher_ignores_empty_and_duplicates():
+    matcher = KeywordMatcher(["", "hola", "hola"])
+    assert matcher.words == ["hola"]
+    assert not KeywordMatcher([])
+
+def test_rule_order_forbidden_then_spam_then_caps():
+    engine = RuleEngine(["prohibida"], [r"compra\s+ya"], max_caps_percent=50)
+    assert engine.evaluate("PALABRA PROHIBIDA, COMPRA YA").rule == "forbidden_word"
+    assert engine.evaluate("COMPRA YA").rule == "spam_pattern"
+    match = engine.evaluate("TODO EN MAYÚSCULAS")
+    assert match.rule == "caps" and match.value == 100.0
+    assert engine.evaluate("texto normal") is None
+    assert engine.evaluate("") is None
+
+def test_spam_combined_patterns():
+    engine = RuleEngine(spam_patterns=["zzz", "b+", "a+"])
+    assert engine.evaluate("xbx").value == "b+"
+    # Gana el primer patrón de la lista, no la coincidencia más a la izquierda
+    assert engine.evaluate("aaa bbb").value == "b+"
+    assert RuleEngine(spam_patterns=["b", "a"]).evaluate("ab").value == "b"
+    assert engine.evaluate("ccc") is None
+
+def test_spam_pattern_with_backreference():
+    # Con grupos propios, \1 apuntaría a otro grupo dentro de la regex combinada
+    engine = RuleEngine(spam_patterns=["gratis", r"(\w)\1{4,}", r"(?P<x>ja)(?P=x)"])
+    assert engine.evaluate("holaaaaa").value == r"(\w)\1{4,}"
+    assert engine.evaluate("jaja").value == r"(?P<x>ja)(?P=x)"
+    assert engine.evaluate("es GRATIS").value == "gratis"
+    assert engine.evaluate("holaa ja") is None
+
+def test_backreference_pattern_keeps_its_position_in_the_order():
+    engine = RuleEngine(spam_patterns=[r"(x)\1", "xx"])
+    assert engine.evaluate("xx").value == r"(x)\1"
+
+def test_spam_list_order_across_separate_and_combined():
+    engine = RuleEngine(spam_patterns=["zz", r"(y)\1", "x"])
+    assert engine.evaluate("x yy zz").value == "zz"
+    assert engine.evaluate("x yy").value == r"(y)\1"
+    assert engine.evaluate("x").value == "x"
+
+def test_inline_global_flags_fall_back_to_separate_regexes():
+    engine = RuleEngine(spam_patterns=["otro", "(?s)inicio.fin"])
+    assert engine.evaluate("inicio\nfin").value == "(?s)inicio.fin"
+
+@pytest.mark.parametrize("text, expected", [("ABcd", 50.0), ("1234", None), ("ÁÉ", 100.0)])
+def test_caps_ratio(text, expected):
+    assert caps_ratio(text) == expected
+
+def test_from_filters_is_cached_by_content():
+    filters = {"forbidden_words": ["a"], "spam_patterns": [], "max_caps_percent": 80}
+    assert RuleEngine.from_filters(filters) is RuleEngine.from_filters(dict(filters))
+    assert rules_hash(filters) == rules_hash(dict(filters))
+    assert rules_hash(filters) != rules_hash(dict(filters, max_caps_percent=70))
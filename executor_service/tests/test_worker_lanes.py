@@ -0,0 +1,19 @@
+# en executor_service/tests/test_worker_lanes.py
+from app.executor import worker
+from app.executor.worker import worker_lanes
+from app.config import TASK_URGENT_PRIORITY
+
+def test_lanes_keep_one_general_worker():
+    assert worker_lanes(1, 1) == [None]
+    assert worker_lanes(2, 5) == [TASK_URGENT_PRIORITY, None]
+    assert worker_lanes(4, 1) == [TASK_URGENT_PRIORITY, None, None, None]
+    assert worker_lanes(3, 0) == [None, None, None]
+
+def test_process_children_get_the_urgent_lane(monkeypatch):
+    # En modo "process" cada hijo es un pool de un solo worker: su carril llega tal cual
+    pools = []
+    monkeypatch.setattr(worker.engine, "dispose", lambda close=True: None)
+    monkeypatch.setattr(worker, "_run_thread_pool", lambda kernel, lanes: pools.append(list(lanes)))
+    for min_priority in worker_lanes(3, 1):
+        worker._process_main(min_priority)
+    assert pools == [[TASK_URGENT_PRIORITY], [None], [None]]
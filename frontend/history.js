@@ -1,10 +1,51 @@
-async function fetchLogs() {
+// en frontend/history.js
+
+const PAGE_SIZE = 50;
+let nextCursor = null;
+
+// --- Cargar una página del historial (paginación por cursor) ---
+async function fetchLogs(cursor) {
   const token = localStorage.getItem('token');
-  const res = await fetch('/api/logs', {
-    headers: { 'Authorization': `Bearer ${token}` }
-  });
-  const logs = await res.json();
   const container = document.getElementById('logs');
-  container.innerHTML = logs.map(log => `<div>${log.timestamp}: ${log.message}</div>`).join('');
+  const errorDiv = document.getElementById('logsError');
+  const loadMore = document.getElementById('loadMore');
+
+  const params = new URLSearchParams({ limit: PAGE_SIZE });
+  if (cursor) params.set('cursor', cursor);
+
+  try {
+    const res = await fetch(`/api/logs?${params}`, {
+      headers: { 'Authorization': `Bearer ${token}` }
+    });
+    if (res.status === 401) {
+      window.location.href = 'login.html';
+      return;
+    }
+    if (!res.ok) {
+      throw new Error('Error al cargar el historial');
+    }
+
+    const page = await res.json();
+    page.items.forEach(log => {
+      const div = document.createElement('div');
+      div.className = 'log-entry';
+      const status = document.createElement('span');
+      status.className = 'status';
+      status.textContent = log.status;
+      div.append(
+        `${new Date(log.created_at).toLocaleString()} - ${log.task_type} (cuenta ${log.account_id}, tarea ${log.task_id ?? '-'}): `,
+        status
+      );
+      container.appendChild(div);
+    });
+
+    // Solo se muestra el botón si quedan páginas
+    nextCursor = page.next_cursor;
+    loadMore.style.display = nextCursor ? 'inline-block' : 'none';
+  } catch (err) {
+    errorDiv.textContent = err.message;
+  }
 }
+
+document.getElementById('loadMore').addEventListener('click', () => fetchLogs(nextCursor));
 fetchLogs();
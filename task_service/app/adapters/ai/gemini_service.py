@@ -27,6 +27,7 @@ Es CRÍTICO que uses los nombres de clave exactos para la 'config' como se descr
    (Si el usuario pide "eliminar spam de links", usa "spam_patterns": ["http", "www"])
    (Si el usuario pide "eliminar comentarios que gritan", usa "max_caps_percent": 70)
    (Si el usuario solo da palabras, ponlas en "forbidden_words")
+   (Si el usuario pide moderar un subreddit de forma continua o "en tiempo real", usa "mode": "stream" y "subreddit": "..." en lugar de "post_url"; opcionalmente "duration_seconds")
 
 4. task_type: "validar_cuentas"
    Config: {}
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, func, ForeignKey
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Boolean, Index, func, true, ForeignKey
+from sqlalchemy.orm import relationship
 from ...database import Base
 
 # --- Modelo copiado desde account_service ---
@@ -22,4 +23,36 @@ class Task(Base):
     type = Column(String, nullable=False)
     config_json = Column(JSON, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    status = Column(String, default="pending", nullable=False)
\ No newline at end of file
+    status = Column(String, default="pending", nullable=False)
+    # Mayor = más urgente (borrado_emergencia usa 100 por defecto)
+    priority = Column(Integer, nullable=False, default=0, server_default="0")
+    # Reintentos (los gestiona executor_service): próximo intento, intentos hechos y último error
+    run_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(String, nullable=True)
+    # Programación que generó esta ejecución (NULL = tarea puntual)
+    schedule_id = Column(Integer, nullable=True, index=True)
+
+    # Solo las tareas plantilla (status 'scheduled') tienen programación
+    schedule = relationship("TaskSchedule", uselist=False, cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Listado filtrado por cuenta (y estado), p. ej. el que pide executor_service
+        Index("ix_tasks_account_status", "account_id", "status"),
+    )
+
+class TaskSchedule(Base):
+    __tablename__ = "task_schedules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, unique=True)
+    cron = Column(String, nullable=True)
+    interval_seconds = Column(Integer, nullable=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    enabled = Column(Boolean, nullable=False, default=True, server_default=true())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_task_schedules_updated_at", "updated_at"),
+    )
\ No newline at end of file
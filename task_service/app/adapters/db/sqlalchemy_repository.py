@@ -1,11 +1,14 @@
 # en app/adapters/db/sqlalchemy_repository.py
 
-from sqlalchemy.orm import Session
+import json
+from sqlalchemy import text
+from sqlalchemy.orm import Session, selectinload
 from app.domain.ports import TaskRepositoryPort
 from app.domain.models import Task, Account
-from .models import Task as SQLTask, Account as SQLAccount
-from ...schemas import TaskCreate, TaskUpdate
-from typing import List, Optional  # <-- LÍNEA CORREGIDA (se añadió Optional)
+from .models import Task as SQLTask, Account as SQLAccount, TaskSchedule as SQLTaskSchedule
+from ...schemas import TaskCreate, TaskUpdate, TaskFilter, ScheduleSpec
+from typing import Any, Dict, List, Optional  # <-- LÍNEA CORREGIDA (se añadió Optional)
+from ...config import settings
 
 class SQLAlchemyTaskRepository(TaskRepositoryPort):
     """
@@ -30,21 +33,74 @@ class SQLAlchemyTaskRepository(TaskRepositoryPort):
         db_task = SQLTask(
             account_id=task_data.account_id,
             type=task_data.type,
-            config_json=task_data.config_json
+            config_json=task_data.config_json,
+            priority=(
+                task_data.priority if task_data.priority is not None
+                else settings.TASK_DEFAULT_PRIORITIES.get(task_data.type, 0)
+            ),
         )
+        if task_data.schedule:
+            # Tarea plantilla: no se ejecuta directamente, el executor crea una ejecución por vencimiento
+            db_task.status = "scheduled"
+            self._apply_schedule(db_task, task_data.schedule)
         self.db.add(db_task)
+        self.db.flush()
+        if task_data.schedule:
+            self._notify(settings.SCHEDULE_NOTIFY_CHANNEL, {"schedule_id": db_task.schedule.id})
+        else:
+            self._notify(settings.TASK_NOTIFY_CHANNEL, {"task_id": db_task.id})
         self.db.commit()
         self.db.refresh(db_task)
         return Task.model_validate(db_task) # Corregido de from_orm a model_validate
 
-    def get_tasks_by_user_id(self, user_id: int) -> List[Task]:
+    def _apply_schedule(self, db_task: SQLTask, spec: ScheduleSpec):
+        """Crea o reemplaza la programación de una tarea plantilla."""
+        if db_task.schedule is None:
+            db_task.schedule = SQLTaskSchedule(next_run_at=spec.first_run())
+        else:
+            db_task.schedule.next_run_at = spec.first_run()
+        db_task.schedule.cron = spec.cron
+        db_task.schedule.interval_seconds = spec.interval_seconds
+        db_task.schedule.enabled = spec.enabled
+
+    def _notify(self, channel: str, payload: dict):
+        """
+        Avisa al executor_service (LISTEN/NOTIFY). PostgreSQL solo entrega la
+        notificación si la transacción hace commit.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            self.db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": channel, "payload": json.dumps(payload)},
+            )
+
+    def _filter_user_tasks(self, query, user_id: int, filters: Optional[TaskFilter]):
+        query = query.join(SQLAccount, SQLTask.account_id == SQLAccount.id).filter(SQLAccount.user_id == user_id)
+        if filters is None:
+            return query
+        if filters.account_id is not None:
+            query = query.filter(SQLTask.account_id == filters.account_id)
+        if filters.status:
+            query = query.filter(SQLTask.status.in_(filters.status))
+        if filters.type:
+            query = query.filter(SQLTask.type == filters.type)
+        return query
+
+    def get_tasks_by_user_id(self, user_id: int, filters: Optional[TaskFilter] = None) -> List[Task]:
         """Obtiene las tareas de un usuario."""
-        db_tasks = self.db.query(SQLTask).join(SQLAccount).filter(
-            SQLAccount.user_id == user_id
-        ).all()
+        db_tasks = self._filter_user_tasks(self.db.query(SQLTask), user_id, filters).options(
+            selectinload(SQLTask.schedule)
+        ).order_by(SQLTask.id).all()
         # Convierte la lista de modelos de BD a modelos de Dominio
         return [Task.model_validate(task) for task in db_tasks] # Corregido
 
+    def get_task_fields_by_user_id(self, user_id: int, fields: List[str],
+                                   filters: Optional[TaskFilter] = None) -> List[Dict[str, Any]]:
+        """Solo las columnas pedidas: no se cargan ni la configuración ni la programación si no hacen falta."""
+        columns = [getattr(SQLTask, field) for field in fields]
+        rows = self._filter_user_tasks(self.db.query(*columns), user_id, filters).order_by(SQLTask.id).all()
+        return [dict(zip(fields, row)) for row in rows]
+
     # --- Métodos para Eliminar ---
     
     def get_task_by_id(self, task_id: int) -> Optional[Task]:
@@ -64,6 +120,13 @@ class SQLAlchemyTaskRepository(TaskRepositoryPort):
             db_task.type = task_data.type
         if task_data.config_json:
             db_task.config_json = task_data.config_json
+        if task_data.priority is not None:
+            db_task.priority = task_data.priority
+        if task_data.schedule:
+            db_task.status = "scheduled"
+            self._apply_schedule(db_task, task_data.schedule)
+            self.db.flush()
+            self._notify(settings.SCHEDULE_NOTIFY_CHANNEL, {"schedule_id": db_task.schedule.id})
         
         self.db.commit()
         self.db.refresh(db_task)
@@ -1,7 +1,9 @@
 # en app/adapters/http/routes.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List # <-- IMPORTACIÓN AÑADIDA
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Optional # <-- IMPORTACIÓN AÑADIDA
 from ... import schemas
 from ...domain.use_cases import TaskUseCases
 from ...domain.models import Task as DomainTask # <-- IMPORTA EL MODELO DE DOMINIO
@@ -42,10 +44,21 @@ def create_user_task(
 # ▼▼▼ RUTA CORREGIDA ▼▼▼
 @router.get("/", response_model=List[DomainTask]) # <-- Corregido de list[schemas.Task]
 def list_user_tasks(
+    account_id: Optional[int] = Query(default=None, description="Solo las tareas de esta cuenta"),
+    status: Optional[List[str]] = Query(default=None, description="Uno o varios estados (?status=pending&status=running)"),
+    type: Optional[str] = Query(default=None, description="Tipo de tarea"),
+    fields: Optional[str] = Query(default=None, description="Columnas a devolver, separadas por comas (p. ej. id,type,config_json)"),
     user_id: int = Depends(get_current_user_id),
     task_use_cases: TaskUseCases = Depends(get_task_use_cases)
 ):
-    return task_use_cases.get_tasks_for_user(user_id=user_id)
+    filters = schemas.TaskFilter(account_id=account_id, status=status, type=type)
+    if fields:
+        # Proyección: objetos parciales, fuera del response_model
+        rows = task_use_cases.get_tasks_for_user(
+            user_id=user_id, filters=filters, fields=[field.strip() for field in fields.split(",") if field.strip()]
+        )
+        return JSONResponse(content=jsonable_encoder(rows))
+    return task_use_cases.get_tasks_for_user(user_id=user_id, filters=filters)
 
 @router.get("/{task_id}", response_model=DomainTask)
 def get_single_task(
@@ -1,4 +1,5 @@
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,6 +11,14 @@ class Settings(BaseSettings):
     # Nueva variable para Google
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
 
+    # Canal de LISTEN/NOTIFY que despierta a los workers del executor_service
+    TASK_NOTIFY_CHANNEL: str = "new_task"
+    # Canal por el que se avisa al planificador del executor de programaciones nuevas o editadas
+    SCHEDULE_NOTIFY_CHANNEL: str = "schedule_updated"
+
+    # Prioridad por defecto según el tipo de tarea (mayor = más urgente; el resto usa 0)
+    TASK_DEFAULT_PRIORITIES: Dict[str, int] = {"borrado_emergencia": 100}
+
     class Config:
         # Le dice a Pydantic que lea las variables del archivo .env
         env_file = ".env" 
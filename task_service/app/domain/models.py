@@ -19,6 +19,19 @@ class Account(BaseModel):
     # Reemplaza 'class Config' con 'model_config' para Pydantic V2
     model_config = ConfigDict(from_attributes=True)
 
+class Schedule(BaseModel):
+    """
+    Programación recurrente de una tarea plantilla.
+    """
+    id: int
+    cron: Optional[str] = None
+    interval_seconds: Optional[int] = None
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    enabled: bool
+
+    model_config = ConfigDict(from_attributes=True)
+
 class Task(BaseModel):
     """
     Este es el modelo de Dominio puro para una Tarea.
@@ -28,7 +41,14 @@ class Task(BaseModel):
     type: str
     config_json: Dict[str, Any]
     created_at: datetime
-    status: str
+    status: str  # scheduled | pending | running | completed | failed | dead
+    priority: int = 0
+    run_at: Optional[datetime] = None
+    attempts: int = 0
+    last_error: Optional[str] = None
+    # Plantillas: su programación. Ejecuciones: la programación que las creó.
+    schedule: Optional[Schedule] = None
+    schedule_id: Optional[int] = None
 
     # ▼▼▼ LÍNEA CORREGIDA ▼▼▼
     # Reemplaza 'class Config' con 'model_config' para Pydantic V2
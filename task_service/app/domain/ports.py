@@ -1,7 +1,7 @@
 # en app/domain/ports.py
 from abc import ABC, abstractmethod
-from typing import List, Optional # <-- LÍNEA CORREGIDA (se añadió Optional)
-from ..schemas import TaskCreate, TaskUpdate
+from typing import Any, Dict, List, Optional # <-- LÍNEA CORREGIDA (se añadió Optional)
+from ..schemas import TaskCreate, TaskUpdate, TaskFilter
 from .models import Task, Account
 
 class TaskRepositoryPort(ABC):
@@ -15,8 +15,14 @@ class TaskRepositoryPort(ABC):
         pass
         
     @abstractmethod
-    def get_tasks_by_user_id(self, user_id: int) -> List[Task]:
-        """Obtiene las tareas de un usuario."""
+    def get_tasks_by_user_id(self, user_id: int, filters: Optional[TaskFilter] = None) -> List[Task]:
+        """Obtiene las tareas de un usuario (opcionalmente filtradas)."""
+        pass
+
+    @abstractmethod
+    def get_task_fields_by_user_id(self, user_id: int, fields: List[str],
+                                   filters: Optional[TaskFilter] = None) -> List[Dict[str, Any]]:
+        """Obtiene solo algunas columnas de las tareas de un usuario."""
         pass
 
     @abstractmethod
@@ -1,10 +1,10 @@
 # en app/domain/use_cases.py
 
 from fastapi import HTTPException
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from .ports import TaskRepositoryPort, AIGeneratorPort # <-- Depende de PUERTOS
 from .models import Task                               # <-- Usa Modelos de DOMINIO
-from ..schemas import TaskCreate, TaskUpdate
+from ..schemas import TaskCreate, TaskUpdate, TaskFilter, TASK_FIELDS
 
 class TaskUseCases:
     """
@@ -27,9 +27,19 @@ class TaskUseCases:
         # Llama al puerto del repositorio para guardar
         return self.task_repo.save_task(task_data=task_data, user_id=user_id)
 
-    def get_tasks_for_user(self, user_id: int) -> List[Task]:
+    def get_tasks_for_user(self, user_id: int, filters: Optional[TaskFilter] = None,
+                           fields: Optional[List[str]] = None) -> Union[List[Task], List[Dict[str, Any]]]:
+        """
+        Tareas del usuario, filtradas. Con `fields` solo se leen y devuelven
+        esas columnas (p. ej. el executor solo necesita id, tipo y configuración).
+        """
+        if fields:
+            unknown = sorted(set(fields) - set(TASK_FIELDS))
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(unknown)}")
+            return self.task_repo.get_task_fields_by_user_id(user_id=user_id, fields=fields, filters=filters)
         # Llama al puerto del repositorio para obtener datos
-        return self.task_repo.get_tasks_by_user_id(user_id=user_id)
+        return self.task_repo.get_tasks_by_user_id(user_id=user_id, filters=filters)
 
     def generate_task_from_prompt(self, prompt: str) -> str:
         try:
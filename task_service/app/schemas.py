@@ -1,7 +1,40 @@
 # en app/schemas.py (dentro de task_service)
 
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, model_validator
+from typing import Optional, Dict, Any, List
+from datetime import datetime, timezone
+from .domain.cron import CronExpression
+
+# --- Esquema de Programación ---
+
+class ScheduleSpec(BaseModel):
+    """
+    Programación recurrente de una tarea: exactamente uno de `cron`
+    (5 campos, UTC) o `interval_seconds`.
+    """
+    cron: Optional[str] = None
+    interval_seconds: Optional[int] = None
+    # Primera ejecución. Por defecto: el siguiente vencimiento del cron, o ya mismo si es un intervalo.
+    start_at: Optional[datetime] = None
+    enabled: bool = True
+
+    @model_validator(mode="after")
+    def check_schedule(self):
+        if (self.cron is None) == (self.interval_seconds is None):
+            raise ValueError("La programación necesita 'cron' o 'interval_seconds' (solo uno de los dos).")
+        if self.interval_seconds is not None and self.interval_seconds < 60:
+            raise ValueError("'interval_seconds' debe ser de al menos 60 segundos.")
+        if self.cron is not None:
+            CronExpression(self.cron)  # lanza ValueError si la expresión no es válida
+        return self
+
+    def first_run(self) -> datetime:
+        now = datetime.now(timezone.utc)
+        if self.start_at is not None:
+            return self.start_at if self.start_at.tzinfo else self.start_at.replace(tzinfo=timezone.utc)
+        if self.cron is not None:
+            return CronExpression(self.cron).next_after(now)
+        return now
 
 # --- Esquema para Crear ---
 
@@ -12,6 +45,27 @@ class TaskCreate(BaseModel):
     account_id: int
     type: str
     config_json: Dict[str, Any]
+    # Mayor = más urgente. Si no se indica, se usa la prioridad por defecto del tipo de tarea.
+    priority: Optional[int] = None
+    # Si se indica, la tarea queda como plantilla ('scheduled') y el executor crea una ejecución en cada vencimiento
+    schedule: Optional[ScheduleSpec] = None
+
+# --- Filtros del listado ---
+
+class TaskFilter(BaseModel):
+    """
+    Filtros de GET /tasks/. Se aplican en la consulta, así que la respuesta
+    crece con las tareas pedidas y no con todo el historial del usuario.
+    """
+    account_id: Optional[int] = None
+    status: Optional[List[str]] = None
+    type: Optional[str] = None
+
+# Campos que admite la proyección (`fields`) del listado: columnas de la tabla de tareas
+TASK_FIELDS = (
+    "id", "account_id", "type", "config_json", "created_at", "status",
+    "priority", "run_at", "attempts", "last_error", "schedule_id",
+)
 
 # --- Esquema para Actualizar (Update) ---
 
@@ -22,6 +76,8 @@ class TaskUpdate(BaseModel):
     """
     type: Optional[str] = None
     config_json: Optional[Dict[str, Any]] = None
+    priority: Optional[int] = None
+    schedule: Optional[ScheduleSpec] = None
 
     class Config:
         # Pydantic v2 usa esto en lugar de orm_mode